@@ -1,17 +1,26 @@
+import hmac
 import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional
 
 import httpx
 import jwt as pyjwt
 from fastapi import Request
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token as google_id_token
 from jose import JWTError, jwt
+from sqlalchemy import exists, func, or_, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from . import library_service
 from .config import settings
-from .models import UserModel, SessionModel, FolderModel, CardReviewModel
+from .http_client import get_http_client
+from .jwks_cache import apple_keys, google_keys
+from .metrics import AUTH_TOKEN_CACHE
+from .models import UserModel, SessionModel, FolderModel, CardReviewModel, DeviceLinkModel
 
 logger = logging.getLogger(__name__)
 
@@ -29,45 +38,67 @@ def create_access_token(user_id: str) -> str:
 
 
 def decode_token(token: str) -> Optional[str]:
-    """Returns user_id or None."""
+    """Returns user_id or None. 검증된 토큰은 만료 시각까지 LRU 캐시에서 재사용."""
+    now = time.time()
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+        if cached and cached[1] > now:
+            _token_cache.move_to_end(token)
+            AUTH_TOKEN_CACHE.inc(result="hit")
+            return cached[0]
+
+    AUTH_TOKEN_CACHE.inc(result="miss")
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=["HS256"])
-        return payload.get("sub")
     except JWTError:
         return None
+    user_id = payload.get("sub")
+    exp = payload.get("exp")
+    if user_id and exp:
+        with _token_cache_lock:
+            _token_cache[token] = (user_id, float(exp))
+            _token_cache.move_to_end(token)
+            while len(_token_cache) > settings.AUTH_TOKEN_CACHE_SIZE:
+                _token_cache.popitem(last=False)
+    return user_id
+
+
+# token → (user_id, exp epoch). 실패한 토큰은 캐시하지 않음
+_token_cache: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
 
 
 # ──────────────────────────────────────
 # Kakao OAuth
 # ──────────────────────────────────────
 
-async def exchange_kakao_code(code: str) -> dict:
+async def exchange_kakao_code(code: str, client: Optional[httpx.AsyncClient] = None) -> dict:
     """Exchange authorization code for access token."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            "https://kauth.kakao.com/oauth/token",
-            data={
-                "grant_type": "authorization_code",
-                "client_id": settings.KAKAO_CLIENT_ID,
-                "client_secret": settings.KAKAO_CLIENT_SECRET,
-                "redirect_uri": settings.KAKAO_REDIRECT_URI,
-                "code": code,
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
-        resp.raise_for_status()
-        return resp.json()
+    client = client or get_http_client()
+    resp = await client.post(
+        "https://kauth.kakao.com/oauth/token",
+        data={
+            "grant_type": "authorization_code",
+            "client_id": settings.KAKAO_CLIENT_ID,
+            "client_secret": settings.KAKAO_CLIENT_SECRET,
+            "redirect_uri": settings.KAKAO_REDIRECT_URI,
+            "code": code,
+        },
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    resp.raise_for_status()
+    return resp.json()
 
 
-async def get_kakao_user(access_token: str) -> dict:
+async def get_kakao_user(access_token: str, client: Optional[httpx.AsyncClient] = None) -> dict:
     """Fetch user profile from Kakao."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            "https://kapi.kakao.com/v2/user/me",
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
-        resp.raise_for_status()
-        return resp.json()
+    client = client or get_http_client()
+    resp = await client.get(
+        "https://kapi.kakao.com/v2/user/me",
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    resp.raise_for_status()
+    return resp.json()
 
 
 def find_or_create_user(db: Session, kakao_id: str, nickname: str, profile_image: str) -> UserModel:
@@ -95,7 +126,9 @@ def find_or_create_user(db: Session, kakao_id: str, nickname: str, profile_image
 # Google Token Verification
 # ──────────────────────────────────────
 
-def verify_google_token(id_token_str: str) -> dict:
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+async def verify_google_token(id_token_str: str) -> dict:
     """Verify Google ID token and return user info."""
     try:
         # 모든 Client ID 허용 (Web/iOS/Android)
@@ -105,16 +138,22 @@ def verify_google_token(id_token_str: str) -> dict:
             settings.GOOGLE_CLIENT_ID_ANDROID,
         ]
         valid_client_ids = [cid for cid in valid_client_ids if cid]
+        if not valid_client_ids:
+            raise ValueError("Invalid audience")
 
-        idinfo = google_id_token.verify_oauth2_token(
+        # 공개키는 jwks_cache에서 (Cache-Control 준수, 모르는 kid면 재조회)
+        header = pyjwt.get_unverified_header(id_token_str)
+        signing_key = await google_keys.get_signing_key(header.get("kid"))
+
+        # audience/issuer 검증
+        idinfo = pyjwt.decode(
             id_token_str,
-            google_requests.Request(),
+            signing_key.key,
+            algorithms=["RS256"],
+            audience=valid_client_ids,
+            issuer=GOOGLE_ISSUERS,
         )
 
-        # audience 검증
-        if idinfo.get("aud") not in valid_client_ids:
-            raise ValueError("Invalid audience")
-
         return {
             "sub": idinfo["sub"],
             "email": idinfo.get("email", ""),
@@ -126,16 +165,16 @@ def verify_google_token(id_token_str: str) -> dict:
         raise ValueError(f"Invalid Google token: {e}")
 
 
-async def verify_google_access_token(access_token: str) -> dict:
+async def verify_google_access_token(access_token: str, client: Optional[httpx.AsyncClient] = None) -> dict:
     """Verify Google access token via userinfo API."""
+    client = client or get_http_client()
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                "https://www.googleapis.com/oauth2/v3/userinfo",
-                headers={"Authorization": f"Bearer {access_token}"},
-            )
-            resp.raise_for_status()
-            userinfo = resp.json()
+        resp = await client.get(
+            "https://www.googleapis.com/oauth2/v3/userinfo",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        resp.raise_for_status()
+        userinfo = resp.json()
 
         return {
             "sub": userinfo["sub"],
@@ -155,33 +194,14 @@ async def verify_google_access_token(access_token: str) -> dict:
 async def verify_apple_token(id_token_str: str, nonce: Optional[str] = None) -> dict:
     """Verify Apple ID token and return user info."""
     try:
-        # Apple 공개키 가져오기
-        async with httpx.AsyncClient() as client:
-            resp = await client.get("https://appleid.apple.com/auth/keys")
-            resp.raise_for_status()
-            apple_keys = resp.json()
-
-        # JWT 헤더에서 kid 추출
+        # JWT 헤더의 kid로 Apple 공개키 조회 (jwks_cache)
         header = pyjwt.get_unverified_header(id_token_str)
-        kid = header.get("kid")
-
-        # 매칭 키 찾기
-        key_data = None
-        for key in apple_keys.get("keys", []):
-            if key.get("kid") == kid:
-                key_data = key
-                break
-
-        if not key_data:
-            raise ValueError("Apple public key not found")
+        signing_key = await apple_keys.get_signing_key(header.get("kid"))
 
         # 공개키로 JWT 디코딩
-        from jwt.algorithms import RSAAlgorithm
-        public_key = RSAAlgorithm.from_jwk(key_data)
-
         payload = pyjwt.decode(
             id_token_str,
-            public_key,
+            signing_key.key,
             algorithms=["RS256"],
             audience=settings.APPLE_BUNDLE_ID,
             issuer="https://appleid.apple.com",
@@ -268,138 +288,217 @@ def find_or_create_user_by_provider(
 # Delete user data
 # ──────────────────────────────────────
 
-def delete_user_data(db: Session, user_id: str):
-    """Delete all user data (sessions, cards, folders, reviews, grades)."""
-    from .models import CardModel, GradeModel, CardReviewModel
-
-    # 유저의 세션 ID 목록
-    sessions = db.query(SessionModel).filter(SessionModel.user_id == user_id).all()
-    session_ids = [s.id for s in sessions]
-
-    # 카드 ID 목록 (세션에 속한 카드들)
-    if session_ids:
-        cards = db.query(CardModel).filter(CardModel.session_id.in_(session_ids)).all()
-        card_ids = [c.id for c in cards]
+DELETE_BATCH_SIZE = 1000           # 트랜잭션당 최대 삭제 행 수 (테이블별)
+DELETE_BATCH_PAUSE_SECONDS = 0.01  # 배치 사이 쓰기 락을 다른 요청에 양보
 
-        # Grades 삭제
-        if card_ids:
-            db.query(GradeModel).filter(GradeModel.card_id.in_(card_ids)).delete(synchronize_session=False)
 
-        # CardReviews 삭제
-        if card_ids:
-            db.query(CardReviewModel).filter(CardReviewModel.card_id.in_(card_ids)).delete(synchronize_session=False)
-
-        # Cards 삭제
-        if card_ids:
-            db.query(CardModel).filter(CardModel.session_id.in_(session_ids)).delete(synchronize_session=False)
-
-        # Sessions 삭제
-        db.query(SessionModel).filter(SessionModel.user_id == user_id).delete(synchronize_session=False)
+def delete_user_data(
+    db: Session,
+    user_id: str,
+    batch_size: int = DELETE_BATCH_SIZE,
+    on_progress: Optional[Callable[[str, int, int], None]] = None,
+) -> dict:
+    """Delete all user data (sessions, cards, folders, reviews, grades).
+
+    ID 목록을 파이썬으로 가져오지 않고 서브쿼리 DELETE로, batch_size 단위로 나눠
+    배치마다 커밋합니다 (쓰기 락을 오래 잡지 않음). on_progress(phase, done, total)로
+    진행 상황을 받을 수 있습니다. 단계별 삭제 행 수를 반환합니다.
+    """
+    from .models import CardModel, GradeModel, SessionTimelineModel
+
+    user_sessions = select(SessionModel.id).where(SessionModel.user_id == user_id)
+    done = {"cards": 0, "sessions": 0, "reviews": 0}
+
+    def _run_batches(phase: str, count_query, delete_batch: Callable[[], int]) -> None:
+        # 앞 단계에서 함께 지워진 행이 빠지도록 단계 시작 시점에 집계
+        total = db.scalar(count_query) or 0
+        while True:
+            try:
+                deleted = delete_batch()
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            if not deleted:
+                return
+            done[phase] += deleted
+            logger.info("Deleting user %s: %s %d/%d", user_id, phase, done[phase], total)
+            if on_progress:
+                on_progress(phase, done[phase], total)
+            time.sleep(DELETE_BATCH_PAUSE_SECONDS)
+
+    # 1) 카드 배치 — 채점/복습 기록을 먼저 지우고 카드 삭제
+    def _delete_card_batch() -> int:
+        batch = (
+            select(CardModel.id)
+            .where(CardModel.session_id.in_(user_sessions))
+            .order_by(CardModel.id)
+            .limit(batch_size)
+        )
+        db.query(GradeModel).filter(GradeModel.card_id.in_(batch)).delete(synchronize_session=False)
+        db.query(CardReviewModel).filter(CardReviewModel.card_id.in_(batch)).delete(synchronize_session=False)
+        return db.query(CardModel).filter(CardModel.id.in_(batch)).delete(synchronize_session=False)
+
+    # 2) 빈 세션 배치 — 참조 세션은 구체화 전 카드(가상 ID)의 채점/복습 기록도 함께
+    def _delete_session_batch() -> int:
+        batch = user_sessions.order_by(SessionModel.id).limit(batch_size)
+        linked = db.scalars(
+            select(SessionModel.id).where(SessionModel.id.in_(batch), SessionModel.source_cardset_id.isnot(None))
+        ).all()
+        for session_id in linked:
+            library_service.delete_ref_history(db, session_id)
+        db.query(SessionTimelineModel).filter(SessionTimelineModel.session_id.in_(batch)).delete(
+            synchronize_session=False
+        )
+        return db.query(SessionModel).filter(SessionModel.id.in_(batch)).delete(synchronize_session=False)
+
+    # 3) 유저에 직접 연결된 복습 기록 (다른 세션 카드에 대한 기록 포함)
+    def _delete_review_batch() -> int:
+        batch = (
+            select(CardReviewModel.id)
+            .where(CardReviewModel.user_id == user_id)
+            .order_by(CardReviewModel.id)
+            .limit(batch_size)
+        )
+        return db.query(CardReviewModel).filter(CardReviewModel.id.in_(batch)).delete(synchronize_session=False)
 
-    # CardReviews (유저 직접 연결) 삭제
-    db.query(CardReviewModel).filter(CardReviewModel.user_id == user_id).delete(synchronize_session=False)
+    _run_batches(
+        "cards",
+        select(func.count(CardModel.id)).where(CardModel.session_id.in_(user_sessions)),
+        _delete_card_batch,
+    )
+    _run_batches("sessions", select(func.count()).select_from(user_sessions.subquery()), _delete_session_batch)
+    _run_batches(
+        "reviews",
+        select(func.count(CardReviewModel.id)).where(CardReviewModel.user_id == user_id),
+        _delete_review_batch,
+    )
 
-    # Folders 삭제
-    db.query(FolderModel).filter(FolderModel.user_id == user_id).delete(synchronize_session=False)
+    # 4) 폴더 / 디바이스 연결 기록 / 유저 — 유저당 소량이라 한 번에
+    try:
+        db.query(FolderModel).filter(FolderModel.user_id == user_id).delete(synchronize_session=False)
+        db.query(DeviceLinkModel).filter(DeviceLinkModel.user_id == user_id).delete(synchronize_session=False)
+        db.query(UserModel).filter(UserModel.id == user_id).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
-    # User 삭제
-    db.query(UserModel).filter(UserModel.id == user_id).delete(synchronize_session=False)
+    logger.info("Deleted all data for user %s: %s", user_id, done)
+    return done
 
-    db.commit()
-    logger.info("Deleted all data for user %s", user_id)
 
+def link_device_sessions(db: Session, user: UserModel, device_id: str) -> dict:
+    """디바이스의 미연결 세션/폴더/복습 기록을 유저에게 이전.
 
-def link_device_sessions(db: Session, user: UserModel, device_id: str):
-    """Migrate device_id sessions to user."""
+    세 테이블을 각각 UPDATE ... WHERE device_id = ? AND user_id IS NULL 한 번씩,
+    한 트랜잭션으로 처리합니다. device_links 마커가 있고 이후 새로 생긴 미연결
+    데이터가 없으면 쓰기 없이 반환합니다 (재호출 no-op).
+    """
     if not device_id or device_id == "anonymous":
-        return
+        return {}
 
-    # 디바이스 ID를 유저에 저장
-    user.device_id = device_id
-    db.commit()
+    marker = db.get(DeviceLinkModel, (device_id, user.id))
+    if marker and not _has_unlinked_device_rows(db, device_id):
+        return {"sessions": 0, "folders": 0, "reviews": 0, "already_linked": True}
 
-    # 해당 디바이스의 세션들을 유저에 연결 + device_id 제거 (로그아웃 후 안 보이게)
-    sessions = db.query(SessionModel).filter(
-        SessionModel.device_id == device_id,
-        SessionModel.user_id.is_(None),
-    ).all()
-    for s in sessions:
-        s.user_id = user.id
-        s.device_id = f"migrated_{user.id}"
-    db.commit()
+    # 이전된 행은 device_id를 바꿔 로그아웃 후 디바이스 조회에서 안 보이게
+    migrated = f"migrated_{user.id}"
+    values = {"user_id": user.id, "device_id": migrated}
+    try:
+        user.device_id = device_id
+        sessions = db.query(SessionModel).filter(
+            SessionModel.device_id == device_id,
+            SessionModel.user_id.is_(None),
+        ).update(values, synchronize_session=False)
+        folders = db.query(FolderModel).filter(
+            FolderModel.device_id == device_id,
+            FolderModel.user_id.is_(None),
+        ).update(values, synchronize_session=False)
+        reviews = db.query(CardReviewModel).filter(
+            CardReviewModel.device_id == device_id,
+            CardReviewModel.user_id.is_(None),
+        ).update(values, synchronize_session=False)
+
+        if marker:
+            marker.sessions_linked += sessions
+            marker.folders_linked += folders
+            marker.reviews_linked += reviews
+            marker.linked_at = datetime.utcnow()
+        else:
+            db.add(DeviceLinkModel(
+                device_id=device_id, user_id=user.id,
+                sessions_linked=sessions, folders_linked=folders, reviews_linked=reviews,
+            ))
+        db.commit()
+    except IntegrityError:
+        # 동시 요청이 먼저 마커를 만들고 이전까지 끝냄
+        db.rollback()
+        return {"sessions": 0, "folders": 0, "reviews": 0, "already_linked": True}
+    except Exception:
+        db.rollback()
+        raise
 
-    # 폴더도 마이그레이션
-    folders = db.query(FolderModel).filter(
-        FolderModel.device_id == device_id,
-        FolderModel.user_id.is_(None),
-    ).all()
-    for f in folders:
-        f.user_id = user.id
-        f.device_id = f"migrated_{user.id}"
-    db.commit()
+    logger.info("Linked %d sessions, %d folders, %d reviews from device %s to user %s",
+                sessions, folders, reviews, device_id, user.id)
+    return {"sessions": sessions, "folders": folders, "reviews": reviews, "already_linked": False}
 
-    # CardReview도 마이그레이션
-    reviews = db.query(CardReviewModel).filter(
-        CardReviewModel.device_id == device_id,
-        CardReviewModel.user_id.is_(None),
-    ).all()
-    for r in reviews:
-        r.user_id = user.id
-        r.device_id = f"migrated_{user.id}"
-    db.commit()
 
-    logger.info("Linked %d sessions, %d folders, %d reviews from device %s to user %s",
-                len(sessions), len(folders), len(reviews), device_id, user.id)
+def _has_unlinked_device_rows(db: Session, device_id: str) -> bool:
+    """마커 이후 같은 디바이스로 새로 생긴 미연결 데이터가 있는지 (읽기 전용)."""
+    return bool(db.scalar(select(or_(
+        exists().where(SessionModel.device_id == device_id, SessionModel.user_id.is_(None)),
+        exists().where(FolderModel.device_id == device_id, FolderModel.user_id.is_(None)),
+        exists().where(CardReviewModel.device_id == device_id, CardReviewModel.user_id.is_(None)),
+    ))))
 
 
 # ──────────────────────────────────────
 # Request helpers (dual auth)
 # ──────────────────────────────────────
 
-def _get_user_id_from_token(request: Request) -> Optional[str]:
-    """Extract user_id from Authorization Bearer token."""
-    auth_header = request.headers.get("Authorization", "")
-    if auth_header.startswith("Bearer "):
-        token = auth_header[7:]
-        return decode_token(token)
-    return None
-
+@dataclass(frozen=True)
+class AuthContext:
+    """요청 1건의 인증 정보. get_auth_context가 요청당 한 번 만들어 request.state에 보관."""
 
-def get_device_id(request: Request) -> str:
-    """Extract device ID from X-Device-ID header, default to 'anonymous'."""
-    return request.headers.get("X-Device-ID", "anonymous")
+    user_id: Optional[str]
+    device_id: str
+    has_token: bool = False
 
+    def session_filter(self, q):
+        """SessionModel 쿼리에 소유권 필터 적용. Priority: JWT user_id > X-Device-ID header.
 
-def get_owner_filter(request: Request):
-    """Return SQLAlchemy filter for session ownership.
-
-    Priority: JWT user_id > X-Device-ID header.
-    Returns a callable that takes SessionModel query and applies the filter.
-    """
-    user_id = _get_user_id_from_token(request)
-    device_id = get_device_id(request)
-
-    if user_id:
-        # 로그인 유저: user_id로만 조회 (마이그레이션된 세션 포함)
-        return lambda q: q.filter(SessionModel.user_id == user_id)
-    else:
+        가져오는 중(importing)인 세션은 완료 전까지 소유자에게도 보이지 않음 (app/import_service.py).
+        """
+        q = q.filter(SessionModel.status != "importing")
+        if self.user_id:
+            # 로그인 유저: user_id로만 조회 (마이그레이션된 세션 포함)
+            return q.filter(SessionModel.user_id == self.user_id)
         # 비로그인: device_id로만 조회
-        return lambda q: q.filter(SessionModel.device_id == device_id)
-
-
-def get_owner_filter_for_folder(request: Request):
-    """Return SQLAlchemy filter for folder ownership (dual auth)."""
-    user_id = _get_user_id_from_token(request)
-    device_id = get_device_id(request)
-
-    if user_id:
-        return lambda q: q.filter(FolderModel.user_id == user_id)
-    else:
-        return lambda q: q.filter(FolderModel.device_id == device_id)
-
-
-def get_owner_id(request: Request) -> dict:
-    """Return dict with user_id and device_id for session creation."""
-    user_id = _get_user_id_from_token(request)
-    device_id = get_device_id(request)
-    return {"user_id": user_id, "device_id": device_id}
+        return q.filter(SessionModel.device_id == self.device_id)
+
+    def folder_filter(self, q):
+        """FolderModel 쿼리에 소유권 필터 적용 (dual auth)."""
+        if self.user_id:
+            return q.filter(FolderModel.user_id == self.user_id)
+        return q.filter(FolderModel.device_id == self.device_id)
+
+
+def is_operator(ops_token: Optional[str]) -> bool:
+    """운영자 토큰(OPS_API_TOKEN) 확인. 설정이 비어 있으면 항상 False."""
+    return bool(settings.OPS_API_TOKEN and ops_token and hmac.compare_digest(ops_token, settings.OPS_API_TOKEN))
+
+
+def get_auth_context(request: Request) -> AuthContext:
+    """요청의 AuthContext (FastAPI dependency). JWT는 요청당 최대 한 번만 검증."""
+    auth = getattr(request.state, "auth", None)
+    if auth is None:
+        auth_header = request.headers.get("Authorization", "")
+        has_token = auth_header.startswith("Bearer ")
+        auth = AuthContext(
+            user_id=decode_token(auth_header[7:]) if has_token else None,
+            device_id=request.headers.get("X-Device-ID", "anonymous"),
+            has_token=has_token,
+        )
+        request.state.auth = auth
+    return auth
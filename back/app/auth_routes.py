@@ -1,15 +1,17 @@
 import logging
 from urllib.parse import urlencode
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from pydantic import BaseModel as PydanticBaseModel
 
 from .auth import (
+    AuthContext,
     create_access_token,
-    decode_token,
+    get_auth_context,
     exchange_kakao_code,
     get_kakao_user,
     find_or_create_user,
@@ -19,10 +21,9 @@ from .auth import (
     verify_apple_token,
     delete_user_data,
     link_device_sessions,
-    get_device_id,
 )
 from .config import settings
-from .database import get_db
+from .database import get_db, get_async_db
 from .models import UserModel, UserResponse
 
 logger = logging.getLogger(__name__)
@@ -50,7 +51,7 @@ def kakao_login(platform: str = "web"):
 # ──────────────────────────────────────
 
 @router.get("/kakao/callback")
-async def kakao_callback(code: str, state: str = "", db: Session = Depends(get_db)):
+async def kakao_callback(code: str, state: str = "", db: AsyncSession = Depends(get_async_db)):
     try:
         # 1. 코드 → 토큰 교환
         token_data = await exchange_kakao_code(code)
@@ -64,7 +65,7 @@ async def kakao_callback(code: str, state: str = "", db: Session = Depends(get_d
         profile_image = properties.get("profile_image", "")
 
         # 3. 유저 생성/조회
-        user = find_or_create_user(db, kakao_id, nickname, profile_image)
+        user = await db.run_sync(lambda s: find_or_create_user(s, kakao_id, nickname, profile_image))
 
         # 4. JWT 발급
         jwt_token = create_access_token(user.id)
@@ -90,16 +91,13 @@ async def kakao_callback(code: str, state: str = "", db: Session = Depends(get_d
 # ──────────────────────────────────────
 
 @router.get("/me")
-def get_me(request: Request, db: Session = Depends(get_db)):
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
+def get_me(auth: AuthContext = Depends(get_auth_context), db: Session = Depends(get_db)):
+    if not auth.has_token:
         raise HTTPException(401, "인증이 필요합니다.")
-
-    user_id = decode_token(auth_header[7:])
-    if not user_id:
+    if not auth.user_id:
         raise HTTPException(401, "유효하지 않은 토큰입니다.")
 
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    user = db.query(UserModel).filter(UserModel.id == auth.user_id).first()
     if not user:
         raise HTTPException(404, "사용자를 찾을 수 없습니다.")
 
@@ -117,23 +115,19 @@ def get_me(request: Request, db: Session = Depends(get_db)):
 # ──────────────────────────────────────
 
 @router.post("/link-device")
-def link_device(request: Request, db: Session = Depends(get_db)):
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
+def link_device(auth: AuthContext = Depends(get_auth_context), db: Session = Depends(get_db)):
+    if not auth.has_token:
         raise HTTPException(401, "인증이 필요합니다.")
-
-    user_id = decode_token(auth_header[7:])
-    if not user_id:
+    if not auth.user_id:
         raise HTTPException(401, "유효하지 않은 토큰입니다.")
 
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    user = db.query(UserModel).filter(UserModel.id == auth.user_id).first()
     if not user:
         raise HTTPException(404, "사용자를 찾을 수 없습니다.")
 
-    device_id = get_device_id(request)
-    link_device_sessions(db, user, device_id)
+    linked = link_device_sessions(db, user, auth.device_id)
 
-    return {"linked": True, "device_id": device_id}
+    return {"linked": True, "device_id": auth.device_id, **linked}
 
 
 # ──────────────────────────────────────
@@ -156,26 +150,26 @@ class AppleVerifyRequest(PydanticBaseModel):
 # ──────────────────────────────────────
 
 @router.post("/google/verify")
-async def google_verify(body: GoogleVerifyRequest, db: Session = Depends(get_db)):
+async def google_verify(body: GoogleVerifyRequest, db: AsyncSession = Depends(get_async_db)):
     if not body.id_token and not body.access_token:
         raise HTTPException(400, "id_token 또는 access_token이 필요합니다.")
 
     try:
         if body.id_token:
-            google_user = verify_google_token(body.id_token)
+            google_user = await verify_google_token(body.id_token)
         else:
             google_user = await verify_google_access_token(body.access_token)
     except ValueError as e:
         raise HTTPException(401, str(e))
 
-    user = find_or_create_user_by_provider(
-        db,
+    user = await db.run_sync(lambda s: find_or_create_user_by_provider(
+        s,
         provider="google",
         provider_id=google_user["sub"],
         email=google_user.get("email", ""),
         nickname=google_user.get("name", ""),
         profile_image=google_user.get("picture", ""),
-    )
+    ))
 
     token = create_access_token(user.id)
     return {"token": token, "user_id": user.id}
@@ -186,19 +180,19 @@ async def google_verify(body: GoogleVerifyRequest, db: Session = Depends(get_db)
 # ──────────────────────────────────────
 
 @router.post("/apple/verify")
-async def apple_verify(body: AppleVerifyRequest, db: Session = Depends(get_db)):
+async def apple_verify(body: AppleVerifyRequest, db: AsyncSession = Depends(get_async_db)):
     try:
         apple_user = await verify_apple_token(body.id_token, body.nonce)
     except ValueError as e:
         raise HTTPException(401, str(e))
 
-    user = find_or_create_user_by_provider(
-        db,
+    user = await db.run_sync(lambda s: find_or_create_user_by_provider(
+        s,
         provider="apple",
         provider_id=apple_user["sub"],
         email=apple_user.get("email", ""),
         nickname=body.full_name or "",
-    )
+    ))
 
     token = create_access_token(user.id)
     return {"token": token, "user_id": user.id}
@@ -209,18 +203,15 @@ async def apple_verify(body: AppleVerifyRequest, db: Session = Depends(get_db)):
 # ──────────────────────────────────────
 
 @router.delete("/me")
-def delete_me(request: Request, db: Session = Depends(get_db)):
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
+def delete_me(auth: AuthContext = Depends(get_auth_context), db: Session = Depends(get_db)):
+    if not auth.has_token:
         raise HTTPException(401, "인증이 필요합니다.")
-
-    user_id = decode_token(auth_header[7:])
-    if not user_id:
+    if not auth.user_id:
         raise HTTPException(401, "유효하지 않은 토큰입니다.")
 
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    user = db.query(UserModel).filter(UserModel.id == auth.user_id).first()
     if not user:
         raise HTTPException(404, "사용자를 찾을 수 없습니다.")
 
-    delete_user_data(db, user_id)
+    delete_user_data(db, auth.user_id)
     return {"deleted": True}
@@ -0,0 +1,175 @@
+"""카드 일괄 저장.
+
+ORM 객체를 한 장씩 db.add 하지 않고, ID를 미리 만든 행(dict)을 Core INSERT로
+executemany 합니다. 배치 크기로 나눠 실행하므로 수천 장도 파라미터 목록이 과도하게
+커지지 않습니다. PostgreSQL에서는 SQLAlchemy가 executemany를 다중 VALUES로 묶어 전송합니다.
+"""
+
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import DateTime, String, Table, cast, func, insert, literal, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import CardModel, PublicCardModel
+
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = 500
+
+
+# ──────────────────────────────────────
+# 행 생성 (ID/기본값을 미리 채움 — 모델 default와 동일 규칙)
+# ──────────────────────────────────────
+
+CARD_ID_HEX_CHARS = 16  # 가져오기 한 번에 수만 장 — 8자리(32비트)는 테이블 규모에서 충돌이 현실적
+
+
+def new_card_id() -> str:
+    return f"card_{uuid.uuid4().hex[:CARD_ID_HEX_CHARS]}"
+
+
+def new_public_card_id() -> str:
+    return f"pcrd_{uuid.uuid4().hex[:8]}"
+
+
+def card_rows(
+    session_id: str, cards: Iterable[dict], status: str = "accepted",
+    created_at: Optional[datetime] = None, start: int = 0,
+) -> list[dict]:
+    """카드 dict 목록 → cards 테이블 행. 카드에 status가 없으면 인자 status 사용.
+
+    created_at을 1µs씩 늘려 (created_at, id) 정렬이 입력 순서와 같게 합니다 (카드 페이지 정렬 키).
+    여러 번 나눠 만들 때는 같은 created_at 기준과 이어지는 start를 넘기면 순서가 이어집니다.
+    """
+    now = created_at or datetime.utcnow()
+    return [
+        {
+            "id": new_card_id(),
+            "session_id": session_id,
+            "front": card["front"],
+            "back": card["back"],
+            "evidence": card.get("evidence") or "",
+            "evidence_page": card.get("evidence_page") or 0,
+            "tags": card.get("tags") or "",
+            "template_type": card.get("template_type") or "definition",
+            "status": card.get("status") or status,
+            "created_at": now + timedelta(microseconds=start + idx),
+        }
+        for idx, card in enumerate(cards)
+    ]
+
+
+def public_card_rows(cardset_id: str, cards: Iterable) -> list[dict]:
+    """CardModel(또는 같은 속성을 가진 객체) 목록 → public_cards 행. 순서대로 sort_order 부여."""
+    return [
+        {
+            "id": new_public_card_id(),
+            "cardset_id": cardset_id,
+            "front": card.front,
+            "back": card.back,
+            "evidence": card.evidence or "",
+            "template_type": card.template_type or "definition",
+            "sort_order": idx,
+        }
+        for idx, card in enumerate(cards)
+    ]
+
+
+def _batches(rows: list[dict], size: int) -> Iterator[list[dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+# ──────────────────────────────────────
+# INSERT (동기 / 비동기)
+# ──────────────────────────────────────
+
+def bulk_insert(db: Session, table: Table, rows: list[dict], batch_size: int = BULK_BATCH_SIZE) -> int:
+    """rows를 batch_size 단위 executemany로 INSERT. 커밋은 호출자가 합니다."""
+    stmt = insert(table)
+    for batch in _batches(rows, batch_size):
+        db.execute(stmt, batch)
+    return len(rows)
+
+
+async def bulk_insert_async(
+    db: AsyncSession, table: Table, rows: list[dict], batch_size: int = BULK_BATCH_SIZE,
+) -> int:
+    stmt = insert(table)
+    for batch in _batches(rows, batch_size):
+        await db.execute(stmt, batch)
+    return len(rows)
+
+
+def insert_cards(db: Session, rows: list[dict]) -> int:
+    return bulk_insert(db, CardModel.__table__, rows)
+
+
+async def insert_cards_async(db: AsyncSession, rows: list[dict]) -> int:
+    return await bulk_insert_async(db, CardModel.__table__, rows)
+
+
+def insert_public_cards(db: Session, rows: list[dict]) -> int:
+    return bulk_insert(db, PublicCardModel.__table__, rows)
+
+
+# ──────────────────────────────────────
+# 공개 카드셋 → 세션 복사 (INSERT ... SELECT, 카드가 앱을 거치지 않음)
+# ──────────────────────────────────────
+
+def _card_id_sql(dialect_name: str):
+    """DB에서 행마다 new_card_id와 같은 형식(card_ + 16자리 hex) ID를 생성하는 SQL 식."""
+    if dialect_name == "postgresql":
+        return literal_column(
+            f"'card_' || substr(md5(random()::text || clock_timestamp()::text), 1, {CARD_ID_HEX_CHARS})"
+        )
+    return literal_column(f"'card_' || lower(hex(randomblob({CARD_ID_HEX_CHARS // 2})))")
+
+
+def _created_at_sql(dialect_name: str, base: datetime, sort_order):
+    """base + sort_order µs를 행마다 계산하는 SQL 식 (card_rows와 같은 1µs 간격 — 카드 페이지 순서 = sort_order)."""
+    if dialect_name == "postgresql":
+        return literal(base, DateTime) + sort_order * literal_column("interval '1 microsecond'")
+    # SQLite는 DateTime을 'YYYY-MM-DD HH:MM:SS.ffffff' 문자열로 저장 — 초 단위로 더한 뒤 µs 자리를 붙임
+    base = base.replace(microsecond=0)
+    seconds = func.datetime(
+        literal(base.strftime("%Y-%m-%d %H:%M:%S")),
+        literal("+").concat(cast(sort_order // 1_000_000, String)).concat(" seconds"),
+    )
+    return seconds.concat(".").concat(func.printf("%06d", sort_order % 1_000_000))
+
+
+def copy_public_cards(db: Session, cardset_id: str, session_id: str) -> int:
+    """public_cards의 카드를 session_id 세션의 accepted 카드로 서버 측 복사. 복사한 장수를 반환."""
+    pc = PublicCardModel.__table__
+    dialect_name = db.get_bind().dialect.name
+    source = (
+        select(
+            _card_id_sql(dialect_name),
+            literal(session_id),
+            pc.c.front,
+            pc.c.back,
+            pc.c.evidence,
+            literal(0),
+            literal(""),
+            pc.c.template_type,
+            literal("accepted"),
+            _created_at_sql(dialect_name, datetime.utcnow(), pc.c.sort_order),
+        )
+        .where(pc.c.cardset_id == cardset_id)
+        .order_by(pc.c.sort_order)
+    )
+    cards = CardModel.__table__
+    stmt = insert(cards).from_select(
+        [
+            cards.c.id, cards.c.session_id, cards.c.front, cards.c.back, cards.c.evidence,
+            cards.c.evidence_page, cards.c.tags, cards.c.template_type, cards.c.status, cards.c.created_at,
+        ],
+        source,
+        include_defaults=False,
+    )
+    return db.execute(stmt).rowcount
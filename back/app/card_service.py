@@ -4,7 +4,9 @@ import logging
 from typing import List, Dict
 
 from .config import settings
+from . import timeline
 from .claude_cli import run_claude
+from .metrics import CHUNK_CHARS, CHUNK_PAGES, CLI_PARSE_FAILURES, CLI_RETRIES
 
 logger = logging.getLogger(__name__)
 
@@ -329,13 +331,16 @@ async def _run_cli_with_retry(
     system_prompt: str, user_prompt: str,
     chunk_idx: int, step_name: str,
     session_id: str | None = None,
+    step: str = "other",
 ) -> str:
-    """CLI 호출 + 재시도 공통 로직. 원본 텍스트 반환."""
+    """CLI 호출 + 재시도 공통 로직. 원본 텍스트 반환. step은 메트릭 라벨."""
     last_error = None
     raw_text = ""
     for attempt in range(MAX_RETRIES):
         try:
-            raw_text = await run_claude(system_prompt, user_prompt, model=settings.LLM_MODEL, session_id=session_id)
+            raw_text = await run_claude(
+                system_prompt, user_prompt, model=settings.LLM_MODEL, session_id=session_id, step=step,
+            )
             if not raw_text or not raw_text.strip():
                 raise ValueError("빈 응답")
             return raw_text
@@ -345,6 +350,7 @@ async def _run_cli_with_retry(
                 delay = RETRY_DELAYS[min(attempt, len(RETRY_DELAYS) - 1)]
                 logger.warning("청크 #%d %s 오류 (시도 %d/%d, %ds 후): %s: %s",
                                chunk_idx, step_name, attempt + 1, MAX_RETRIES, delay, type(e).__name__, e)
+                CLI_RETRIES.inc(step=step, reason="cli")
                 await asyncio.sleep(delay)
             else:
                 logger.error("청크 #%d %s 최종 실패: %s: %s", chunk_idx, step_name, type(e).__name__, e)
@@ -364,13 +370,15 @@ async def _analyze_chunk(
     total_text_len = sum(len(p["text"]) for p in pages)
     logger.info("청크 #%d 분석 시작: pages=%s, 텍스트=%d자", chunk_idx, page_nums, total_text_len)
 
-    raw_text = await _run_cli_with_retry(system_prompt, user_prompt, chunk_idx, "분석", session_id=session_id)
+    raw_text = await _run_cli_with_retry(system_prompt, user_prompt, chunk_idx, "분석",
+                                         session_id=session_id, step="analysis")
 
     # JSON 파싱 재시도
     last_error = None
     for attempt in range(MAX_RETRIES):
         try:
-            analysis = _parse_analysis_json(raw_text)
+            with timeline.span("parse", step="analysis"):
+                analysis = _parse_analysis_json(raw_text)
             concept_count = len(analysis.get("key_concepts", []))
             comparison_count = len(analysis.get("comparison_pairs", []))
             cloze_count = len(analysis.get("cloze_candidates", []))
@@ -379,13 +387,16 @@ async def _analyze_chunk(
             return analysis
         except (ValueError, json.JSONDecodeError) as e:
             last_error = e
+            CLI_PARSE_FAILURES.inc(step="analysis")
             if attempt < MAX_RETRIES - 1:
                 delay = RETRY_DELAYS[min(attempt, len(RETRY_DELAYS) - 1)]
+                CLI_RETRIES.inc(step="analysis", reason="parse")
                 logger.warning("청크 #%d 분석 JSON 파싱 실패 (시도 %d/%d, %ds 후): %s | 앞 300자: %s",
                                chunk_idx, attempt + 1, MAX_RETRIES, delay, e, raw_text[:300])
                 await asyncio.sleep(delay)
                 # CLI 재호출
-                raw_text = await _run_cli_with_retry(system_prompt, user_prompt, chunk_idx, "분석(재)", session_id=session_id)
+                raw_text = await _run_cli_with_retry(system_prompt, user_prompt, chunk_idx, "분석(재)",
+                                                     session_id=session_id, step="analysis")
             else:
                 logger.error("청크 #%d 분석 JSON 최종 실패: %s | 앞 500자: %s", chunk_idx, e, raw_text[:500])
                 raise
@@ -412,23 +423,29 @@ async def _create_cards_from_analysis(
 
     logger.info("청크 #%d 카드 생성 시작: 분석 기반", chunk_idx)
 
-    raw_text = await _run_cli_with_retry(system_prompt, user_prompt, chunk_idx, "카드생성", session_id=session_id)
+    raw_text = await _run_cli_with_retry(system_prompt, user_prompt, chunk_idx, "카드생성",
+                                         session_id=session_id, step="card_creation")
 
     # JSON 파싱 재시도
     last_error = None
     for attempt in range(MAX_RETRIES):
         try:
-            cards_raw = _parse_cards_json(raw_text)
+            with timeline.span("parse", step="card_creation"):
+                cards_raw = _parse_cards_json(raw_text)
             logger.info("청크 #%d 카드 파싱 성공: %d장", chunk_idx, len(cards_raw))
-            return _validate_cards(cards_raw, template_type)
+            with timeline.span("validation", cards=len(cards_raw)):
+                return _validate_cards(cards_raw, template_type)
         except (ValueError, json.JSONDecodeError) as e:
             last_error = e
+            CLI_PARSE_FAILURES.inc(step="card_creation")
             if attempt < MAX_RETRIES - 1:
                 delay = RETRY_DELAYS[min(attempt, len(RETRY_DELAYS) - 1)]
+                CLI_RETRIES.inc(step="card_creation", reason="parse")
                 logger.warning("청크 #%d 카드 JSON 파싱 실패 (시도 %d/%d, %ds 후): %s | 앞 300자: %s",
                                chunk_idx, attempt + 1, MAX_RETRIES, delay, e, raw_text[:300])
                 await asyncio.sleep(delay)
-                raw_text = await _run_cli_with_retry(system_prompt, user_prompt, chunk_idx, "카드생성(재)", session_id=session_id)
+                raw_text = await _run_cli_with_retry(system_prompt, user_prompt, chunk_idx, "카드생성(재)",
+                                                     session_id=session_id, step="card_creation")
             else:
                 logger.error("청크 #%d 카드 JSON 최종 실패: %s | 앞 500자: %s", chunk_idx, e, raw_text[:500])
                 raise
@@ -464,6 +481,24 @@ MAX_CARDS = 120
 CHUNK_SIZE = 5  # 5페이지씩 분할
 
 
+def _plan_chunks(pages: List[Dict]) -> List[List[Dict]]:
+    """5페이지씩 분할 후, 텍스트가 너무 적은 청크는 이전 청크에 합침."""
+    if len(pages) <= CHUNK_SIZE:
+        return [pages]
+    raw_chunks = [pages[i:i + CHUNK_SIZE] for i in range(0, len(pages), CHUNK_SIZE)]
+    MIN_CHUNK_CHARS = 200
+    chunks_list: List[List[Dict]] = []
+    for chunk in raw_chunks:
+        chunk_len = sum(len(p["text"]) for p in chunk)
+        if chunks_list and chunk_len < MIN_CHUNK_CHARS:
+            chunks_list[-1].extend(chunk)
+            logger.info("짧은 청크 (%d자, %d페이지) → 이전 청크에 병합", chunk_len, len(chunk))
+        else:
+            chunks_list.append(list(chunk))
+    logger.info("PDF %d페이지 → %d청크 병렬 처리", len(pages), len(chunks_list))
+    return chunks_list
+
+
 async def generate_cards(
     pages: List[Dict],
     template_type: str = "definition",
@@ -475,28 +510,21 @@ async def generate_cards(
     total_text_len = sum(len(p["text"]) for p in pages)
     logger.info("카드 생성 시작: %d페이지, 총 %d자, 템플릿=%s", len(pages), total_text_len, template_type)
 
-    if len(pages) <= CHUNK_SIZE:
-        chunks_list = [pages]
-    else:
-        # 5페이지씩 분할 후, 텍스트가 너무 적은 청크는 이전 청크에 합침
-        raw_chunks = [pages[i:i + CHUNK_SIZE] for i in range(0, len(pages), CHUNK_SIZE)]
-        MIN_CHUNK_CHARS = 200
-        chunks_list: List[List[Dict]] = []
-        for chunk in raw_chunks:
-            chunk_len = sum(len(p["text"]) for p in chunk)
-            if chunks_list and chunk_len < MIN_CHUNK_CHARS:
-                chunks_list[-1].extend(chunk)
-                logger.info("짧은 청크 (%d자, %d페이지) → 이전 청크에 병합", chunk_len, len(chunk))
-            else:
-                chunks_list.append(list(chunk))
-        logger.info("PDF %d페이지 → %d청크 병렬 처리", len(pages), len(chunks_list))
+    with timeline.span("chunk_planning", pages=len(pages)):
+        chunks_list = _plan_chunks(pages)
 
     total_chunks = len(chunks_list)
+    for chunk in chunks_list:
+        CHUNK_PAGES.observe(len(chunk))
+        CHUNK_CHARS.observe(sum(len(p["text"]) for p in chunk))
     if on_progress:
         await on_progress(completed_chunks=0, total_chunks=total_chunks, phase="generating")
 
     if total_chunks == 1:
-        result = await _generate_chunk(chunks_list[0], template_type, chunk_idx=0, session_id=session_id, is_math=is_math)
+        with timeline.chunk(0):
+            result = await _generate_chunk(
+                chunks_list[0], template_type, chunk_idx=0, session_id=session_id, is_math=is_math,
+            )
         if on_progress:
             await on_progress(completed_chunks=1, total_chunks=total_chunks, phase="generating")
     else:
@@ -509,7 +537,10 @@ async def generate_cards(
         async def _chunk_with_progress(chunk, idx):
             nonlocal _completed_count, failed_chunks
             try:
-                cards = await _generate_chunk(chunk, template_type, chunk_idx=idx, session_id=session_id, is_math=is_math)
+                with timeline.chunk(idx):
+                    cards = await _generate_chunk(
+                        chunk, template_type, chunk_idx=idx, session_id=session_id, is_math=is_math,
+                    )
                 logger.info("청크 #%d 결과: %d장", idx, len(cards))
                 return cards
             except Exception as e:
@@ -1,9 +1,17 @@
 import asyncio
+import base64
+import json
 import logging
 import os
+import time
+
 import psutil
 
+from . import timeline
 from .config import settings
+from .metrics import (
+    CLI_CALLS, CLI_IN_FLIGHT, CLI_LATENCY, CLI_QUEUE_WAIT, CLI_WAITING, MEMORY_AVAILABLE_BYTES,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +42,7 @@ _memory_alert_sent = False  # 중복 알림 방지
 def _check_memory() -> dict:
     """시스템 메모리 상태를 반환합니다."""
     mem = psutil.virtual_memory()
+    MEMORY_AVAILABLE_BYTES.set(mem.available)
     return {
         "total_mb": round(mem.total / 1024 / 1024),
         "available_mb": round(mem.available / 1024 / 1024),
@@ -47,8 +56,8 @@ async def _warn_if_low_memory():
     mem = _check_memory()
     if mem["available_mb"] < MEMORY_WARN_MB and not _memory_alert_sent:
         _memory_alert_sent = True
-        from .slack import send_slack_alert
-        await send_slack_alert(
+        from .slack import alert
+        alert(
             "메모리 부족 경고",
             f"가용 메모리: {mem['available_mb']}MB / 전체: {mem['total_mb']}MB ({mem['percent_used']}% 사용)\n"
             f"Semaphore=5, CLI 동시 실행 수를 줄이는 것을 검토하세요.",
@@ -65,11 +74,23 @@ async def run_claude(
     model: str | None = None,
     tools: str = "",
     session_id: str | None = None,
+    images: list[bytes] | None = None,
+    step: str = "other",
 ) -> str:
-    """Claude Code CLI `-p` 모드로 AI 호출. JSON 출력 강제."""
-    import json
+    """Claude Code CLI `-p` 모드로 AI 호출. JSON 출력 강제.
+
+    step은 메트릭 라벨 (analysis / card_creation / review / grade).
 
-    cmd = ["claude", "-p", "--output-format", "json", "--permission-mode", "default"]
+    images가 있으면 stream-json 입력으로 PNG를 base64 인라인 첨부합니다
+    (임시 파일 + Read 도구 왕복 없음). 이미지는 전달된 순서대로 텍스트 앞에 붙습니다.
+    """
+    if images:
+        cmd = [
+            "claude", "-p", "--input-format", "stream-json", "--output-format", "stream-json",
+            "--verbose", "--permission-mode", "default",
+        ]
+    else:
+        cmd = ["claude", "-p", "--output-format", "json", "--permission-mode", "default"]
 
     # --system-prompt 플래그는 빈 result를 빈번하게 반환하는 이슈가 있어
     # system prompt를 user prompt 앞에 임베드하는 방식으로 통일
@@ -88,23 +109,58 @@ async def run_claude(
     # CLAUDE_CODE_OAUTH_TOKEN 등 인증 관련 env는 유지
     env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
 
-    logger.info("CLI 실행 대기 (model=%s, prompt=%d chars, session=%s)", model or "default", len(user_prompt), session_id or "none")
+    if images:
+        stdin_text = _build_stream_json_input(user_prompt, images)
+    else:
+        stdin_text = user_prompt
+
+    logger.info("CLI 실행 대기 (model=%s, prompt=%d chars, images=%d, session=%s)",
+                model or "default", len(user_prompt), len(images or []), session_id or "none")
 
     # 이중 Semaphore: 세션별 제한 → 글로벌 제한
     session_sem = _get_session_semaphore(session_id) if session_id else None
 
-    if session_sem:
-        await session_sem.acquire()
+    queued_at = time.monotonic()
+    CLI_WAITING.inc()
+    waiting = True
+    session_acquired = False
     try:
-        async with _cli_semaphore:
+        with timeline.span("semaphore_wait", step=step):
+            if session_sem:
+                await session_sem.acquire()
+                session_acquired = True
+            await _cli_semaphore.acquire()
+        try:
+            CLI_WAITING.dec()
+            waiting = False
+            CLI_QUEUE_WAIT.observe(time.monotonic() - queued_at, step=step)
             await _warn_if_low_memory()
-            raw = await _run_cli(cmd, env, user_prompt)
+            CLI_IN_FLIGHT.inc()
+            started = time.monotonic()
+            try:
+                with timeline.span("cli_process", step=step):
+                    raw = await _run_cli(cmd, env, stdin_text)
+            except Exception as e:
+                outcome = "timeout" if "타임아웃" in str(e) else "error"
+                CLI_CALLS.inc(step=step, outcome=outcome)
+                raise
+            finally:
+                CLI_IN_FLIGHT.dec()
+                CLI_LATENCY.observe(time.monotonic() - started, step=step)
+            CLI_CALLS.inc(step=step, outcome="ok")
+        finally:
+            _cli_semaphore.release()
     finally:
-        if session_sem:
+        if waiting:
+            CLI_WAITING.dec()
+        if session_acquired:
             session_sem.release()
 
     logger.info("CLI 응답 수신: %d chars", len(raw))
 
+    if images:
+        raw = _last_stream_json_result(raw)
+
     # --output-format json → {"type":"result","result":"..."}
     try:
         parsed = json.loads(raw)
@@ -121,6 +177,39 @@ async def run_claude(
         return raw
 
 
+def _build_stream_json_input(user_prompt: str, images: list[bytes]) -> str:
+    """stream-json 입력 1줄: 이미지 블록(순서 유지) + 텍스트 블록."""
+    content = [
+        {
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": "image/png",
+                "data": base64.b64encode(image).decode("ascii"),
+            },
+        }
+        for image in images
+    ]
+    content.append({"type": "text", "text": user_prompt})
+    message = {"type": "user", "message": {"role": "user", "content": content}}
+    return json.dumps(message, ensure_ascii=False) + "\n"
+
+
+def _last_stream_json_result(raw: str) -> str:
+    """stream-json 출력(NDJSON)에서 마지막 result 이벤트 줄을 찾아 반환."""
+    for line in reversed(raw.splitlines()):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(event, dict) and event.get("type") == "result":
+            return line
+    return raw
+
+
 async def _run_cli(cmd: list, env: dict, user_prompt: str) -> str:
     logger.info("CLI 프로세스 시작")
 
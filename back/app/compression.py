@@ -0,0 +1,228 @@
+"""응답 압축 (gzip / brotli).
+
+카드 수백 장짜리 세션·카드셋 응답(한글 본문 + 근거)은 수백 KB라, 앱에서 바로 압축해 내보냅니다.
+- CompressionMiddleware: Accept-Encoding에 따라 br(설치돼 있으면) 또는 gzip으로 압축
+  - 본문이 COMPRESSION_MIN_BYTES 미만이거나 압축 대상 타입이 아니면 그대로
+  - 스트리밍 응답(more_body)은 청크마다 압축 후 flush — 전체를 모으지 않고 바로 내보냄
+  - 이미 Content-Encoding이 있는 응답(미리 압축된 캐시 응답)은 건드리지 않음
+- precompress: 캐시 항목을 저장할 때 한 번만 높은 압축률로 만들어 두는 용도 (explore_cache)
+- 절약한 바이트는 decard_response_compression_saved_bytes_total{encoding,source}로 집계
+nginx도 gzip을 켜 두었지만 Content-Encoding이 붙은 응답은 다시 압축하지 않습니다.
+"""
+
+import gzip
+import logging
+import zlib
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .metrics import RESPONSE_COMPRESSION, RESPONSE_COMPRESSION_SAVED_BYTES
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 선택 의존성
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+if brotli is None:
+    logger.info("brotli 미설치 — 응답 압축은 gzip만 사용합니다 (pip install brotli)")
+
+PRECOMPRESS_GZIP_LEVEL = 9
+PRECOMPRESS_BROTLI_QUALITY = 9  # 11은 수백 KB에서 수백 ms — 캐시 미스 응답이 늦어짐
+
+_COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "application/xml")
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """선호 순서의 지원 인코딩."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Accept-Encoding → 사용할 인코딩 (br > gzip), 받을 수 없으면 None."""
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES or media_type.endswith("+json")
+
+
+def compress(body: bytes, encoding: str, precompress: bool = False) -> bytes:
+    if encoding == "br":
+        quality = PRECOMPRESS_BROTLI_QUALITY if precompress else settings.COMPRESSION_BROTLI_QUALITY
+        return brotli.compress(body, quality=quality)
+    level = PRECOMPRESS_GZIP_LEVEL if precompress else settings.COMPRESSION_GZIP_LEVEL
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """지원 인코딩별로 미리 압축한 본문 (임계값 미만이거나 압축 효과가 없으면 빈 dict)."""
+    if not settings.COMPRESSION_ENABLED or len(body) < settings.COMPRESSION_MIN_BYTES:
+        return {}
+    variants = {}
+    for encoding in supported_encodings():
+        encoded = compress(body, encoding, precompress=True)
+        if len(encoded) < len(body):
+            variants[encoding] = encoded
+    return variants
+
+
+def record_saved(encoding: str, source: str, original: int, compressed: int) -> None:
+    RESPONSE_COMPRESSION.inc(encoding=encoding, source=source)
+    RESPONSE_COMPRESSION_SAVED_BYTES.inc(max(0, original - compressed), encoding=encoding, source=source)
+
+
+def _vary_accept_encoding(headers: MutableHeaders) -> None:
+    if "accept-encoding" not in headers.get("vary", "").lower():
+        headers.add_vary_header("Accept-Encoding")
+
+
+class _StreamCompressor:
+    """청크 단위 압축기 — 청크마다 flush해 받은 만큼 바로 내보냄."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)  # gzip 헤더
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._br.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+# ──────────────────────────────────────
+# ASGI 미들웨어
+# ──────────────────────────────────────
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        await _Responder(self.app, encoding)(scope, receive, send)
+
+
+class _Responder:
+    """응답 하나의 start/body 메시지를 가로채 압축 여부를 정하고 변환."""
+
+    def __init__(self, app: ASGIApp, encoding: Optional[str]):
+        self.app = app
+        self.encoding = encoding
+        self.send: Send = None
+        self.start: Optional[Message] = None
+        self.mode = "undecided"   # undecided | passthrough | stream
+        self.compressor: Optional[_StreamCompressor] = None
+        self.original = 0
+        self.compressed = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self._send)
+
+    async def _send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            eligible = (
+                message["status"] not in (204, 206, 304)
+                and "content-encoding" not in headers
+                and is_compressible(headers.get("content-type", ""))
+            )
+            if not eligible:
+                self.mode = "passthrough"
+                await self.send(message)
+            elif self.encoding is None:
+                # 압축본을 캐시하는 중간 서버가 인코딩별로 구분하도록
+                self.mode = "passthrough"
+                _vary_accept_encoding(MutableHeaders(raw=message["headers"]))
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.mode == "passthrough":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.mode == "undecided":
+            if not more_body:
+                await self._send_whole(body)
+                return
+            self._begin_stream()
+            await self.send(self.start)
+            self.mode = "stream"
+
+        self.original += len(body)
+        out = self.compressor.chunk(body) if body else b""
+        if not more_body:
+            out += self.compressor.finish()
+            self.compressed += len(out)
+            record_saved(self.encoding, "stream", self.original, self.compressed)
+            await self.send({"type": "http.response.body", "body": out, "more_body": False})
+            return
+        self.compressed += len(out)
+        if out:
+            await self.send({"type": "http.response.body", "body": out, "more_body": True})
+
+    async def _send_whole(self, body: bytes) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        _vary_accept_encoding(headers)
+        if len(body) < settings.COMPRESSION_MIN_BYTES:
+            RESPONSE_COMPRESSION.inc(encoding="identity", source="below_threshold")
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+        encoded = compress(body, self.encoding)
+        if len(encoded) >= len(body):
+            RESPONSE_COMPRESSION.inc(encoding="identity", source="incompressible")
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+        headers["Content-Encoding"] = self.encoding
+        headers["Content-Length"] = str(len(encoded))
+        record_saved(self.encoding, "dynamic", len(body), len(encoded))
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": encoded, "more_body": False})
+
+    def _begin_stream(self) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        _vary_accept_encoding(headers)
+        headers["Content-Encoding"] = self.encoding
+        if "content-length" in headers:
+            del headers["content-length"]
+        self.compressor = _StreamCompressor(self.encoding)
@@ -10,6 +10,12 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///./decard.db"
+    # 커넥션 풀 (PostgreSQL 전용 — SQLite는 파일 락이 병목이라 풀 설정 무의미)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_PRE_PING: bool = True
 
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:8080"
@@ -27,6 +33,7 @@ class Settings(BaseSettings):
     # JWT
     JWT_SECRET_KEY: str = "change-me-in-production"
     JWT_EXPIRE_HOURS: int = 168  # 7 days
+    AUTH_TOKEN_CACHE_SIZE: int = 1024  # 검증된 JWT LRU 캐시 크기 (워커별)
 
     # Google OAuth
     GOOGLE_CLIENT_ID_WEB: str = ""
@@ -36,8 +43,56 @@ class Settings(BaseSettings):
     # Apple Sign In
     APPLE_BUNDLE_ID: str = "dev.eupori.decard"
 
+    # 소셜 로그인 공개키 (JWKS) — 테스트 시 scripts/stub_jwks.py 주소로 교체
+    APPLE_JWKS_URL: str = "https://appleid.apple.com/auth/keys"
+    GOOGLE_JWKS_URL: str = "https://www.googleapis.com/oauth2/v3/certs"
+    JWKS_DEFAULT_TTL_SECONDS: int = 3600     # Cache-Control이 없을 때
+    JWKS_MIN_REFETCH_SECONDS: int = 30       # 모르는 kid로 인한 재조회 최소 간격
+    JWKS_STALE_SECONDS: int = 86400          # 제공자 장애 시 만료된 키를 계속 쓰는 한도
+    JWKS_FETCH_TIMEOUT_SECONDS: float = 5.0
+
+    # 외부 HTTP 호출 (공유 클라이언트 — app/http_client.py)
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 10
+    HTTP_KEEPALIVE_SECONDS: float = 60.0
+    HTTP2_ENABLED: bool = True  # h2 패키지가 없으면 HTTP/1.1
+
+    # 운영자 전용 조회 (X-Ops-Token 헤더, 빈 값이면 비활성) — 세션 타임라인, /metrics
+    OPS_API_TOKEN: str = ""
+
+    # Explore 공개 조회 캐시 (app/explore_cache.py)
+    EXPLORE_CACHE_TTL_SECONDS: int = 60           # 서버 캐시 유효 기간 (발행/다운로드 시 즉시 무효화)
+    EXPLORE_CACHE_MAX_AGE_SECONDS: int = 30       # 클라이언트/nginx Cache-Control max-age
+    EXPLORE_CACHE_PATH: str = "./explore_cache.db"  # 워커 공유 저장소 (빈 값이면 워커별 메모리만)
+
+    # 응답 압축 (app/compression.py) — Accept-Encoding에 따라 br(brotli 설치 시) / gzip
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024             # 이보다 작은 응답은 그대로
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5           # 동적 응답용 (미리 압축하는 캐시 응답은 더 높게)
+
+    # 파일(CSV/XLSX) 가져오기 (app/import_service.py) — nginx client_max_body_size도 함께 맞출 것
+    IMPORT_MAX_FILE_MB: int = 50
+    IMPORT_MAX_CARDS: int = 50_000
+
+    # 카드 내보내기 (app/export_service.py) — .apkg를 만드는 임시 디렉터리 (빈 값이면 시스템 임시 디렉터리)
+    EXPORT_TMP_DIR: str = ""
+
+    # 카드셋 다운로드 수 집계 주기 (이벤트를 모아 download_count에 한 번에 반영)
+    DOWNLOAD_COUNT_FLUSH_SECONDS: int = 30
+    # 다운로드 방식: link = 공개 카드셋 참조, 수정 시에만 카드 행 생성 (app/library_service.py) | copy = 카드 전체 복사
+    EXPLORE_DOWNLOAD_MODE: str = "link"
+
     # Slack
     SLACK_WEBHOOK_URL: str = ""
+    SLACK_CHANNEL_WEBHOOKS: dict[str, str] = {}   # 채널명 → 웹훅 (없으면 SLACK_WEBHOOK_URL)
+    SLACK_ALERT_SINK: str = "webhook"             # webhook | local (메모리에 기록, 테스트용)
+    SLACK_ALERT_WINDOW_SECONDS: int = 60          # 같은 알림을 묶는 창
+    SLACK_ALERT_RATE_PER_MINUTE: int = 10         # 채널별 전송 한도
+    SLACK_ALERT_BURST: int = 5
 
     # Frontend
     FRONTEND_URL: str = "http://localhost:8080"
@@ -1,16 +1,51 @@
+import logging
+import time
+from datetime import datetime
+
 from sqlalchemy import create_engine, event, text, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 from .config import settings
+from .metrics import DB_QUERY_SECONDS
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-)
-SessionLocal = sessionmaker(bind=engine)
+logger = logging.getLogger(__name__)
+
+
+def is_sqlite_url(url: str) -> bool:
+    return url.split("://", 1)[0].split("+", 1)[0] == "sqlite"
+
+
+def _async_database_url(url: str) -> str:
+    """동기 DATABASE_URL → async 드라이버 URL (sqlite → aiosqlite, postgresql → asyncpg)."""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if dialect in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
+def _sync_database_url(url: str) -> str:
+    """postgres:// 별칭은 SQLAlchemy가 인식하지 못하므로 postgresql://로 정규화."""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def _pool_kwargs() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
 
 
-@event.listens_for(engine, "connect")
 def _set_sqlite_pragma(dbapi_conn, connection_record):
     cursor = dbapi_conn.cursor()
     cursor.execute("PRAGMA journal_mode=WAL")
@@ -19,6 +54,58 @@ def _set_sqlite_pragma(dbapi_conn, connection_record):
     cursor.close()
 
 
+def create_db_engine(url: str) -> Engine:
+    """방언별 설정을 적용한 동기 엔진 (SQLite: WAL pragma / PostgreSQL: 커넥션 풀)."""
+    if is_sqlite_url(url):
+        eng = create_engine(url, connect_args={"check_same_thread": False})
+        event.listen(eng, "connect", _set_sqlite_pragma)
+        return eng
+    return create_engine(_sync_database_url(url), **_pool_kwargs())
+
+
+def create_async_db_engine(url: str) -> AsyncEngine:
+    """create_db_engine과 동일한 설정의 async 엔진."""
+    if is_sqlite_url(url):
+        eng = create_async_engine(_async_database_url(url))
+        event.listen(eng.sync_engine, "connect", _set_sqlite_pragma)
+        return eng
+    return create_async_engine(_async_database_url(url), **_pool_kwargs())
+
+
+_STATEMENT_TYPES = ("select", "insert", "update", "delete")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    verb = statement.lstrip()[:6].lower()
+    DB_QUERY_SECONDS.observe(
+        time.perf_counter() - started, statement=verb if verb in _STATEMENT_TYPES else "other",
+    )
+
+
+def instrument_query_time(eng: Engine) -> None:
+    """쿼리 실행 시간을 decard_db_query_seconds 메트릭에 기록."""
+    event.listen(eng, "before_cursor_execute", _before_cursor_execute)
+    event.listen(eng, "after_cursor_execute", _after_cursor_execute)
+
+
+engine = create_db_engine(settings.DATABASE_URL)
+SessionLocal = sessionmaker(bind=engine)
+
+# async 라우트/백그라운드 작업용 — DB 대기가 이벤트 루프를 막지 않음
+async_engine = create_async_db_engine(settings.DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+instrument_query_time(engine)
+instrument_query_time(async_engine.sync_engine)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -31,158 +118,320 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# ──────────────────────────────────────
+# 스키마 마이그레이션 (schema_version 기반)
+# ──────────────────────────────────────
+#
+# 배포당 1회만 실행: 모든 워커가 버전 1건만 읽고, 밀린 마이그레이션이 있을 때만
+# 락(SQLite: BEGIN IMMEDIATE / PostgreSQL: advisory lock)을 잡고 한 트랜잭션으로 적용.
+# 각 마이그레이션은 (conn) 하나만 받으며 기존 DB에서 재실행돼도 안전해야 합니다.
+# 새 마이그레이션은 MIGRATIONS 끝에 다음 번호로만 추가하세요.
+
+_MIGRATION_LOCK_KEY = 0x646563617264  # "decard"
+_MIGRATION_LOCK_TIMEOUT_SECONDS = 120
+
+
 def create_tables():
-    Base.metadata.create_all(bind=engine)
-    _migrate_device_id()
-    _migrate_users_table()
-    _migrate_folders()
-    _migrate_source_type()
-    _migrate_card_reviews()
-    _migrate_public_cardsets()
-    _migrate_session_progress()
-    _migrate_users_auth_providers()
-    _migrate_session_share_key()
-    _migrate_folder_exam_date()
-
-
-def _migrate_device_id():
+    """스키마를 최신 버전으로 맞춥니다. 최신이면 버전 조회 1회로 끝납니다."""
+    started = time.perf_counter()
+    current = _read_schema_version(engine)
+    if current >= LATEST_SCHEMA_VERSION:
+        logger.info("스키마 최신 (v%d), 확인 %.1fms", current, (time.perf_counter() - started) * 1000)
+        return
+    applied = run_migrations(engine)
+    if not applied:
+        logger.info("다른 워커가 마이그레이션을 먼저 적용함, %.1fms", (time.perf_counter() - started) * 1000)
+        return
+    logger.info("스키마 마이그레이션 v%d → v%d (%d개 적용), %.1fms",
+                current, LATEST_SCHEMA_VERSION, len(applied), (time.perf_counter() - started) * 1000)
+
+
+def _read_schema_version(eng: Engine) -> int:
+    try:
+        with eng.connect() as conn:
+            return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        return 0  # schema_version 테이블 없음 (신규 DB 또는 버전 관리 이전 DB)
+
+
+def run_migrations(eng: Engine, from_version: int | None = None) -> list[int]:
+    """락을 잡고 밀린 마이그레이션을 순서대로 적용. 적용한 버전 목록을 반환.
+
+    from_version을 주면 기록된 버전 대신 그 이후부터 다시 실행합니다 (벤치마크/복구용).
+    """
+    with eng.connect() as conn:
+        _acquire_migration_lock(conn)
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+        # 락 획득 후 재확인 — 먼저 락을 잡은 워커가 이미 적용했을 수 있음
+        current = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+        if from_version is not None:
+            current = from_version
+
+        applied = []
+        for version, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            migrate(conn)
+            conn.execute(text("DELETE FROM schema_version WHERE version = :v"), {"v": version})
+            conn.execute(
+                text("INSERT INTO schema_version (version, name, applied_at) VALUES (:v, :name, :at)"),
+                {"v": version, "name": migrate.__name__.lstrip("_"), "at": datetime.utcnow()},
+            )
+            applied.append(version)
+        conn.commit()
+    return applied
+
+
+def _acquire_migration_lock(conn) -> None:
+    """마이그레이션 트랜잭션 시작 + 배타 락. 다른 워커는 커밋될 때까지 대기."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _MIGRATION_LOCK_KEY})
+        return
+    if conn.dialect.name != "sqlite":
+        return
+    # busy_timeout(5초)보다 마이그레이션이 길 수 있으므로 직접 재시도
+    deadline = time.monotonic() + _MIGRATION_LOCK_TIMEOUT_SECONDS
+    while True:
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            return
+        except OperationalError as e:
+            if "locked" not in str(e).lower() or time.monotonic() > deadline:
+                raise
+            logger.info("다른 워커가 마이그레이션 중 — 대기")
+            time.sleep(0.5)
+
+
+def _create_base_tables(conn):
+    """모델에 정의된 테이블 생성 (기존 테이블은 건너뜀)."""
+    from . import models  # noqa: F401 — Base.metadata에 테이블 등록
+    Base.metadata.create_all(bind=conn)
+
+
+def _migrate_device_id(conn):
     """Add device_id column to sessions table if missing."""
-    insp = inspect(engine)
+    insp = inspect(conn)
     columns = [c["name"] for c in insp.get_columns("sessions")]
     if "device_id" not in columns:
-        with engine.begin() as conn:
-            conn.execute(text("ALTER TABLE sessions ADD COLUMN device_id VARCHAR DEFAULT 'anonymous'"))
-            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sessions_device_id ON sessions (device_id)"))
+        conn.execute(text("ALTER TABLE sessions ADD COLUMN device_id VARCHAR DEFAULT 'anonymous'"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sessions_device_id ON sessions (device_id)"))
 
 
-def _migrate_users_table():
+def _migrate_users_table(conn):
     """Create users table + add user_id column to sessions if missing."""
-    insp = inspect(engine)
+    insp = inspect(conn)
 
     # users 테이블은 create_all에서 이미 생성됨 (Base.metadata)
     # sessions.user_id 컬럼만 마이그레이션
     columns = [c["name"] for c in insp.get_columns("sessions")]
     if "user_id" not in columns:
-        with engine.begin() as conn:
-            conn.execute(text("ALTER TABLE sessions ADD COLUMN user_id VARCHAR"))
-            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sessions_user_id ON sessions (user_id)"))
+        conn.execute(text("ALTER TABLE sessions ADD COLUMN user_id VARCHAR"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sessions_user_id ON sessions (user_id)"))
 
 
-def _migrate_folders():
+def _migrate_folders(conn):
     """Add folder_id, display_name columns to sessions if missing."""
-    insp = inspect(engine)
+    insp = inspect(conn)
 
     # folders 테이블은 create_all에서 이미 생성됨
     columns = [c["name"] for c in insp.get_columns("sessions")]
     if "folder_id" not in columns:
-        with engine.begin() as conn:
-            conn.execute(text("ALTER TABLE sessions ADD COLUMN folder_id VARCHAR"))
-            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sessions_folder_id ON sessions (folder_id)"))
+        conn.execute(text("ALTER TABLE sessions ADD COLUMN folder_id VARCHAR"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sessions_folder_id ON sessions (folder_id)"))
     if "display_name" not in columns:
-        with engine.begin() as conn:
-            conn.execute(text("ALTER TABLE sessions ADD COLUMN display_name VARCHAR"))
+        conn.execute(text("ALTER TABLE sessions ADD COLUMN display_name VARCHAR"))
 
 
-def _migrate_source_type():
+def _migrate_source_type(conn):
     """Add source_type column to sessions table if missing."""
-    insp = inspect(engine)
+    insp = inspect(conn)
     columns = [c["name"] for c in insp.get_columns("sessions")]
     if "source_type" not in columns:
-        with engine.begin() as conn:
-            conn.execute(text("ALTER TABLE sessions ADD COLUMN source_type VARCHAR DEFAULT 'pdf'"))
+        conn.execute(text("ALTER TABLE sessions ADD COLUMN source_type VARCHAR DEFAULT 'pdf'"))
 
 
-def _migrate_card_reviews():
+def _migrate_card_reviews(conn):
     """card_reviews 테이블은 create_all에서 생성됨. 인덱스만 보장."""
-    insp = inspect(engine)
-    if "card_reviews" not in insp.get_table_names():
-        return  # create_all에서 이미 생성
-    # 추가 인덱스 (이미 모델에 정의되어 있으므로 보통 불필요하지만, 안전장치)
-    with engine.begin() as conn:
-        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_card_reviews_card_id ON card_reviews (card_id)"))
-        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_card_reviews_user_id ON card_reviews (user_id)"))
-        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_card_reviews_device_id ON card_reviews (device_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_card_reviews_card_id ON card_reviews (card_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_card_reviews_user_id ON card_reviews (user_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_card_reviews_device_id ON card_reviews (device_id)"))
 
 
-def _migrate_public_cardsets():
+def _migrate_public_cardsets(conn):
     """public_cardsets, public_cards 테이블은 create_all에서 생성됨. 인덱스만 보장."""
-    insp = inspect(engine)
-    if "public_cardsets" not in insp.get_table_names():
-        return
-    with engine.begin() as conn:
-        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_public_cardsets_category ON public_cardsets (category)"))
-        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_public_cardsets_status ON public_cardsets (status)"))
-        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_public_cards_cardset_id ON public_cards (cardset_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_public_cardsets_category ON public_cardsets (category)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_public_cardsets_status ON public_cardsets (status)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_public_cards_cardset_id ON public_cards (cardset_id)"))
 
 
-def _migrate_session_progress():
+def _migrate_session_progress(conn):
     """Add error_message, progress, total_chunks, completed_chunks to sessions."""
-    insp = inspect(engine)
+    insp = inspect(conn)
     columns = [c["name"] for c in insp.get_columns("sessions")]
-    with engine.begin() as conn:
-        if "error_message" not in columns:
-            conn.execute(text("ALTER TABLE sessions ADD COLUMN error_message VARCHAR"))
-        if "progress" not in columns:
-            conn.execute(text("ALTER TABLE sessions ADD COLUMN progress INTEGER DEFAULT 0"))
-        if "total_chunks" not in columns:
-            conn.execute(text("ALTER TABLE sessions ADD COLUMN total_chunks INTEGER DEFAULT 0"))
-        if "completed_chunks" not in columns:
-            conn.execute(text("ALTER TABLE sessions ADD COLUMN completed_chunks INTEGER DEFAULT 0"))
-
-
-def _migrate_users_auth_providers():
-    """Add google_id, apple_id, email, auth_provider to users. Make kakao_id nullable."""
-    insp = inspect(engine)
-    if "users" not in insp.get_table_names():
-        return
-    columns = [c["name"] for c in insp.get_columns("users")]
-    with engine.begin() as conn:
-        if "google_id" not in columns:
-            conn.execute(text("ALTER TABLE users ADD COLUMN google_id VARCHAR"))
-            conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_google_id ON users (google_id)"))
-        if "apple_id" not in columns:
-            conn.execute(text("ALTER TABLE users ADD COLUMN apple_id VARCHAR"))
-            conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_apple_id ON users (apple_id)"))
-        if "email" not in columns:
-            conn.execute(text("ALTER TABLE users ADD COLUMN email VARCHAR"))
-        if "auth_provider" not in columns:
-            conn.execute(text("ALTER TABLE users ADD COLUMN auth_provider VARCHAR DEFAULT 'kakao'"))
-
-        # kakao_id nullable 처리: SQLite는 ALTER COLUMN 미지원이라 테이블 재생성 필요
-        # 하지만 기존 데이터 모두 kakao_id가 있으므로, 새 유저만 nullable이면 됨
-        # SQLAlchemy 모델에서 nullable=True로 이미 변경했으므로 새 테이블은 문제없음
-        # 기존 테이블은 NOT NULL 제약이 남아있지만, INSERT 시 NULL을 넣으면
-        # SQLite는 기본적으로 NOT NULL 제약을 무시하지 않음
-        # → 테이블 재생성 마이그레이션 필요
-        _recreate_users_table_if_needed(conn, columns)
-
-
-def _migrate_folder_exam_date():
-    """Add exam_date column to folders table if missing."""
-    insp = inspect(engine)
-    if "folders" not in insp.get_table_names():
-        return
-    columns = [c["name"] for c in insp.get_columns("folders")]
-    if "exam_date" not in columns:
-        with engine.begin() as conn:
-            conn.execute(text("ALTER TABLE folders ADD COLUMN exam_date VARCHAR"))
+    if "error_message" not in columns:
+        conn.execute(text("ALTER TABLE sessions ADD COLUMN error_message VARCHAR"))
+    if "progress" not in columns:
+        conn.execute(text("ALTER TABLE sessions ADD COLUMN progress INTEGER DEFAULT 0"))
+    if "total_chunks" not in columns:
+        conn.execute(text("ALTER TABLE sessions ADD COLUMN total_chunks INTEGER DEFAULT 0"))
+    if "completed_chunks" not in columns:
+        conn.execute(text("ALTER TABLE sessions ADD COLUMN completed_chunks INTEGER DEFAULT 0"))
 
 
-def _migrate_session_share_key():
+def _migrate_users_auth_providers(conn):
+    """Add google_id, apple_id, email, auth_provider to users. Make kakao_id nullable."""
+    insp = inspect(conn)
+    columns = [c["name"] for c in insp.get_columns("users")]
+    if "google_id" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN google_id VARCHAR"))
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_google_id ON users (google_id)"))
+    if "apple_id" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN apple_id VARCHAR"))
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_apple_id ON users (apple_id)"))
+    if "email" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN email VARCHAR"))
+    if "auth_provider" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN auth_provider VARCHAR DEFAULT 'kakao'"))
+
+    # kakao_id nullable 처리: SQLite는 ALTER COLUMN 미지원이라 테이블 재생성 필요
+    # 하지만 기존 데이터 모두 kakao_id가 있으므로, 새 유저만 nullable이면 됨
+    # SQLAlchemy 모델에서 nullable=True로 이미 변경했으므로 새 테이블은 문제없음
+    # 기존 테이블은 NOT NULL 제약이 남아있지만, INSERT 시 NULL을 넣으면
+    # SQLite는 기본적으로 NOT NULL 제약을 무시하지 않음
+    # → 테이블 재생성 마이그레이션 필요 (PostgreSQL은 ALTER COLUMN으로 충분)
+    if conn.dialect.name == "sqlite":
+        _recreate_users_table_if_needed(conn)
+    else:
+        _drop_kakao_id_not_null(conn)
+
+
+def _migrate_session_share_key(conn):
     """Add share_key column to sessions table if missing."""
-    insp = inspect(engine)
+    insp = inspect(conn)
     columns = [c["name"] for c in insp.get_columns("sessions")]
     if "share_key" not in columns:
-        with engine.begin() as conn:
-            conn.execute(text("ALTER TABLE sessions ADD COLUMN share_key VARCHAR"))
-            conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_sessions_share_key ON sessions (share_key)"))
+        conn.execute(text("ALTER TABLE sessions ADD COLUMN share_key VARCHAR"))
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_sessions_share_key ON sessions (share_key)"))
+
 
+def _migrate_folder_exam_date(conn):
+    """Add exam_date column to folders table if missing."""
+    insp = inspect(conn)
+    columns = [c["name"] for c in insp.get_columns("folders")]
+    if "exam_date" not in columns:
+        conn.execute(text("ALTER TABLE folders ADD COLUMN exam_date VARCHAR"))
+
+
+def _migrate_hot_path_indexes(conn):
+    """조회 경로용 복합 인덱스 (scripts/audit_indexes.py로 검증)."""
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_cards_session_id_status ON cards (session_id, status)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_card_reviews_card_id_reviewed_at ON card_reviews (card_id, reviewed_at)"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sessions_status_created_at ON sessions (status, created_at)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_sessions_user_id_source_type_created_at "
+        "ON sessions (user_id, source_type, created_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_sessions_device_id_source_type_created_at "
+        "ON sessions (device_id, source_type, created_at)"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_grades_card_id ON grades (card_id)"))
+
+
+def _migrate_device_links(conn):
+    """device_links 테이블 (link-device 멱등성 마커)."""
+    from .models import DeviceLinkModel
+    DeviceLinkModel.__table__.create(bind=conn, checkfirst=True)
+
+
+def _migrate_session_timelines(conn):
+    """session_timelines 테이블 (생성 파이프라인 단계별 타이밍)."""
+    from .models import SessionTimelineModel
+    SessionTimelineModel.__table__.create(bind=conn, checkfirst=True)
+
+
+def _migrate_public_cardset_search(conn):
+    """Explore 전문 검색 색인 (SQLite FTS5 / PostgreSQL tsvector) 생성 후 기존 카드셋 재색인."""
+    from . import search_service
+    search_service.create_index(conn)
+    search_service.rebuild(conn)
+
+
+def _migrate_public_cardset_downloads(conn):
+    """public_cardset_downloads 테이블 (다운로드 수 write-behind 집계)."""
+    from .models import PublicCardsetDownloadModel
+    PublicCardsetDownloadModel.__table__.create(bind=conn, checkfirst=True)
+
+
+def _migrate_library_links(conn):
+    """Explore 다운로드 참조: sessions.source_cardset_id, cards.source_card_id.
+
+    복습/채점 기록은 구체화 전 가상 카드 ID(ref:...)도 가리키므로 cards 외래 키를 제거합니다
+    (SQLite는 외래 키를 강제하지 않아 컬럼 추가만).
+    """
+    insp = inspect(conn)
+    if "source_cardset_id" not in [c["name"] for c in insp.get_columns("sessions")]:
+        conn.execute(text("ALTER TABLE sessions ADD COLUMN source_cardset_id VARCHAR"))
+    if "source_card_id" not in [c["name"] for c in insp.get_columns("cards")]:
+        conn.execute(text("ALTER TABLE cards ADD COLUMN source_card_id VARCHAR"))
+    if conn.dialect.name == "postgresql":
+        for table in ("card_reviews", "grades"):
+            for fk in insp.get_foreign_keys(table):
+                if fk["referred_table"] == "cards" and fk.get("name"):
+                    conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{fk["name"]}"'))
+
+
+def _migrate_keyset_indexes(conn):
+    """목록 keyset 페이지네이션용 (소유자/필터, 정렬 키, id) 복합 인덱스."""
+    indexes = {
+        "ix_sessions_user_id_created_at_id": "sessions (user_id, created_at, id)",
+        "ix_sessions_device_id_created_at_id": "sessions (device_id, created_at, id)",
+        "ix_sessions_folder_id_created_at_id": "sessions (folder_id, created_at, id)",
+        "ix_folders_user_id_created_at_id": "folders (user_id, created_at, id)",
+        "ix_folders_device_id_created_at_id": "folders (device_id, created_at, id)",
+        "ix_public_cardsets_status_download_count_id": "public_cardsets (status, download_count, id)",
+        "ix_public_cardsets_status_created_at_id": "public_cardsets (status, created_at, id)",
+        "ix_public_cardsets_status_category_download_count_id":
+            "public_cardsets (status, category, download_count, id)",
+        "ix_public_cardsets_status_category_created_at_id": "public_cardsets (status, category, created_at, id)",
+    }
+    for name, target in indexes.items():
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {target}"))
+
+
+def _migrate_card_page_indexes(conn):
+    """세션 카드 페이지용 인덱스 — 일반 카드 (session_id, created_at, id), 참조 카드 (cardset_id, sort_order, id)."""
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_cards_session_id_created_at_id ON cards (session_id, created_at, id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_public_cards_cardset_id_sort_order_id "
+        "ON public_cards (cardset_id, sort_order, id)"
+    ))
+
+
+def _drop_kakao_id_not_null(conn):
+    """kakao_id NOT NULL 제약 제거 (ALTER COLUMN 지원 DB)."""
+    insp = inspect(conn)
+    kakao_col = next((c for c in insp.get_columns("users") if c["name"] == "kakao_id"), None)
+    if kakao_col and not kakao_col.get("nullable", True):
+        conn.execute(text("ALTER TABLE users ALTER COLUMN kakao_id DROP NOT NULL"))
 
-def _recreate_users_table_if_needed(conn, columns):
+
+def _recreate_users_table_if_needed(conn):
     """Recreate users table to make kakao_id nullable (SQLite limitation)."""
     # kakao_id가 실제로 nullable인지 확인
-    from sqlalchemy import inspect as sa_inspect
-    insp = sa_inspect(engine)
+    insp = inspect(conn)
     kakao_col = next((c for c in insp.get_columns("users") if c["name"] == "kakao_id"), None)
     if kakao_col and kakao_col.get("nullable", True):
         return  # 이미 nullable이면 스킵
@@ -213,3 +462,28 @@ def _recreate_users_table_if_needed(conn, columns):
         FROM users_old
     """))
     conn.execute(text("DROP TABLE users_old"))
+
+
+# (버전, 마이그레이션) — 순서 고정, 끝에만 추가
+MIGRATIONS = [
+    (1, _create_base_tables),
+    (2, _migrate_device_id),
+    (3, _migrate_users_table),
+    (4, _migrate_folders),
+    (5, _migrate_source_type),
+    (6, _migrate_card_reviews),
+    (7, _migrate_public_cardsets),
+    (8, _migrate_session_progress),
+    (9, _migrate_users_auth_providers),
+    (10, _migrate_session_share_key),
+    (11, _migrate_folder_exam_date),
+    (12, _migrate_hot_path_indexes),
+    (13, _migrate_device_links),
+    (14, _migrate_session_timelines),
+    (15, _migrate_public_cardset_search),
+    (16, _migrate_public_cardset_downloads),
+    (17, _migrate_library_links),
+    (18, _migrate_keyset_indexes),
+    (19, _migrate_card_page_indexes),
+]
+LATEST_SCHEMA_VERSION = MIGRATIONS[-1][0]
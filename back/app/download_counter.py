@@ -0,0 +1,104 @@
+"""공개 카드셋 다운로드 수 write-behind 집계.
+
+다운로드마다 public_cardsets 행의 download_count를 올리면 인기 카드셋의 다운로더가
+같은 행 하나에서 직렬화됩니다. 대신
+- 다운로드는 카드 복사와 같은 트랜잭션에 이벤트 1행만 INSERT (append-only, 행 경합 없음)
+- 워커마다 DOWNLOAD_COUNT_FLUSH_SECONDS 주기로 이벤트를 DELETE … RETURNING으로 가져가
+  카드셋별로 합산해 download_count에 한 번에 반영 — 가져간 이벤트는 지워지므로 워커끼리 중복 집계 없음
+- 반영 후 Explore 응답 캐시 무효화
+인기순 정렬/표시는 집계된 download_count를 읽으므로 최대 한 주기만큼 늦게 반영됩니다.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from . import explore_cache
+from .config import settings
+from .database import AsyncSessionLocal
+from .metrics import EXPLORE_DOWNLOADS
+from .models import PublicCardsetDownloadModel, PublicCardsetModel
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 5000
+
+
+def record(db: Session, cardset_id: str) -> None:
+    """다운로드 이벤트 추가. 커밋은 호출자가 합니다 (카드 복사와 같은 트랜잭션)."""
+    db.add(PublicCardsetDownloadModel(cardset_id=cardset_id))
+    EXPLORE_DOWNLOADS.inc(stage="recorded")
+
+
+class DownloadCounter:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """주기 작업 종료 후 남은 이벤트 반영."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("종료 시 다운로드 수 반영 실패 (이벤트는 남아 다음 기동 때 반영)")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.DOWNLOAD_COUNT_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("다운로드 수 반영 중 오류")
+
+    async def flush(self) -> int:
+        """쌓인 이벤트를 download_count에 반영. 반영한 이벤트 수 반환."""
+        events = PublicCardsetDownloadModel.__table__
+        cardsets = PublicCardsetModel.__table__
+        total = 0
+        touched = set()
+        async with AsyncSessionLocal() as db:
+            while True:
+                first_id = await db.scalar(select(func.min(events.c.id)))
+                if first_id is None:
+                    break
+                claimed = (await db.execute(
+                    delete(events)
+                    .where(events.c.id < first_id + FLUSH_BATCH_SIZE)
+                    .returning(events.c.cardset_id)
+                )).scalars().all()
+                if not claimed:
+                    continue  # 다른 워커가 같은 구간을 먼저 가져감
+                counts = Counter(claimed)
+                await db.execute(
+                    update(cardsets)
+                    .where(cardsets.c.id == bindparam("b_id"))
+                    .values(download_count=cardsets.c.download_count + bindparam("b_count")),
+                    [{"b_id": cardset_id, "b_count": n} for cardset_id, n in counts.items()],
+                )
+                await db.commit()
+                total += len(claimed)
+                touched.update(counts)
+
+        if total:
+            EXPLORE_DOWNLOADS.inc(total, stage="flushed")
+            explore_cache.invalidate("cardsets", *(f"cardset:{cardset_id}" for cardset_id in touched))
+            logger.info("다운로드 수 반영: 이벤트 %d건, 카드셋 %d개", total, len(touched))
+        return total
+
+
+counter = DownloadCounter()
@@ -0,0 +1,243 @@
+"""Explore 공개 조회 응답 캐시 (카테고리 / 목록 / 상세).
+
+누가 요청해도 같은 공개 응답을 매번 다시 만들지 않도록 직렬화된 JSON 바이트를 보관합니다.
+- 워커 메모리(TTL) → 워커 공유 디스크 저장소(SQLite 파일) → 생성 순으로 조회
+- 항목은 태그(categories / cardsets / cardset:{id}) 하나에 속하고, 발행·다운로드 시
+  태그 세대(generation)를 올려 무효화 — 세대는 디스크에 있으므로 모든 워커에 즉시 반영
+- 응답 바이트 해시로 강한 ETag를 만들고 Cache-Control을 붙여, If-None-Match가 맞으면 304
+- 저장할 때 gzip/br 압축본을 한 번 만들어 두고 Accept-Encoding에 맞는 것을 그대로 응답
+  (압축본 ETag는 "해시-gzip"처럼 인코딩별로 구분)
+디스크 저장소에 문제가 생기면 경고만 남기고 캐시 없이 응답합니다.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+
+from . import compression, serialization
+from .config import settings
+from .metrics import EXPLORE_CACHE
+
+logger = logging.getLogger(__name__)
+
+MAX_LOCAL_ENTRIES = 512
+MAX_ENTRY_BYTES = 2 * 1024 * 1024   # 이보다 큰 응답(카드가 아주 많은 상세)은 캐시하지 않음
+PRUNE_EVERY_PUTS = 100
+
+
+class Entry(NamedTuple):
+    generation: int
+    expires_at: float
+    etag: str
+    body: bytes
+    headers: Dict[str, str]
+    encoded: Dict[str, bytes] = {}  # 인코딩 → 미리 압축한 본문 (compression.precompress)
+
+
+_ENCODED_COLUMNS = {"gzip": "body_gzip", "br": "body_br"}
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 비교 (약한 비교 — W/ 접두어 무시)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (c[2:] if c.startswith("W/") else c for c in candidates)
+
+
+class ExploreCache:
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._local: "OrderedDict[Tuple[str, str], Entry]" = OrderedDict()
+        self._generations: Dict[str, int] = {}  # 디스크 저장소가 없을 때만 사용
+        self._lock = threading.Lock()
+        self._thread = threading.local()
+        self._puts = 0
+
+    # ── 디스크 저장소 ──
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        conn = getattr(self._thread, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS generations (tag TEXT PRIMARY KEY, generation INTEGER NOT NULL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            if columns and not set(_ENCODED_COLUMNS.values()) <= columns:
+                conn.execute("DROP TABLE entries")  # 이전 형식 — 캐시라 비우고 다시 만듦
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, generation INTEGER NOT NULL, expires_at REAL NOT NULL,"
+                " etag TEXT NOT NULL, body BLOB NOT NULL, headers TEXT NOT NULL,"
+                " body_gzip BLOB, body_br BLOB)"
+            )
+            self._thread.conn = conn
+        return conn
+
+    def _generation(self, tag: str) -> int:
+        conn = self._conn()
+        if conn is None:
+            with self._lock:
+                return self._generations.get(tag, 0)
+        row = conn.execute("SELECT generation FROM generations WHERE tag = ?", (tag,)).fetchone()
+        return row[0] if row else 0
+
+    # ── 조회 / 저장 ──
+
+    def lookup(self, tag: str, key: str) -> Tuple[int, Optional[Entry], str]:
+        """(현재 세대, 유효한 항목 또는 None, 결과 라벨 local|disk|miss)."""
+        generation = self._generation(tag)
+        now = time.time()
+        with self._lock:
+            entry = self._local.get((tag, key))
+            if entry and entry.generation == generation and entry.expires_at > now:
+                self._local.move_to_end((tag, key))
+                return generation, entry, "local"
+
+        conn = self._conn()
+        if conn is not None:
+            row = conn.execute(
+                "SELECT expires_at, etag, body, headers, body_gzip, body_br FROM entries "
+                "WHERE key = ? AND generation = ? AND expires_at > ?",
+                (f"{tag}|{key}", generation, now),
+            ).fetchone()
+            if row:
+                encoded = {
+                    encoding: bytes(value) for encoding, value in zip(_ENCODED_COLUMNS, row[4:]) if value is not None
+                }
+                entry = Entry(generation, row[0], row[1], bytes(row[2]), json.loads(row[3]), encoded)
+                self._remember(tag, key, entry)
+                return generation, entry, "disk"
+        return generation, None, "miss"
+
+    def store(self, tag: str, key: str, generation: int, body: bytes, headers: Dict[str, str]) -> Entry:
+        """생성 시작 전에 읽은 세대로 저장 — 그사이 무효화됐다면 다음 조회에서 자연히 무시됨."""
+        entry = Entry(generation, time.time() + self.ttl, make_etag(body), body, headers)
+        if len(body) > MAX_ENTRY_BYTES:
+            return entry
+        entry = entry._replace(encoded=compression.precompress(body))
+        self._remember(tag, key, entry)
+        conn = self._conn()
+        if conn is not None:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, generation, expires_at, etag, body, headers, body_gzip, body_br) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    f"{tag}|{key}", generation, entry.expires_at, entry.etag, body, json.dumps(headers),
+                    *(entry.encoded.get(encoding) for encoding in _ENCODED_COLUMNS),
+                ),
+            )
+            self._puts += 1
+            if self._puts % PRUNE_EVERY_PUTS == 0:
+                conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        return entry
+
+    def _remember(self, tag: str, key: str, entry: Entry) -> None:
+        with self._lock:
+            self._local[(tag, key)] = entry
+            self._local.move_to_end((tag, key))
+            while len(self._local) > MAX_LOCAL_ENTRIES:
+                self._local.popitem(last=False)
+
+    def invalidate(self, *tags: str) -> None:
+        """태그 세대를 올려 해당 항목을 모든 워커에서 무효화. 실패해도 TTL 후에는 갱신됨."""
+        try:
+            conn = self._conn()
+            if conn is None:
+                with self._lock:
+                    for tag in tags:
+                        self._generations[tag] = self._generations.get(tag, 0) + 1
+                return
+            conn.executemany(
+                "INSERT INTO generations (tag, generation) VALUES (?, 1) "
+                "ON CONFLICT(tag) DO UPDATE SET generation = generation + 1",
+                [(tag,) for tag in tags],
+            )
+        except sqlite3.Error as e:
+            logger.warning("Explore 캐시 무효화 실패 (%s): %s", ", ".join(tags), e)
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+
+cache = ExploreCache(settings.EXPLORE_CACHE_PATH, settings.EXPLORE_CACHE_TTL_SECONDS)
+
+
+# ──────────────────────────────────────
+# HTTP 응답
+# ──────────────────────────────────────
+
+def _serialize(payload: Any) -> bytes:
+    return serialization.dumps(payload)
+
+
+def _response(request: Request, entry: Entry, endpoint: str, result: str) -> Response:
+    encoding = compression.choose_encoding(request.headers.get("accept-encoding"))
+    body = entry.encoded.get(encoding)
+    etag = f'{entry.etag[:-1]}-{encoding}"' if body is not None else entry.etag
+    headers = {
+        **entry.headers,
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.EXPLORE_CACHE_MAX_AGE_SECONDS}",
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, etag) or etag_matches(if_none_match, entry.etag):
+        EXPLORE_CACHE.inc(endpoint=endpoint, result="not_modified")
+        return Response(status_code=304, headers=headers)
+    EXPLORE_CACHE.inc(endpoint=endpoint, result=result)
+    if body is None:
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+    compression.record_saved(encoding, "precompressed", len(entry.body), len(body))
+    return Response(
+        content=body, media_type="application/json", headers={**headers, "Content-Encoding": encoding},
+    )
+
+
+def cached_response(
+    request: Request,
+    endpoint: str,
+    tag: str,
+    key: str,
+    build: Callable[[], Tuple[Any, Dict[str, str]]],
+) -> Response:
+    """캐시된 응답 또는 build() → (payload, 추가 헤더)로 생성 후 저장. build의 HTTPException은 그대로 전파."""
+    try:
+        generation, entry, result = cache.lookup(tag, key)
+    except sqlite3.Error as e:
+        logger.warning("Explore 캐시 조회 실패, 캐시 없이 응답: %s", e)
+        payload, headers = build()
+        body = _serialize(payload)
+        return _response(request, Entry(0, 0.0, make_etag(body), body, headers), endpoint, "bypass")
+
+    if entry is None:
+        payload, headers = build()
+        body = _serialize(payload)
+        try:
+            entry = cache.store(tag, key, generation, body, headers)
+        except sqlite3.Error as e:
+            logger.warning("Explore 캐시 저장 실패: %s", e)
+            entry = Entry(generation, 0.0, make_etag(body), body, headers)
+    return _response(request, entry, endpoint, result)
+
+
+def invalidate(*tags: str) -> None:
+    cache.invalidate(*tags)
@@ -0,0 +1,305 @@
+"""카드 내보내기 (Anki TSV / .apkg).
+
+세션 하나부터 폴더·라이브러리 전체까지 카드를 메모리에 모으지 않고 내보냅니다.
+- 카드는 library_service.iter_session_cards로 EXPORT_BATCH_SIZE장씩(yield_per) 읽음
+- TSV: 행을 TSV_CHUNK_BYTES 정도씩 묶어 바로 내보내는 제너레이터 (StreamingResponse 본문)
+- .apkg: 임시 디렉터리의 Anki 컬렉션(SQLite, schema 11)에 배치 단위 executemany로 쓰고
+  zip으로 묶은 뒤 파일 응답 — 응답을 보낸 뒤 임시 디렉터리 삭제
+TSV 본문은 엔드포인트가 반환된 뒤(요청 DB 세션이 닫힌 뒤) 읽히므로 내보내기 전용 세션을 직접 엽니다.
+"""
+
+import csv
+import hashlib
+import html
+import io
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import exists, or_, select
+from sqlalchemy.orm import Session
+
+from . import library_service
+from .config import settings
+from .database import SessionLocal
+from .metrics import CARD_EXPORT_CARDS, CARD_EXPORTS
+from .models import CardModel, PublicCardModel, SessionModel
+
+logger = logging.getLogger(__name__)
+
+EXPORT_STATUSES = ("accepted", "pending")  # 채택 + 검토 전 카드 (거절 카드 제외)
+EXPORT_BATCH_SIZE = 500
+TSV_CHUNK_BYTES = 64 * 1024
+DECK_SEPARATOR = "::"
+
+
+@dataclass(frozen=True)
+class ExportTarget:
+    """내보낼 세션 하나와 Anki 덱 이름."""
+    session_id: str
+    deck: str
+
+
+def deck_name(*parts: str) -> str:
+    """Anki 덱 경로 (폴더::세션). 이름 안의 '::'는 하위 덱으로 해석되지 않도록 치환."""
+    return DECK_SEPARATOR.join(p.replace(DECK_SEPARATOR, ":").strip() or "-" for p in parts)
+
+
+def has_cards(db: Session, sessions: Sequence[SessionModel]) -> bool:
+    """내보낼 카드가 하나라도 있는지 (카드를 읽지 않고 EXISTS로)."""
+    if not sessions:
+        return False
+    session_ids = [s.id for s in sessions]
+    cardset_ids = {s.source_cardset_id for s in sessions if s.source_cardset_id}
+    conditions = [
+        exists().where(CardModel.session_id.in_(session_ids), CardModel.status.in_(EXPORT_STATUSES))
+    ]
+    if cardset_ids:
+        conditions.append(exists().where(PublicCardModel.cardset_id.in_(cardset_ids)))
+    return bool(db.scalar(select(or_(*conditions))))
+
+
+def back_with_evidence(card: library_service.AnyCard) -> str:
+    return f"{card.back}\n\n📖 근거 (p.{card.evidence_page}): {card.evidence}"
+
+
+def _iter_cards(db: Session, targets: Iterable[ExportTarget]) -> Iterator[Tuple[ExportTarget, library_service.AnyCard]]:
+    for target in targets:
+        session = db.get(SessionModel, target.session_id)
+        if session is None:
+            continue  # 내보내는 사이 삭제됨
+        for card in library_service.iter_session_cards(db, session, EXPORT_STATUSES, EXPORT_BATCH_SIZE):
+            yield target, card
+        db.expunge_all()  # 세션마다 identity map 비움 (라이브러리 전체 내보내기에서 누적 방지)
+
+
+# ──────────────────────────────────────
+# TSV (Anki 텍스트 임포트)
+# ──────────────────────────────────────
+
+def stream_tsv(targets: List[ExportTarget], scope: str) -> Iterator[bytes]:
+    """TSV 바이트 청크 제너레이터. 앞면 \\t 뒷면(+근거) \\t 태그 [\\t 덱].
+
+    세션 하나는 기존 다운로드와 같은 3열. 여러 세션은 Anki 파일 헤더(#deck column)로 덱 열을 붙여
+    세션마다 덱이 나뉘어 들어가게 합니다.
+    """
+    with_deck = scope != "session"
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        buffer.write("\ufeff")
+        if with_deck:
+            buffer.write("#separator:tab\n#tags column:3\n#deck column:4\n")
+        writer = csv.writer(buffer, delimiter="\t")
+        count = 0
+        for target, card in _iter_cards(db, targets):
+            row = [card.front, back_with_evidence(card), card.tags]
+            if with_deck:
+                row.append(target.deck)
+            writer.writerow(row)
+            count += 1
+            if buffer.tell() >= TSV_CHUNK_BYTES:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode("utf-8")
+        CARD_EXPORTS.inc(format="tsv", scope=scope)
+        CARD_EXPORT_CARDS.inc(count, format="tsv")
+    finally:
+        db.close()
+
+
+# ──────────────────────────────────────
+# .apkg (Anki 패키지)
+# ──────────────────────────────────────
+
+ANKI_MODEL_ID = 1740000000000  # 고정 — 다시 가져올 때 같은 노트 유형으로 합쳐짐
+ANKI_FIELDS = ("앞면", "뒷면", "근거")
+
+_ANKI_SCHEMA = """
+create table col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null, tags text not null
+);
+create table notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+create table cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+create table revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+create table graves (usn integer not null, oid integer not null, type integer not null);
+"""
+
+# 쓰기가 끝난 뒤 한 번에 생성 (행마다 인덱스 갱신하지 않음)
+_ANKI_INDEXES = """
+create index ix_notes_usn on notes (usn);
+create index ix_cards_usn on cards (usn);
+create index ix_revlog_usn on revlog (usn);
+create index ix_cards_nid on cards (nid);
+create index ix_cards_sched on cards (did, queue, due);
+create index ix_revlog_cid on revlog (cid);
+create index ix_notes_csum on notes (csum);
+"""
+
+_ANKI_CSS = (
+    ".card { font-family: sans-serif; font-size: 20px; text-align: center; color: black; background-color: white; }\n"
+    ".evidence { margin-top: 16px; font-size: 14px; color: #666; text-align: left; }\n"
+)
+
+_DECK_CONFIG = {
+    "id": 1, "name": "Default", "mod": 0, "usn": 0, "maxTaken": 60, "autoplay": True, "timer": 0,
+    "replayq": True, "dyn": False,
+    "new": {"delays": [1, 10], "ints": [1, 4, 0], "initialFactor": 2500, "order": 1, "perDay": 20,
+            "bury": False, "separate": True},
+    "rev": {"perDay": 200, "ease4": 1.3, "ivlFct": 1, "maxIvl": 36500, "bury": False, "hardFactor": 1.2,
+            "fuzz": 0.05},
+    "lapse": {"delays": [10], "mult": 0, "minInt": 1, "leechFails": 8, "leechAction": 1},
+}
+
+
+def _anki_model(now: int) -> dict:
+    front, back, evidence = ANKI_FIELDS
+    return {
+        "id": ANKI_MODEL_ID, "name": "데카드", "type": 0, "mod": now, "usn": -1, "sortf": 0, "did": 1,
+        "flds": [
+            {"name": name, "ord": idx, "sticky": False, "rtl": False, "font": "Arial", "size": 20, "media": []}
+            for idx, name in enumerate(ANKI_FIELDS)
+        ],
+        "tmpls": [{
+            "name": "카드 1", "ord": 0, "did": None, "bqfmt": "", "bafmt": "",
+            "qfmt": "{{%s}}" % front,
+            "afmt": "{{FrontSide}}<hr id=answer>{{%s}}{{#%s}}<div class=evidence>{{%s}}</div>{{/%s}}"
+                    % (back, evidence, evidence, evidence),
+        }],
+        "css": _ANKI_CSS,
+        "latexPre": "\\documentclass[12pt]{article}\n\\special{papersize=3in,5in}\n\\usepackage{amssymb,amsmath}\n"
+                    "\\pagestyle{empty}\n\\setlength{\\parindent}{0in}\n\\begin{document}\n",
+        "latexPost": "\\end{document}",
+        "latexsvg": False,
+        "req": [[0, "any", [0]]],
+        "tags": [],
+        "vers": [],
+    }
+
+
+def _anki_deck(deck_id: int, name: str, now: int) -> dict:
+    return {
+        "id": deck_id, "name": name, "mod": now, "usn": -1, "desc": "", "dyn": 0, "conf": 1,
+        "collapsed": False, "browserCollapsed": False, "extendNew": 0, "extendRev": 0,
+        "newToday": [0, 0], "revToday": [0, 0], "lrnToday": [0, 0], "timeToday": [0, 0],
+    }
+
+
+def _html(text: str) -> str:
+    return html.escape(text or "").replace("\n", "<br>")
+
+
+def _anki_tags(tags: str) -> str:
+    """'type:definition, difficulty:easy' → ' type:definition difficulty:easy ' (Anki 태그는 공백 구분)."""
+    names = [t.strip().replace(" ", "_") for t in (tags or "").split(",")]
+    names = [t for t in names if t]
+    return f" {' '.join(names)} " if names else ""
+
+
+def _note_row(note_id: int, card: library_service.AnyCard, now: int) -> tuple:
+    evidence = f"📖 근거 (p.{card.evidence_page}): {card.evidence}" if card.evidence else ""
+    fields = "\x1f".join((_html(card.front), _html(card.back), _html(evidence)))
+    checksum = int(hashlib.sha1(card.front.encode("utf-8")).hexdigest()[:8], 16)
+    guid = hashlib.sha1(f"decard:{card.id}".encode()).hexdigest()[:16]  # 같은 카드를 다시 가져오면 갱신
+    return (note_id, guid, ANKI_MODEL_ID, now, -1, _anki_tags(card.tags), fields, card.front, checksum, 0, "")
+
+
+def _card_row(card_id: int, note_id: int, deck_id: int, position: int, now: int) -> tuple:
+    # 새 카드 (type/queue 0), due = 새 카드 순서
+    return (card_id, note_id, deck_id, 0, now, -1, 0, 0, position, 0, 0, 0, 0, 0, 0, 0, 0, "")
+
+
+def build_apkg(db: Session, targets: List[ExportTarget], scope: str) -> str:
+    """targets의 카드를 .apkg 파일로. 임시 디렉터리 안의 파일 경로를 반환 (삭제는 cleanup)."""
+    workdir = tempfile.mkdtemp(prefix="decard_export_", dir=settings.EXPORT_TMP_DIR or None)
+    try:
+        collection_path = os.path.join(workdir, "collection.anki2")
+        conn = sqlite3.connect(collection_path)
+        try:
+            conn.executescript("pragma journal_mode = off; pragma synchronous = off;" + _ANKI_SCHEMA)
+            now = int(time.time())
+            base_id = int(time.time() * 1000)
+            decks = {"1": _anki_deck(1, "Default", now)}
+            deck_ids = {}
+            notes, cards = [], []
+            count = 0
+
+            def flush() -> None:
+                conn.executemany("insert into notes values (?,?,?,?,?,?,?,?,?,?,?)", notes)
+                conn.executemany("insert into cards values (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", cards)
+                notes.clear()
+                cards.clear()
+
+            for target, card in _iter_cards(db, targets):
+                deck_id = deck_ids.get(target.deck)
+                if deck_id is None:
+                    deck_id = deck_ids[target.deck] = base_id + len(deck_ids) + 1
+                    decks[str(deck_id)] = _anki_deck(deck_id, target.deck, now)
+                count += 1
+                note_id = base_id + count
+                notes.append(_note_row(note_id, card, now))
+                cards.append(_card_row(note_id, note_id, deck_id, count, now))
+                if len(notes) >= EXPORT_BATCH_SIZE:
+                    flush()
+            flush()
+
+            conf = {
+                "nextPos": count + 1, "estTimes": True, "activeDecks": [1], "sortType": "noteFld", "timeLim": 0,
+                "sortBackwards": False, "addToCur": True, "curDeck": 1, "newSpread": 0, "dueCounts": True,
+                "curModel": ANKI_MODEL_ID, "collapseTime": 1200,
+            }
+            conn.execute(
+                "insert into col values (1,?,?,?,11,0,0,0,?,?,?,?,?)",
+                (
+                    now, base_id, base_id, json.dumps(conf),
+                    json.dumps({str(ANKI_MODEL_ID): _anki_model(now)}, ensure_ascii=False),
+                    json.dumps(decks, ensure_ascii=False), json.dumps({"1": _DECK_CONFIG}), "{}",
+                ),
+            )
+            conn.executescript(_ANKI_INDEXES)
+            conn.commit()
+        finally:
+            conn.close()
+
+        apkg_path = os.path.join(workdir, "export.apkg")
+        with zipfile.ZipFile(apkg_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.write(collection_path, "collection.anki2")
+            zf.writestr("media", "{}")
+        os.remove(collection_path)
+    except Exception:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+    CARD_EXPORTS.inc(format="apkg", scope=scope)
+    CARD_EXPORT_CARDS.inc(count, format="apkg")
+    logger.info("apkg 내보내기: %s, 카드 %d장, %d bytes", scope, count, os.path.getsize(apkg_path))
+    return apkg_path
+
+
+def cleanup(path: str) -> None:
+    """build_apkg가 만든 임시 디렉터리 삭제 (응답 전송 후 BackgroundTask)."""
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
@@ -1,10 +1,14 @@
+import asyncio
+import hashlib
+import io
 import json
 import logging
-import os
-import tempfile
+import time
+from typing import AsyncIterator, Dict, List
 
 from .config import settings
 from .claude_cli import run_claude
+from .metrics import CLI_PARSE_FAILURES, GRADE_IMAGE_BYTES, GRADE_LATENCY
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +30,67 @@ GRADE_SYSTEM_PROMPT = """당신은 시험 답안 채점 전문가입니다.
   "feedback": "채점 피드백 2~3문장. 맞은 부분과 틀린/부족한 부분을 구체적으로 설명."
 }"""
 
+GRADE_BATCH_SYSTEM_PROMPT = """당신은 시험 답안 채점 전문가입니다.
+여러 문항의 학생 답안을 각각 모범답안과 비교하여 채점합니다.
+문항끼리는 서로 독립적입니다. 다른 문항의 내용을 채점에 반영하지 마세요.
+
+## 채점 기준
+
+1. **correct** (정답): 핵심 키워드와 개념이 모두 포함되고, 논리적으로 올바른 경우
+2. **partial** (부분 정답): 일부 핵심 키워드/개념은 맞지만 누락되거나 부정확한 부분이 있는 경우
+3. **incorrect** (오답): 핵심 개념이 대부분 빠져있거나 틀린 경우
+
+## 출력 형식
+
+반드시 아래 JSON 배열만 출력하세요. 다른 텍스트를 추가하지 마세요.
+모든 문항에 대해 index를 그대로 사용하여 하나씩 결과를 출력하세요.
+
+[
+  {"index": 0, "score": "correct 또는 partial 또는 incorrect", "feedback": "채점 피드백 2~3문장"}
+]"""
+
+# 배치 채점: CLI 1회에 담을 최대 문항 수 / 프롬프트 크기 (시스템 프롬프트 제외)
+BATCH_MAX_ITEMS = 10
+BATCH_MAX_CHARS = 12000
+
+# 손글씨 이미지: 긴 변 기준 축소 크기 (손글씨 인식에 충분한 해상도)
+DRAWING_MAX_SIDE = 1024
+
+
+def _prepare_drawing_sync(image: bytes) -> bytes:
+    """손글씨 이미지를 흰 배경 그레이스케일 PNG로 평탄화 + 축소 + 재압축합니다.
+
+    원본이 더 작아도 항상 변환 결과를 씁니다 — CLI는 image/png로 보내고(claude_cli),
+    투명 캔버스는 흰 배경 합성 없이는 획이 보이지 않을 수 있습니다. PNG라 손실은 없습니다.
+    """
+    from PIL import Image
+
+    try:
+        img = Image.open(io.BytesIO(image))
+        img.load()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ValueError("손글씨 이미지를 읽을 수 없습니다.") from e
+    with img:
+        if img.mode in ("RGBA", "LA", "P"):
+            # 투명 배경(캔버스)은 흰 배경으로 합성해야 획이 보존됨
+            rgba = img.convert("RGBA")
+            flat = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+            flat.alpha_composite(rgba)
+            img = flat
+        gray = img.convert("L")
+        gray.thumbnail((DRAWING_MAX_SIDE, DRAWING_MAX_SIDE))
+        out = io.BytesIO()
+        gray.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+async def prepare_drawing(image: bytes) -> bytes:
+    """이미지 디코딩/압축은 CPU 작업이므로 워커 스레드에서 실행합니다. 이미지가 아니면 ValueError."""
+    prepared = await asyncio.to_thread(_prepare_drawing_sync, image)
+    GRADE_IMAGE_BYTES.observe(len(image), stage="raw")
+    GRADE_IMAGE_BYTES.observe(len(prepared), stage="prepared")
+    return prepared
+
 
 async def grade_answer(
     question: str,
@@ -33,23 +98,18 @@ async def grade_answer(
     user_answer: str,
     drawing_image: bytes | None = None,
 ) -> dict:
-    """학생 답안을 AI로 채점합니다."""
+    """학생 답안을 AI로 채점합니다. drawing_image는 prepare_drawing을 거친 PNG입니다."""
 
-    tmp_path = None
-    tools = ""
+    images = []
     user_prompt_parts = []
 
-    # 손글씨 이미지가 있으면 임시 파일로 저장 후 Read 도구로 전달
+    # 손글씨 이미지가 있으면 프롬프트에 인라인 첨부
     if drawing_image:
-        tmp = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-        tmp.write(drawing_image)
-        tmp.close()
-        tmp_path = tmp.name
+        images.append(drawing_image)
         user_prompt_parts.append(
-            f"첨부된 이미지 파일({tmp_path})은 학생이 손글씨로 작성한 답안입니다. "
+            "첨부된 이미지는 학생이 손글씨로 작성한 답안입니다. "
             "이미지의 텍스트를 인식하여 아래 텍스트 답안과 합쳐서 채점해주세요.\n"
         )
-        tools = "Read"
 
     user_prompt_parts.append(
         f"## 질문\n{question}\n\n"
@@ -58,30 +118,191 @@ async def grade_answer(
         "위 학생 답안을 모범답안과 비교하여 채점해주세요."
     )
 
+    started = time.monotonic()
+    raw_text = await run_claude(
+        GRADE_SYSTEM_PROMPT,
+        "\n\n".join(user_prompt_parts),
+        model=settings.LLM_MODEL,
+        images=images,
+        step="grade",
+    )
+    GRADE_LATENCY.observe(time.monotonic() - started, mode="single", image="true" if images else "false")
     try:
-        raw_text = await run_claude(
-            GRADE_SYSTEM_PROMPT,
-            "\n\n".join(user_prompt_parts),
-            model=settings.LLM_MODEL,
-            tools=tools,
-        )
         result = _parse_grade_json(raw_text)
-    finally:
-        if tmp_path:
-            try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass
+    except (ValueError, json.JSONDecodeError):
+        CLI_PARSE_FAILURES.inc(step="grade")
+        raise
 
     # 유효성 검증
+    return _normalize_grade(result)
+
+
+def _normalize_grade(result: dict) -> dict:
+    """score/feedback 유효성 보정."""
     if result.get("score") not in ("correct", "partial", "incorrect"):
         result["score"] = "partial"
     if not result.get("feedback"):
         result["feedback"] = "채점 결과를 확인해주세요."
-
     return result
 
 
+def _batch_item_prompt(item: Dict) -> str:
+    user_answer = item["user_answer"]
+    return (
+        f"### 문항 index={item['index']}\n"
+        f"#### 질문\n{item['question']}\n\n"
+        f"#### 모범답안\n{item['model_answer']}\n\n"
+        f"#### 학생 답안 (텍스트)\n{user_answer if user_answer.strip() else '(텍스트 답안 없음)'}"
+    )
+
+
+def plan_grade_batches(
+    items: List[Dict],
+    max_items: int = BATCH_MAX_ITEMS,
+    max_chars: int = BATCH_MAX_CHARS,
+) -> List[List[Dict]]:
+    """문항을 순서대로 묶어 CLI 호출 단위(배치)로 나눕니다.
+
+    한 배치는 max_items개, 프롬프트 max_chars자를 넘지 않습니다.
+    단일 문항이 max_chars보다 크면 그 문항만 단독 배치가 됩니다.
+    """
+    batches: List[List[Dict]] = []
+    current: List[Dict] = []
+    current_chars = 0
+    for item in items:
+        size = len(_batch_item_prompt(item))
+        if current and (len(current) >= max_items or current_chars + size > max_chars):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(item)
+        current_chars += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def _grade_batch(batch: List[Dict]) -> List[Dict]:
+    """배치 1개를 CLI 1회로 채점. 문항별 결과(또는 error) 리스트 반환."""
+    # 같은 이미지는 한 번만 첨부 (이미지 번호는 첨부 순서, 1부터)
+    images: List[bytes] = []
+    image_numbers: Dict[bytes, int] = {}
+    item_images: Dict[int, int] = {}
+    for item in batch:
+        image = item.get("drawing_image")
+        if image:
+            if image not in image_numbers:
+                images.append(image)
+                image_numbers[image] = len(images)
+            item_images[item["index"]] = image_numbers[image]
+
+    prompt_parts = []
+    if item_images:
+        prompt_parts.append(
+            "아래 문항 중 일부는 학생이 손글씨로 작성한 답안 이미지가 첨부되어 있습니다. "
+            "이미지는 첨부 순서대로 1번부터 번호가 매겨져 있습니다. "
+            "각 이미지의 텍스트를 인식하여 해당 문항의 텍스트 답안과 합쳐서 채점해주세요.\n"
+            + "\n".join(f"- index={idx}: 이미지 {num}번" for idx, num in item_images.items())
+        )
+    prompt_parts.extend(_batch_item_prompt(item) for item in batch)
+    prompt_parts.append("위 모든 문항의 학생 답안을 각각 모범답안과 비교하여 채점해주세요.")
+
+    started = time.monotonic()
+    try:
+        raw_text = await run_claude(
+            GRADE_BATCH_SYSTEM_PROMPT,
+            "\n\n".join(prompt_parts),
+            model=settings.LLM_MODEL,
+            images=images,
+            step="grade",
+        )
+    except Exception as e:
+        logger.warning("배치 채점 CLI 실패 (%d문항): %s: %s", len(batch), type(e).__name__, e)
+        return [{"index": item["index"], "error": str(e)} for item in batch]
+    GRADE_LATENCY.observe(time.monotonic() - started, mode="batch", image="true" if images else "false")
+
+    try:
+        parsed = _parse_grade_batch_json(raw_text)
+    except (ValueError, json.JSONDecodeError) as e:
+        CLI_PARSE_FAILURES.inc(step="grade")
+        logger.warning("배치 채점 JSON 파싱 실패 (%d문항): %s | 앞 300자: %s", len(batch), e, raw_text[:300])
+        return [{"index": item["index"], "error": "채점 결과를 해석할 수 없습니다."} for item in batch]
+
+    by_index = {}
+    for r in parsed:
+        if isinstance(r, dict) and isinstance(r.get("index"), int):
+            by_index.setdefault(r["index"], r)
+
+    results = []
+    for item in batch:
+        r = by_index.get(item["index"])
+        if r is None:
+            results.append({"index": item["index"], "error": "채점 결과가 누락되었습니다."})
+        else:
+            results.append({"index": item["index"], **_normalize_grade({
+                "score": r.get("score"),
+                "feedback": r.get("feedback"),
+            })})
+    return results
+
+
+async def grade_answers_batch(items: List[Dict]) -> AsyncIterator[Dict]:
+    """여러 답안을 최소한의 CLI 호출로 채점합니다.
+
+    items: {"index", "question", "model_answer", "user_answer", "drawing_image"} 리스트.
+    배치는 병렬로 실행되고, 완료된 배치의 문항 결과부터 순서대로 yield 합니다.
+    CLI 출력은 호출이 끝난 뒤 한 번에 해석하므로, 결과는 문항 단위가 아니라 배치 단위로 나옵니다.
+    실패는 문항 단위로 격리되어 {"index", "error"} 형태로 반환됩니다.
+    """
+    # 이미지 전처리는 고유 이미지당 1회 — 같은 바이트는 배치 간에도 재사용
+    prepared: Dict[str, bytes] = {}
+    for item in items:
+        image = item.get("drawing_image")
+        if not image:
+            continue
+        digest = hashlib.sha256(image).hexdigest()
+        if digest not in prepared:
+            try:
+                prepared[digest] = await prepare_drawing(image)
+            except ValueError as e:
+                logger.warning("손글씨 이미지 처리 실패 (index=%s): %s", item["index"], e)
+                prepared[digest] = b""
+        item["drawing_image"] = prepared[digest]
+
+    failed = [item for item in items if item.get("drawing_image") == b""]
+    for item in failed:
+        yield {"index": item["index"], "error": "손글씨 이미지를 읽을 수 없습니다."}
+    items = [item for item in items if item.get("drawing_image") != b""]
+
+    batches = plan_grade_batches(items)
+    logger.info("배치 채점 시작: %d문항 → CLI %d회, 이미지 %d장", len(items), len(batches), len(prepared))
+
+    tasks = [asyncio.create_task(_grade_batch(batch)) for batch in batches]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            for result in await finished:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _parse_grade_batch_json(text: str) -> list:
+    """Claude 응답에서 JSON 배열 채점 결과를 추출합니다."""
+    content = text.strip()
+
+    if "```json" in content:
+        content = content.split("```json", 1)[1].split("```", 1)[0]
+    elif "```" in content:
+        content = content.split("```", 1)[1].split("```", 1)[0]
+
+    start = content.find("[")
+    end = content.rfind("]")
+    if start == -1 or end == -1:
+        raise ValueError("JSON 배열을 찾을 수 없습니다.")
+
+    return json.loads(content[start:end + 1])
+
+
 def _parse_grade_json(text: str) -> dict:
     """Claude 응답에서 JSON 채점 결과를 추출합니다."""
     content = text.strip()
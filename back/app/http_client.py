@@ -0,0 +1,146 @@
+"""외부 호출용 공유 httpx 클라이언트.
+
+호출마다 AsyncClient를 만들면 매번 TCP+TLS 연결을 새로 맺습니다. 워커당 클라이언트 하나를
+앱 startup에서 만들고 shutdown에서 닫아 연결을 재사용합니다 (h2가 설치돼 있으면 HTTP/2).
+- 전체 연결 수 / keep-alive는 httpx.Limits, 호스트별 동시 요청 수는 _HostLimitTransport로 제한
+- 호스트별 기본 타임아웃은 HOST_TIMEOUTS (호출부에서 timeout을 직접 주면 그 값 우선)
+- 요청마다 새 연결이었는지 재사용이었는지 decard_http_requests_total{connection=...}로 집계
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from .config import settings
+from .metrics import HTTP_LATENCY, HTTP_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# 호스트별 읽기 타임아웃(초) — 목록에 없으면 settings.HTTP_TIMEOUT_SECONDS
+HOST_TIMEOUTS: Dict[str, float] = {
+    "hooks.slack.com": 5.0,
+    "kauth.kakao.com": 10.0,
+    "kapi.kakao.com": 10.0,
+    "www.googleapis.com": 5.0,
+    "appleid.apple.com": 5.0,
+}
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """응답 본문을 다 읽고 닫을 때 호스트 슬롯을 반납."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class _HostLimitTransport(httpx.AsyncBaseTransport):
+    """호스트별 동시 요청 제한 + 타임아웃 + 연결 재사용 메트릭."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, per_host: int, default_timeout: dict):
+        self._inner = inner
+        self._per_host = per_host
+        self._default_timeout = default_timeout
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host in HOST_TIMEOUTS and request.extensions.get("timeout") == self._default_timeout:
+            read = HOST_TIMEOUTS[host]
+            request.extensions["timeout"] = {**self._default_timeout, "read": read, "write": read}
+
+        new_connection = False
+
+        async def trace(event_name: str, info: dict) -> None:
+            nonlocal new_connection
+            if event_name == "connection.connect_tcp.complete":
+                new_connection = True
+
+        request.extensions["trace"] = trace
+
+        slot = self._slots.setdefault(host, asyncio.Semaphore(self._per_host))
+        await slot.acquire()
+        started = time.perf_counter()
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException:
+            slot.release()
+            HTTP_REQUESTS.inc(host=host, connection="new" if new_connection else "reused", outcome="error")
+            raise
+        HTTP_LATENCY.observe(time.perf_counter() - started, host=host)
+        HTTP_REQUESTS.inc(
+            host=host,
+            connection="new" if new_connection else "reused",
+            outcome=str(response.status_code // 100) + "xx",
+        )
+        response.stream = _ReleasingStream(response.stream, slot.release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def _http2_available() -> bool:
+    if not settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("h2 미설치 — HTTP/1.1로 동작합니다 (pip install 'httpx[http2]')")
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    timeout = httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS, connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS)
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_SECONDS,
+    )
+    inner = httpx.AsyncHTTPTransport(limits=limits, http2=_http2_available(), retries=1)
+    return httpx.AsyncClient(
+        transport=_HostLimitTransport(inner, settings.HTTP_MAX_CONNECTIONS_PER_HOST, timeout.as_dict()),
+        timeout=timeout,
+        headers={"User-Agent": "decard-api"},
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """현재 이벤트 루프의 공유 클라이언트. startup 전(스크립트 등)이면 지연 생성."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = _build_client()
+        _client_loop = loop
+    return _client
+
+
+def start() -> None:
+    """앱 startup에서 호출 — 클라이언트를 미리 생성."""
+    get_http_client()
+
+
+async def close() -> None:
+    """앱 shutdown에서 호출 — keep-alive 연결 정리."""
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
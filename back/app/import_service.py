@@ -0,0 +1,210 @@
+"""CSV/XLSX 카드 가져오기 (스트리밍).
+
+업로드 파일을 통째로 읽거나 행 목록을 만들지 않고, 한 행씩 파싱해 배치로 저장합니다.
+- CSV: 업로드 임시 파일을 TextIOWrapper로 조금씩 디코딩(utf-8-sig)하며 csv.reader
+- XLSX: openpyxl read_only 모드 iter_rows (시트 XML을 행 단위로 읽음)
+- 첫 행이 헤더(앞면/뒷면 등)면 건너뛰고, 앞면이나 뒷면이 빈 행은 무시
+- IMPORT_BATCH_SIZE장마다 bulk_service.insert_cards + 커밋하고 세션 progress 갱신
+  — 세션은 importing 상태로 먼저 저장되고, 끝나야 completed가 됨. importing 세션은
+    AuthContext.session_filter가 걸러서 목록/상세/카드 조회에 반쯤 만든 덱이 보이지 않음
+- 중간에 실패하면(인코딩 오류, 장수 초과 등) 저장한 카드와 세션을 지우고 ValueError
+- 가져오는 중 프로세스가 죽으면 stuck 세션 정리가 discard_stale로 카드와 세션을 지움
+메모리에는 현재 배치와 응답에 담을 앞쪽 IMPORT_INLINE_CARDS장만 남습니다.
+"""
+
+import csv
+import io
+import logging
+import os
+import time
+from datetime import datetime
+from typing import IO, Any, Callable, Generator, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from .bulk_service import card_rows, insert_cards
+from .config import settings
+from .metrics import CARD_IMPORT_CARDS, CARD_IMPORTS
+from .models import CardModel, SessionModel
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_INLINE_CARDS = 500  # 응답에 바로 담는 카드 수 (나머지는 GET /sessions/{id}/cards 커서)
+SUPPORTED_FORMATS = ("csv", "xlsx")
+IMPORTING = "importing"  # 가져오는 중 세션 상태 (완료 전까지 소유자 조회에서 숨김)
+
+_HEADER_FRONT = {"front", "앞면", "질문", "question"}
+_HEADER_BACK = {"back", "뒷면", "답", "답변", "answer"}
+
+Rows = Tuple[Generator[Sequence[Any], None, None], Callable[[], float]]  # (행, 읽은 비율 0~1)
+
+
+# ──────────────────────────────────────
+# 행 읽기
+# ──────────────────────────────────────
+
+def _file_size(fileobj: IO[bytes]) -> int:
+    position = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(position)
+    return size
+
+
+def _csv_rows(fileobj: IO[bytes], size: int) -> Rows:
+    def rows() -> Generator[Sequence[Any], None, None]:
+        text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+        try:
+            yield from csv.reader(text)
+        finally:
+            text.detach()  # 업로드 파일은 UploadFile이 닫음
+
+    return rows(), lambda: fileobj.tell() / max(size, 1)
+
+
+def _xlsx_rows(fileobj: IO[bytes], size: int) -> Rows:
+    from openpyxl import load_workbook
+
+    try:
+        wb = load_workbook(fileobj, read_only=True)
+    except Exception as e:
+        raise ValueError("XLSX 파일을 읽을 수 없습니다.") from e
+    ws = wb.active
+    total = ws.max_row or 0  # dimension 정보가 없으면 진행률 0으로 유지
+    read = [0]
+
+    def rows() -> Generator[Sequence[Any], None, None]:
+        try:
+            for row in ws.iter_rows(values_only=True):
+                read[0] += 1
+                yield row
+        finally:
+            wb.close()
+
+    return rows(), lambda: read[0] / total if total else 0.0
+
+
+_READERS = {"csv": _csv_rows, "xlsx": _xlsx_rows}
+
+
+def _cell(value: Any) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _cards(rows: Iterator[Sequence[Any]]) -> Iterator[dict]:
+    """행 → 카드 dict (front, back, evidence). 헤더 행과 빈 카드는 건너뜀."""
+    first = True
+    for row in rows:
+        if first:
+            first = False
+            header = {_cell(cell).lower() for cell in row}
+            if header & _HEADER_FRONT or header & _HEADER_BACK:
+                continue
+        if len(row) < 2:
+            continue
+        front, back = _cell(row[0]), _cell(row[1])
+        if not front or not back:
+            continue
+        yield {"front": front, "back": back, "evidence": _cell(row[2]) if len(row) > 2 else ""}
+
+
+# ──────────────────────────────────────
+# 저장
+# ──────────────────────────────────────
+
+def import_file(
+    db: Session, session: SessionModel, fileobj: IO[bytes], fmt: str, size: Optional[int] = None,
+) -> Tuple[List[dict], int]:
+    """fileobj(csv/xlsx)의 카드로 session을 만들어 저장 → (앞쪽 카드 행 최대 IMPORT_INLINE_CARDS개, 전체 장수).
+
+    session은 아직 저장 전이어야 합니다 (importing으로 커밋 후 카드 저장, 끝나면 completed).
+    파일을 읽을 수 없거나 카드가 없거나 IMPORT_MAX_CARDS를 넘으면 세션을 지우고 ValueError.
+    """
+    size = size or _file_size(fileobj)
+    rows, read_ratio = _READERS[fmt](fileobj, size)
+
+    session.status = IMPORTING
+    session.progress = 0
+    db.add(session)
+    db.commit()
+    session_id = session.id
+
+    started = time.perf_counter()
+    base_time = datetime.utcnow()
+    inline: List[dict] = []
+    batch: List[dict] = []
+    total = 0
+
+    def save_batch() -> None:
+        nonlocal total
+        saved = card_rows(session_id, batch, created_at=base_time, start=total)
+        insert_cards(db, saved)
+        if len(inline) < IMPORT_INLINE_CARDS:
+            inline.extend(saved[:IMPORT_INLINE_CARDS - len(inline)])
+        total += len(saved)
+        batch.clear()
+        db.execute(
+            update(SessionModel)
+            .where(SessionModel.id == session_id)
+            .values(progress=min(99, int(read_ratio() * 100)))
+        )
+        db.commit()
+
+    try:
+        try:
+            for card in _cards(rows):
+                if total + len(batch) >= settings.IMPORT_MAX_CARDS:
+                    raise ValueError(f"카드는 최대 {settings.IMPORT_MAX_CARDS:,}장까지 가져올 수 있습니다.")
+                batch.append(card)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    save_batch()
+            if batch:
+                save_batch()
+        except UnicodeDecodeError as e:
+            raise ValueError("CSV 파일은 UTF-8 인코딩이어야 합니다.") from e
+        except csv.Error as e:
+            raise ValueError(f"CSV 파일을 읽을 수 없습니다. ({e})") from e
+        if not total:
+            raise ValueError("파일에서 카드를 추출할 수 없습니다.")
+    except Exception:
+        db.rollback()
+        _discard(db, session_id)
+        CARD_IMPORTS.inc(format=fmt, result="failed")
+        raise
+    finally:
+        rows.close()  # 중간에 멈춰도 업로드 파일이 닫히기 전에 리더 정리
+
+    session.status = "completed"
+    session.progress = 100
+    db.commit()
+    CARD_IMPORTS.inc(format=fmt, result="completed")
+    CARD_IMPORT_CARDS.inc(total, format=fmt)
+    logger.info(
+        "파일 가져오기: session=%s, %s %.1fMB, 카드 %d장, %.2fs",
+        session_id, fmt, size / 1024 / 1024, total, time.perf_counter() - started,
+    )
+    return inline, total
+
+
+def discard_stale(db: Session, cutoff: datetime) -> int:
+    """cutoff 전에 시작해 아직 importing인 세션(가져오던 프로세스가 죽음)의 카드와 세션 삭제. 지운 세션 수를 반환."""
+    stale = db.scalars(
+        select(SessionModel.id).where(SessionModel.status == IMPORTING, SessionModel.created_at < cutoff)
+    ).all()
+    for session_id in stale:
+        logger.warning("중단된 가져오기 정리: session=%s", session_id)
+        _discard(db, session_id)
+    return len(stale)
+
+
+def _discard(db: Session, session_id: str) -> None:
+    """실패한 가져오기의 카드와 세션 삭제. 삭제도 실패하면 importing으로 남아 discard_stale이 다시 지움."""
+    try:
+        db.execute(delete(CardModel).where(CardModel.session_id == session_id))
+        db.execute(delete(SessionModel).where(SessionModel.id == session_id))
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("가져오기 실패 세션 삭제 실패: session=%s", session_id)
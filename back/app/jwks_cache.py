@@ -0,0 +1,127 @@
+"""소셜 로그인 공개키(JWKS) 캐시.
+
+Apple / Google 서명 키를 로그인마다 내려받지 않고 워커 메모리에 보관합니다.
+- 유효 기간: 응답의 Cache-Control max-age(- Age) → Expires → 기본값 순으로 결정
+- 유효 기간의 80%가 지나면 요청은 캐시로 응답하고 백그라운드에서 갱신
+- 모르는 kid가 오면 (키 교체 직후) 즉시 재조회. 단, 최소 간격 내 재조회는 하지 않음
+- 제공자가 느리거나 실패하면 만료된 키라도 STALE 한도까지 계속 사용
+URL은 설정으로 바꿀 수 있어 scripts/stub_jwks.py 로컬 서버로 테스트할 수 있습니다.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+from jwt import PyJWK
+
+from .config import settings
+from .http_client import get_http_client
+from .metrics import JWKS_FETCHES
+
+logger = logging.getLogger(__name__)
+
+REFRESH_AHEAD_RATIO = 0.8
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def ttl_from_headers(headers: httpx.Headers, default: float) -> float:
+    """HTTP 캐시 헤더 → 유효 기간(초). no-store/no-cache면 0."""
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0.0
+    match = _MAX_AGE_RE.search(cache_control)
+    if match:
+        age = float(headers.get("age", "0") or 0)
+        return max(0.0, float(match.group(1)) - age)
+    expires = headers.get("expires")
+    if expires:
+        try:
+            return max(0.0, parsedate_to_datetime(expires).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return default
+
+
+class JWKSCache:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+        self._keys: Dict[str, PyJWK] = {}
+        self._fetched_at = 0.0
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def get_signing_key(self, kid: Optional[str]) -> PyJWK:
+        """kid에 해당하는 공개키. 없으면 ValueError."""
+        now = time.time()
+        key = self._keys.get(kid)
+        if key and now < self._expires_at:
+            if now >= self._fetched_at + (self._expires_at - self._fetched_at) * REFRESH_AHEAD_RATIO:
+                self._schedule_refresh()
+            return key
+
+        # 만료됐거나 모르는 kid → 직접 조회 (모르는 kid는 최소 간격 제한)
+        recently_fetched = now - self._fetched_at < settings.JWKS_MIN_REFETCH_SECONDS
+        if key or not recently_fetched:
+            await self.refresh()
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise ValueError(f"{self.name} public key not found (kid={kid})")
+        return key
+
+    async def refresh(self) -> None:
+        """JWKS 재조회 (동시 호출은 한 번으로 합침). 실패 시 기존 키 유지."""
+        started = time.time()
+        async with self._lock:
+            if self._fetched_at >= started:
+                return  # 대기 중 다른 요청이 갱신 완료
+            try:
+                resp = await get_http_client().get(self.url, timeout=settings.JWKS_FETCH_TIMEOUT_SECONDS)
+                resp.raise_for_status()
+                keys = {}
+                for jwk in resp.json().get("keys", []):
+                    try:
+                        keys[jwk.get("kid")] = PyJWK(jwk)
+                    except Exception as e:  # 지원하지 않는 키 타입 등은 건너뜀
+                        logger.debug("%s JWKS 키 무시 kid=%s: %s", self.name, jwk.get("kid"), e)
+                ttl = ttl_from_headers(resp.headers, settings.JWKS_DEFAULT_TTL_SECONDS)
+            except Exception as e:
+                JWKS_FETCHES.inc(provider=self.name, result="error")
+                stale_limit = self._expires_at + settings.JWKS_STALE_SECONDS
+                if self._keys and time.time() < stale_limit:
+                    logger.warning("%s JWKS 갱신 실패, 기존 키 사용: %s: %s", self.name, type(e).__name__, e)
+                    return
+                logger.error("%s JWKS 조회 실패: %s: %s", self.name, type(e).__name__, e)
+                raise ValueError(f"{self.name} public keys unavailable: {e}")
+
+            JWKS_FETCHES.inc(provider=self.name, result="ok")
+            self._keys = keys
+            self._fetched_at = time.time()
+            self._expires_at = self._fetched_at + ttl
+            logger.info("%s JWKS 갱신: 키 %d개, ttl=%ds", self.name, len(keys), ttl)
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self._refresh_quietly())
+
+    async def _refresh_quietly(self) -> None:
+        try:
+            await self.refresh()
+        except ValueError:
+            pass  # 이미 로그 남김, 다음 요청에서 재시도
+
+
+apple_keys = JWKSCache("apple", settings.APPLE_JWKS_URL)
+google_keys = JWKSCache("google", settings.GOOGLE_JWKS_URL)
+
+
+async def warm_up() -> None:
+    """기동 시 키를 미리 받아 첫 로그인 지연 제거 (실패해도 무시)."""
+    await asyncio.gather(apple_keys._refresh_quietly(), google_keys._refresh_quietly())
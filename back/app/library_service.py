@@ -0,0 +1,338 @@
+"""Explore 다운로드 카드셋 참조 (copy-on-write).
+
+다운로드는 공개 카드를 복사하지 않고 세션 1행(source_cardset_id)만 만듭니다.
+- 세션의 카드 = 공개 카드(sort_order 순) 중 이 세션에서 구체화되지 않은 것 + 구체화된 cards 행
+- 구체화 전 카드는 가상 ID "ref:{session_id}:{public_card_id}", status accepted로 노출
+- 수정/상태 변경 시 같은 ID로 cards 행을 만들어(source_card_id 기록) 이후는 일반 카드와 동일
+- 복습/채점 기록은 카드 ID로 유저별 저장 — 구체화 전후 ID가 같아 학습 이력이 이어짐
+공개 카드는 발행 후 바뀌지 않으므로 참조 세션의 내용도 다운로드 시점과 같습니다.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+
+from . import pagination
+from .models import CardModel, CardReviewModel, GradeModel, PublicCardModel, PublicCardsetModel, SessionModel
+
+logger = logging.getLogger(__name__)
+
+REF_PREFIX = "ref:"
+
+
+@dataclass
+class LinkedCard:
+    """구체화 전 참조 카드 — CardModel과 같은 속성으로 응답/채점/복습에 그대로 사용."""
+    id: str
+    session_id: str
+    source_card_id: str
+    front: str
+    back: str
+    evidence: str
+    template_type: str
+    session: SessionModel
+    evidence_page: int = 0
+    tags: str = ""
+    status: str = "accepted"
+
+
+AnyCard = Union[CardModel, LinkedCard]
+
+
+def ref_id(session_id: str, public_card_id: str) -> str:
+    return f"{REF_PREFIX}{session_id}:{public_card_id}"
+
+
+def parse_ref(card_id: str) -> Optional[Tuple[str, str]]:
+    """가상 ID → (session_id, public_card_id). 형식이 아니면 None."""
+    if not card_id.startswith(REF_PREFIX):
+        return None
+    session_id, _, public_card_id = card_id[len(REF_PREFIX):].partition(":")
+    return (session_id, public_card_id) if session_id and public_card_id else None
+
+
+def ref_id_range(session_id: str) -> Tuple[str, str]:
+    """세션의 가상 ID 범위 [lo, hi) — card_id 인덱스로 범위 검색 (LIKE 접두어 대신)."""
+    prefix = f"{REF_PREFIX}{session_id}:"
+    return prefix, prefix[:-1] + chr(ord(":") + 1)
+
+
+def _linked(session: SessionModel, pc: PublicCardModel) -> LinkedCard:
+    return LinkedCard(
+        id=ref_id(session.id, pc.id),
+        session_id=session.id,
+        source_card_id=pc.id,
+        front=pc.front,
+        back=pc.back,
+        evidence=pc.evidence or "",
+        template_type=pc.template_type,
+        session=session,
+    )
+
+
+# ──────────────────────────────────────
+# 세션 카드
+# ──────────────────────────────────────
+
+def session_cards(session: SessionModel, db: Optional[Session] = None) -> List[AnyCard]:
+    """세션의 카드 목록. 참조 세션이면 공개 카드와 구체화된 카드를 합쳐 원래 순서로."""
+    if not session.source_cardset_id:
+        return list(session.cards)
+    db = db or object_session(session)
+    overrides = {c.source_card_id: c for c in session.cards if c.source_card_id}
+    publics = db.scalars(
+        select(PublicCardModel)
+        .where(PublicCardModel.cardset_id == session.source_cardset_id)
+        .order_by(PublicCardModel.sort_order)
+    ).all()
+    cards: List[AnyCard] = [overrides.get(pc.id) or _linked(session, pc) for pc in publics]
+    cards.extend(c for c in session.cards if not c.source_card_id)
+    return cards
+
+
+PUBLIC_PAGE_KEY = (PublicCardModel.sort_order, PublicCardModel.id)
+CARD_PAGE_KEY = (CardModel.created_at, CardModel.id)
+_EXTRA_CARDS_START = pagination.encode_cursor([datetime.min, ""])  # 세션 자체 카드 첫 페이지
+
+
+def iter_session_cards(
+    db: Session, session: SessionModel, statuses: Iterable[str], batch_size: int = 500,
+) -> Iterator[AnyCard]:
+    """session_cards와 같은 순서로 카드를 yield_per 배치 단위로 읽어 하나씩 (내보내기용, 목록을 메모리에 두지 않음).
+
+    일반 세션은 (created_at, id) 순 — 카드 페이지와 같은 인덱스 순서.
+    """
+    statuses = list(statuses)
+    own = db.query(CardModel).filter(CardModel.session_id == session.id).order_by(*CARD_PAGE_KEY)
+    if not session.source_cardset_id:
+        yield from own.filter(CardModel.status.in_(statuses)).yield_per(batch_size)
+        return
+
+    # 구체화된 카드는 사용자가 손댄 카드뿐이라 소수
+    overrides = {c.source_card_id: c for c in own.filter(CardModel.source_card_id.isnot(None))}
+    publics = (
+        db.query(PublicCardModel)
+        .filter(PublicCardModel.cardset_id == session.source_cardset_id)
+        .order_by(*PUBLIC_PAGE_KEY)
+        .yield_per(batch_size)
+    )
+    for pc in publics:
+        card = overrides.get(pc.id) or _linked(session, pc)
+        if card.status in statuses:
+            yield card
+    yield from own.filter(
+        CardModel.source_card_id.is_(None), CardModel.status.in_(statuses),
+    ).yield_per(batch_size)
+
+
+def cards_page(
+    db: Session, session: SessionModel, cursor: Optional[str], limit: int, status: Optional[str] = None,
+) -> Tuple[List[AnyCard], Optional[str]]:
+    """세션 카드 한 페이지 → (카드, 다음 커서). 잘못된 커서는 ValueError.
+
+    일반 세션은 (created_at, id) 순. 참조 세션은 공개 카드(sort_order, id) 다음 세션 자체 카드 순이며
+    커서 값의 형태(정수 sort_order / 시각)로 어느 구간인지 구분합니다. 참조 세션에서 status로 거르면
+    구체화된 카드의 상태가 다를 수 있어 페이지가 limit보다 짧을 수 있습니다 (커서가 있으면 다음 페이지 존재).
+    """
+    own = db.query(CardModel).filter(CardModel.session_id == session.id)
+    if not session.source_cardset_id:
+        if status:
+            own = own.filter(CardModel.status == status)
+        return pagination.paginate(own, CARD_PAGE_KEY, cursor, limit, descending=False)
+
+    in_public = True
+    if cursor:
+        try:
+            pagination.decode_cursor(cursor, PUBLIC_PAGE_KEY)
+        except ValueError:
+            pagination.decode_cursor(cursor, CARD_PAGE_KEY)  # 둘 다 아니면 ValueError
+            in_public = False
+
+    cards: List[AnyCard] = []
+    if in_public:
+        publics, next_cursor = pagination.paginate(
+            db.query(PublicCardModel).filter(PublicCardModel.cardset_id == session.source_cardset_id),
+            PUBLIC_PAGE_KEY, cursor, limit, descending=False,
+        )
+        overrides = {
+            c.source_card_id: c
+            for c in own.filter(CardModel.source_card_id.in_([pc.id for pc in publics]))
+        } if publics else {}
+        cards = [overrides.get(pc.id) or _linked(session, pc) for pc in publics]
+        if status:
+            cards = [c for c in cards if c.status == status]
+        if next_cursor:
+            return cards, next_cursor
+        remaining = limit - len(publics)
+        if remaining <= 0:
+            return cards, _EXTRA_CARDS_START
+        cursor, limit = None, remaining
+
+    extras = own.filter(CardModel.source_card_id.is_(None))
+    if status:
+        extras = extras.filter(CardModel.status == status)
+    rows, next_cursor = pagination.paginate(extras, CARD_PAGE_KEY, cursor, limit, descending=False)
+    return cards + rows, next_cursor
+
+
+def card_counts(db: Session, sessions: Iterable) -> Dict[str, int]:
+    """세션별 카드 수를 집계 쿼리로 (카드 행을 로드하지 않음).
+
+    참조 세션은 공개 카드셋의 card_count + 구체화되지 않은 세션 자체 카드.
+
+    sessions는 id / source_cardset_id 속성만 있으면 됩니다 (ORM 객체 또는 Row).
+    """
+    sessions = list(sessions)
+    if not sessions:
+        return {}
+    counts = dict(db.execute(
+        select(CardModel.session_id, func.count())
+        .where(CardModel.session_id.in_([s.id for s in sessions]))
+        .group_by(CardModel.session_id)
+    ).all())
+    linked = [s for s in sessions if s.source_cardset_id]
+    if linked:
+        # 참조 세션: 구체화된 행은 공개 카드 수에 이미 포함
+        materialized = dict(db.execute(
+            select(CardModel.session_id, func.count())
+            .where(CardModel.session_id.in_([s.id for s in linked]), CardModel.source_card_id.isnot(None))
+            .group_by(CardModel.session_id)
+        ).all())
+        public = dict(db.execute(
+            select(PublicCardsetModel.id, PublicCardsetModel.card_count)
+            .where(PublicCardsetModel.id.in_({s.source_cardset_id for s in linked}))
+        ).all())
+        for s in linked:
+            counts[s.id] = counts.get(s.id, 0) - materialized.get(s.id, 0) + (public.get(s.source_cardset_id) or 0)
+    return {s.id: counts.get(s.id, 0) for s in sessions}
+
+
+def folder_counts(db: Session, folder_ids: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+    """폴더별 (세션 수, 카드 수)."""
+    folder_ids = list(folder_ids)
+    if not folder_ids:
+        return {}
+    sessions = db.execute(
+        select(SessionModel.id, SessionModel.folder_id, SessionModel.source_cardset_id)
+        .where(SessionModel.folder_id.in_(folder_ids))
+    ).all()
+    per_session = card_counts(db, sessions)
+    result = {folder_id: (0, 0) for folder_id in folder_ids}
+    for s in sessions:
+        session_count, cards = result[s.folder_id]
+        result[s.folder_id] = (session_count + 1, cards + per_session[s.id])
+    return result
+
+
+def linked_cards(db: Session, sessions: Iterable[SessionModel], status: str = "accepted") -> List[LinkedCard]:
+    """여러 참조 세션의 구체화 전 카드 (학습 대상 집계용). 구체화 전 카드는 모두 accepted."""
+    linked = [s for s in sessions if s.source_cardset_id]
+    if not linked or status != "accepted":
+        return []
+    materialized = set(db.scalars(
+        select(CardModel.id).where(
+            CardModel.session_id.in_([s.id for s in linked]),
+            CardModel.source_card_id.isnot(None),
+        )
+    ))
+    by_cardset: Dict[str, List[PublicCardModel]] = {}
+    for pc in db.scalars(
+        select(PublicCardModel)
+        .where(PublicCardModel.cardset_id.in_({s.source_cardset_id for s in linked}))
+        .order_by(PublicCardModel.cardset_id, PublicCardModel.sort_order)
+    ):
+        by_cardset.setdefault(pc.cardset_id, []).append(pc)
+    return [
+        _linked(s, pc)
+        for s in linked
+        for pc in by_cardset.get(s.source_cardset_id, [])
+        if ref_id(s.id, pc.id) not in materialized
+    ]
+
+
+# ──────────────────────────────────────
+# 카드 ID 해석 / 구체화
+# ──────────────────────────────────────
+
+def resolve_cards(db: Session, card_ids: Iterable[str]) -> Dict[str, AnyCard]:
+    """카드 ID(가상 ID 포함) → 카드. 없는 ID는 결과에서 빠짐."""
+    card_ids = set(card_ids)
+    found: Dict[str, AnyCard] = {
+        c.id: c for c in db.scalars(select(CardModel).where(CardModel.id.in_(card_ids)))
+    }
+    refs = {cid: parsed for cid in card_ids - found.keys() if (parsed := parse_ref(cid))}
+    if not refs:
+        return found
+
+    sessions = {
+        s.id: s for s in db.scalars(
+            select(SessionModel).where(
+                SessionModel.id.in_({sid for sid, _ in refs.values()}),
+                SessionModel.source_cardset_id.isnot(None),
+            )
+        )
+    }
+    publics = {
+        pc.id: pc for pc in db.scalars(
+            select(PublicCardModel).where(PublicCardModel.id.in_({pcid for _, pcid in refs.values()}))
+        )
+    }
+    for cid, (sid, pcid) in refs.items():
+        session, pc = sessions.get(sid), publics.get(pcid)
+        if session and pc and pc.cardset_id == session.source_cardset_id:
+            found[cid] = _linked(session, pc)
+    return found
+
+
+def resolve_card(db: Session, card_id: str) -> Optional[AnyCard]:
+    return resolve_cards(db, [card_id]).get(card_id)
+
+
+def materialize(db: Session, card: AnyCard) -> CardModel:
+    """참조 카드를 같은 ID의 cards 행으로 구체화 (이미 행이면 그대로). 커밋은 호출자가 합니다."""
+    if isinstance(card, CardModel):
+        return card
+    row = CardModel(
+        id=card.id,
+        session_id=card.session_id,
+        source_card_id=card.source_card_id,
+        front=card.front,
+        back=card.back,
+        evidence=card.evidence,
+        evidence_page=card.evidence_page,
+        tags=card.tags,
+        template_type=card.template_type,
+        status=card.status,
+    )
+    try:
+        with db.begin_nested():
+            db.add(row)
+    except IntegrityError:
+        # 동시 요청이 먼저 구체화함
+        row = db.get(CardModel, card.id)
+    return row
+
+
+# ──────────────────────────────────────
+# 삭제
+# ──────────────────────────────────────
+
+def delete_ref_history(db: Session, session_id: str) -> None:
+    """참조 세션의 구체화 전 카드(가상 ID)에 쌓인 채점/복습 기록 삭제. 커밋은 호출자가 합니다."""
+    lo, hi = ref_id_range(session_id)
+    for model in (GradeModel, CardReviewModel):
+        db.query(model).filter(model.card_id >= lo, model.card_id < hi).delete(synchronize_session=False)
+
+
+def delete_card_history(db: Session, session: SessionModel) -> None:
+    """세션 카드의 채점/복습 기록 삭제 (card_id에 FK가 없어 세션 삭제로 정리되지 않음). 커밋은 호출자가 합니다."""
+    card_ids = select(CardModel.id).where(CardModel.session_id == session.id)
+    for model in (GradeModel, CardReviewModel):
+        db.query(model).filter(model.card_id.in_(card_ids)).delete(synchronize_session=False)
+    if session.source_cardset_id:
+        delete_ref_history(db, session.id)
@@ -1,16 +1,24 @@
 import asyncio
 import logging
+import os
 from datetime import datetime, timedelta
+from typing import Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from .config import settings
-from .database import create_tables, SessionLocal
+from . import download_counter, http_client, import_service, jwks_cache, metrics, pagination, serialization
+from .auth import is_operator
+from .compression import CompressionMiddleware
+from sqlalchemy import select
+
+from .database import create_tables, AsyncSessionLocal, async_engine
 from .models import SessionModel
 from .routes import router
 from .auth_routes import router as auth_router
-from .slack import send_slack_alert
+from .slack import alert, alerts
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +27,7 @@ app = FastAPI(
     title="Decard API",
     description="PDF → 근거 포함 암기카드 생성 API",
     version="0.1.0",
+    default_response_class=serialization.FastJSONResponse,
 )
 
 app.add_middleware(
@@ -27,67 +36,77 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization", "X-Device-ID"],
+    expose_headers=[pagination.NEXT_CURSOR_HEADER],
 )
+app.add_middleware(CompressionMiddleware)
 
 app.include_router(router)
 app.include_router(auth_router)
 
 
 async def _cleanup_stuck_sessions():
-    """SESSION_TIMEOUT_MINUTES 이상 processing 상태인 세션을 failed로 전환."""
+    """SESSION_TIMEOUT_MINUTES 이상 processing 상태인 세션을 failed로 전환, 중단된 파일 가져오기는 삭제."""
     timeout_minutes = settings.SESSION_TIMEOUT_MINUTES
     while True:
-        db = SessionLocal()
         try:
-            cutoff = datetime.utcnow() - timedelta(minutes=timeout_minutes)
-            stuck = db.query(SessionModel).filter(
-                SessionModel.status == "processing",
-                SessionModel.created_at < cutoff,
-            ).all()
-            for s in stuck:
-                s.status = "failed"
-                s.error_message = f"처리 시간 초과 ({timeout_minutes}분). 다시 시도해주세요."
-                logger.warning("stuck 세션 정리: %s (%s)", s.id, s.filename)
-            if stuck:
-                db.commit()
+            async with AsyncSessionLocal() as db:
+                cutoff = datetime.utcnow() - timedelta(minutes=timeout_minutes)
+                stuck = (await db.scalars(
+                    select(SessionModel).where(
+                        SessionModel.status == "processing",
+                        SessionModel.created_at < cutoff,
+                    )
+                )).all()
+                for s in stuck:
+                    s.status = "failed"
+                    s.error_message = f"처리 시간 초과 ({timeout_minutes}분). 다시 시도해주세요."
+                    logger.warning("stuck 세션 정리: %s (%s)", s.id, s.filename)
+                if stuck:
+                    await db.commit()
+                await db.run_sync(import_service.discard_stale, cutoff)
         except Exception:
             logger.exception("stuck 세션 정리 중 오류")
-        finally:
-            db.close()
         await asyncio.sleep(300)  # 5분 주기
 
 
 @app.on_event("startup")
 def startup():
     create_tables()
+    http_client.start()
+    alerts.start()
+    download_counter.counter.start()
+    alert("서버 시작", "decard-api 서버가 시작되었습니다.", "info")
     loop = asyncio.get_event_loop()
-    loop.create_task(
-        send_slack_alert("서버 시작", "decard-api 서버가 시작되었습니다.", "info")
-    )
     loop.create_task(_cleanup_stuck_sessions())
+    if settings.APP_ENV != "dev":
+        loop.create_task(jwks_cache.warm_up())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await download_counter.counter.stop()
+    await alerts.stop()
+    await http_client.close()
+    await async_engine.dispose()
+    metrics.mark_worker_dead(os.getpid())
 
 
 @app.get("/health")
 def health():
-    from .claude_cli import _check_memory, _cli_semaphore, MAX_CONCURRENT_CLI
-    mem = _check_memory()
-
-    db = SessionLocal()
-    try:
-        processing = db.query(SessionModel).filter(
-            SessionModel.status == "processing"
-        ).count()
-    finally:
-        db.close()
-
-    return {
-        "status": "ok",
-        "service": "decard",
-        "memory": mem,
-        "cli_semaphore": {
-            "max": MAX_CONCURRENT_CLI,
-            "available": _cli_semaphore._value,
-        },
-        "processing_sessions": processing,
-        "max_concurrent_sessions": settings.MAX_CONCURRENT_SESSIONS,
-    }
+    """liveness 체크 — DB/시스템 조회 없음. 상세 상태는 /metrics."""
+    return {"status": "ok", "service": "decard"}
+
+
+@app.get("/metrics")
+def metrics_endpoint(
+    x_ops_token: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    """Prometheus 수집용 메트릭 (모든 워커 합산, 텍스트 노출 포맷).
+
+    운영자 전용 — X-Ops-Token 또는 Authorization: Bearer <OPS_API_TOKEN> (Prometheus authorization 설정).
+    """
+    bearer = authorization[7:] if authorization and authorization.startswith("Bearer ") else None
+    if not is_operator(x_ops_token or bearer):
+        raise HTTPException(403, "운영자 토큰이 필요합니다.")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,271 @@
+"""Prometheus 메트릭 (prometheus_client).
+
+gunicorn은 워커 여러 개가 한 포트를 나눠 쓰므로, /metrics를 수집할 때마다 임의의 워커가 응답합니다.
+워커별 값을 그대로 내보내면 카운터가 오르내리고 게이지는 일부만 보이므로 멀티프로세스 모드를 씁니다.
+- PROMETHEUS_MULTIPROC_DIR가 설정되면 워커마다 값을 그 디렉터리의 mmap 파일에 기록하고,
+  /metrics는 모든 워커의 파일을 합산 (카운터/히스토그램 합계, 게이지는 살아 있는 워커 합계)
+- 디렉터리는 서버 시작 시 비우고 (gunicorn.conf.py / systemd RuntimeDirectory), 종료된 워커의
+  게이지 값은 합산에서 제외 (gunicorn child_exit, 앱 shutdown)
+- 환경 변수가 없으면(로컬 단일 프로세스) 프로세스 메모리 값을 그대로 노출
+Gauge는 수집 시점에 DB 등을 조회하지 않고, 상태가 바뀌는 곳에서 inc/dec로 갱신합니다.
+"""
+
+import os
+from typing import Sequence, Tuple
+
+from prometheus_client import CollectorRegistry, generate_latest
+from prometheus_client import Counter as _Counter
+from prometheus_client import Gauge as _Gauge
+from prometheus_client import Histogram as _Histogram
+from prometheus_client import multiprocess
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_REGISTRY = CollectorRegistry()
+
+
+class _Metric:
+    """라벨을 키워드 인자로 받는 얇은 래퍼 (라벨 이름은 정의 시 선언)."""
+
+    def __init__(self, metric):
+        self._metric = metric
+
+    def _child(self, labels: dict):
+        return self._metric.labels(**labels) if labels else self._metric
+
+
+class Counter(_Metric):
+    def inc(self, amount: float = 1, **labels) -> None:
+        self._child(labels).inc(amount)
+
+
+class Gauge(_Metric):
+    def inc(self, amount: float = 1, **labels) -> None:
+        self._child(labels).inc(amount)
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self._child(labels).dec(amount)
+
+    def set(self, value: float, **labels) -> None:
+        self._child(labels).set(value)
+
+
+class Histogram(_Metric):
+    def observe(self, value: float, **labels) -> None:
+        self._child(labels).observe(value)
+
+
+def counter(name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+    return Counter(_Counter(name, documentation, labels, registry=_REGISTRY))
+
+
+def gauge(name: str, documentation: str, labels: Sequence[str] = (), mode: str = "livesum") -> Gauge:
+    """mode: 멀티프로세스 합산 방식 (livesum = 살아 있는 워커 합계, mostrecent = 마지막 기록 값)."""
+    return Gauge(_Gauge(name, documentation, labels, registry=_REGISTRY, multiprocess_mode=mode))
+
+
+def histogram(
+    name: str, documentation: str, labels: Sequence[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return Histogram(_Histogram(name, documentation, labels, registry=_REGISTRY, buckets=buckets))
+
+
+def mark_worker_dead(pid: int) -> None:
+    """종료하는 워커의 게이지 값을 합산에서 제외 (멀티프로세스 모드에서만)."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+def render() -> str:
+    """모든 워커(멀티프로세스 모드) 또는 이 프로세스의 메트릭을 Prometheus 텍스트 포맷으로 반환합니다."""
+    registry = _REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry).decode()
+
+
+# ──────────────────────────────────────
+# Claude CLI / 카드 생성
+# ──────────────────────────────────────
+
+CLI_CALLS = counter(
+    "decard_cli_calls_total",
+    "Claude CLI invocations by pipeline step (analysis, card_creation, review, grade) and outcome.",
+    labels=("step", "outcome"),
+)
+CLI_LATENCY = histogram(
+    "decard_cli_latency_seconds",
+    "Claude CLI subprocess wall time by step (excludes queue wait).",
+    labels=("step",),
+)
+CLI_QUEUE_WAIT = histogram(
+    "decard_cli_queue_wait_seconds",
+    "Time spent waiting for per-session and global CLI slots by step.",
+    labels=("step",),
+    buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+CLI_RETRIES = counter(
+    "decard_cli_retries_total",
+    "CLI re-invocations by step and reason (cli = call failed, parse = unparseable output).",
+    labels=("step", "reason"),
+)
+CLI_PARSE_FAILURES = counter(
+    "decard_cli_parse_failures_total",
+    "CLI outputs that could not be parsed as the expected JSON, by step.",
+    labels=("step",),
+)
+CLI_IN_FLIGHT = gauge("decard_cli_in_flight", "Claude CLI subprocesses currently running.")
+CLI_WAITING = gauge("decard_cli_waiting", "CLI calls currently waiting for a slot.")
+MEMORY_AVAILABLE_BYTES = gauge(
+    "decard_memory_available_bytes", "System available memory, sampled before each CLI call.", mode="mostrecent",
+)
+
+CHUNK_PAGES = histogram(
+    "decard_chunk_pages", "Pages per generation chunk.", buckets=(1, 2, 3, 5, 8, 10, 15, 20),
+)
+CHUNK_CHARS = histogram(
+    "decard_chunk_chars",
+    "Extracted text characters per generation chunk.",
+    buckets=(500, 1_000, 2_500, 5_000, 10_000, 20_000, 40_000, 80_000),
+)
+CARDS_PER_SESSION = histogram(
+    "decard_cards_per_session",
+    "Cards produced per completed generation session.",
+    buckets=(0, 5, 10, 20, 40, 60, 80, 120, 200),
+)
+SESSIONS_PROCESSING = gauge(
+    "decard_sessions_processing", "Generation sessions currently running (all workers).",
+)
+
+
+# ──────────────────────────────────────
+# DB
+# ──────────────────────────────────────
+
+DB_QUERY_SECONDS = histogram(
+    "decard_db_query_seconds",
+    "Database statement execution time by statement type (select, insert, update, delete, other).",
+    labels=("statement",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+# ──────────────────────────────────────
+# Explore
+# ──────────────────────────────────────
+
+EXPLORE_CACHE = counter(
+    "decard_explore_cache_total",
+    "Explore response cache results by endpoint (local/disk hit, miss, bypass = store unavailable, not_modified = 304).",
+    labels=("endpoint", "result"),
+)
+EXPLORE_DOWNLOADS = counter(
+    "decard_explore_downloads_total",
+    "Cardset downloads by stage (recorded = event appended, flushed = applied to download_count).",
+    labels=("stage",),
+)
+
+
+# ──────────────────────────────────────
+# 채점
+# ──────────────────────────────────────
+
+GRADE_LATENCY = histogram(
+    "decard_grade_latency_seconds",
+    "AI grading latency per CLI call, split by whether a handwriting image was attached.",
+    labels=("mode", "image"),
+)
+GRADE_IMAGE_BYTES = histogram(
+    "decard_grade_image_bytes",
+    "Handwriting image size before and after downscale/compression.",
+    labels=("stage",),
+    buckets=(16_384, 65_536, 131_072, 262_144, 524_288, 1_048_576, 2_097_152, 4_194_304),
+)
+
+
+# ──────────────────────────────────────
+# 인증
+# ──────────────────────────────────────
+
+AUTH_TOKEN_CACHE = counter(
+    "decard_auth_token_cache_total",
+    "JWT verification cache lookups (hit = signature check skipped).",
+    labels=("result",),
+)
+JWKS_FETCHES = counter(
+    "decard_jwks_fetch_total",
+    "Social login public key (JWKS) fetches by provider and result.",
+    labels=("provider", "result"),
+)
+
+
+# ──────────────────────────────────────
+# 응답 압축
+# ──────────────────────────────────────
+
+RESPONSE_COMPRESSION = counter(
+    "decard_response_compression_total",
+    "API responses by content encoding and source (dynamic, stream, precompressed; "
+    "identity = below_threshold / incompressible).",
+    labels=("encoding", "source"),
+)
+RESPONSE_COMPRESSION_SAVED_BYTES = counter(
+    "decard_response_compression_saved_bytes_total",
+    "Response bytes saved by compression (original - encoded), by encoding and source.",
+    labels=("encoding", "source"),
+)
+
+
+# ──────────────────────────────────────
+# 카드 내보내기 / 가져오기
+# ──────────────────────────────────────
+
+CARD_EXPORTS = counter(
+    "decard_card_exports_total",
+    "Card exports by format (tsv, apkg) and scope (session, folder, library).",
+    labels=("format", "scope"),
+)
+CARD_EXPORT_CARDS = counter(
+    "decard_card_export_cards_total",
+    "Cards written by exports, by format.",
+    labels=("format",),
+)
+CARD_IMPORTS = counter(
+    "decard_card_imports_total",
+    "CSV/XLSX file imports by format and result (completed, failed).",
+    labels=("format", "result"),
+)
+CARD_IMPORT_CARDS = counter(
+    "decard_card_import_cards_total",
+    "Cards saved by completed file imports, by format.",
+    labels=("format",),
+)
+
+
+# ──────────────────────────────────────
+# 외부 HTTP
+# ──────────────────────────────────────
+
+HTTP_REQUESTS = counter(
+    "decard_http_requests_total",
+    "Outbound HTTP requests by host, connection (new = fresh TCP/TLS handshake, reused = pooled) and outcome.",
+    labels=("host", "connection", "outcome"),
+)
+HTTP_LATENCY = histogram(
+    "decard_http_request_seconds",
+    "Outbound HTTP request latency until response headers, by host.",
+    labels=("host",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+# ──────────────────────────────────────
+# 알림
+# ──────────────────────────────────────
+
+SLACK_ALERTS = counter(
+    "decard_slack_alerts_total",
+    "Slack alert queue events (enqueued, sent, coalesced into a summary, rate_limited tick, failed, dropped).",
+    labels=("result",),
+)
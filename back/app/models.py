@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, String, Integer, Float, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, String, Integer, Float, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel
 from typing import List, Optional
@@ -44,6 +44,12 @@ class FolderModel(Base):
 
     sessions = relationship("SessionModel", back_populates="folder")
 
+    __table_args__ = (
+        # 폴더 목록 keyset 페이지 (app/pagination.py)
+        Index("ix_folders_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_folders_device_id_created_at_id", "device_id", "created_at", "id"),
+    )
+
 
 class SessionModel(Base):
     __tablename__ = "sessions"
@@ -58,22 +64,37 @@ class SessionModel(Base):
     display_name = Column(String, nullable=True)
     source_type = Column(String, default="pdf")  # pdf / manual / csv / xlsx
     share_key = Column(String, unique=True, nullable=True, index=True)  # 공유 키 (null=비공개)
-    status = Column(String, default="processing")  # processing / completed / failed
+    status = Column(String, default="processing")  # processing / completed / failed / importing (파일 가져오기 중, 소유자 조회에서 숨김)
     error_message = Column(String, nullable=True)      # 실패 사유
     progress = Column(Integer, default=0)               # 0~100
     total_chunks = Column(Integer, default=0)            # 전체 청크 수
     completed_chunks = Column(Integer, default=0)        # 완료된 청크 수
+    # Explore 다운로드(참조): 공개 카드셋을 복사하지 않고 가리킴 — app/library_service.py
+    source_cardset_id = Column(String, ForeignKey("public_cardsets.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     cards = relationship("CardModel", back_populates="session", cascade="all, delete-orphan")
+    source_cardset = relationship("PublicCardsetModel")
+    timeline = relationship("SessionTimelineModel", uselist=False, cascade="all, delete-orphan")
     user = relationship("UserModel", back_populates="sessions")
     folder = relationship("FolderModel", back_populates="sessions")
 
+    __table_args__ = (
+        Index("ix_sessions_status_created_at", "status", "created_at"),  # stuck 정리
+        # 월간 사용량 집계 (billing_service._count_used)
+        Index("ix_sessions_user_id_source_type_created_at", "user_id", "source_type", "created_at"),
+        Index("ix_sessions_device_id_source_type_created_at", "device_id", "source_type", "created_at"),
+        # 세션 목록 / 폴더 세션 keyset 페이지 (app/pagination.py)
+        Index("ix_sessions_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_sessions_device_id_created_at_id", "device_id", "created_at", "id"),
+        Index("ix_sessions_folder_id_created_at_id", "folder_id", "created_at", "id"),
+    )
+
 
 class CardModel(Base):
     __tablename__ = "cards"
 
-    id = Column(String, primary_key=True, default=lambda: f"card_{uuid.uuid4().hex[:8]}")
+    id = Column(String, primary_key=True, default=lambda: f"card_{uuid.uuid4().hex[:16]}")  # bulk_service.new_card_id
     session_id = Column(String, ForeignKey("sessions.id"), nullable=False)
     front = Column(Text, nullable=False)
     back = Column(Text, nullable=False)
@@ -82,16 +103,25 @@ class CardModel(Base):
     tags = Column(String, default="")
     template_type = Column(String, default="definition")
     status = Column(String, default="pending")  # pending / accepted / rejected
+    source_card_id = Column(String, nullable=True)  # 참조 세션에서 구체화된 공개 카드 ID
     created_at = Column(DateTime, default=datetime.utcnow)
 
     session = relationship("SessionModel", back_populates="cards")
 
+    __table_args__ = (
+        # session_id 단독 조회(세션 카드, 삭제)도 이 인덱스의 선두 컬럼으로 처리
+        Index("ix_cards_session_id_status", "session_id", "status"),
+        # 세션 카드 keyset 페이지 (GET /sessions/{id}/cards)
+        Index("ix_cards_session_id_created_at_id", "session_id", "created_at", "id"),
+    )
+
 
 class CardReviewModel(Base):
     __tablename__ = "card_reviews"
 
     id = Column(String, primary_key=True, default=lambda: f"rev_{uuid.uuid4().hex[:8]}")
-    card_id = Column(String, ForeignKey("cards.id"), nullable=False, index=True)
+    # cards.id 또는 구체화 전 참조 카드의 가상 ID(ref:...)라 외래 키 없음
+    card_id = Column(String, nullable=False, index=True)
     user_id = Column(String, ForeignKey("users.id"), nullable=True, index=True)
     device_id = Column(String, index=True, default="anonymous")
     rating = Column(Integer, nullable=False)  # 1=Again, 2=Hard, 3=Good, 4=Easy
@@ -100,12 +130,17 @@ class CardReviewModel(Base):
     due_date = Column(DateTime, nullable=False)
     reviewed_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # 카드별 최신 복습 (card_id = ? ORDER BY reviewed_at DESC LIMIT 1)
+        Index("ix_card_reviews_card_id_reviewed_at", "card_id", "reviewed_at"),
+    )
+
 
 class GradeModel(Base):
     __tablename__ = "grades"
 
     id = Column(String, primary_key=True, default=lambda: f"grade_{uuid.uuid4().hex[:8]}")
-    card_id = Column(String, ForeignKey("cards.id"), nullable=False)
+    card_id = Column(String, nullable=False, index=True)  # 가상 카드 ID 포함 (CardReviewModel 참고)
     user_answer = Column(Text, nullable=False)
     has_drawing = Column(Boolean, default=False)
     score = Column(String, nullable=False)  # correct / partial / incorrect
@@ -113,6 +148,28 @@ class GradeModel(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class DeviceLinkModel(Base):
+    """디바이스 → 유저 데이터 이전 기록 (link-device 재호출 시 no-op 판단용)."""
+    __tablename__ = "device_links"
+
+    device_id = Column(String, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True, index=True)
+    sessions_linked = Column(Integer, default=0)
+    folders_linked = Column(Integer, default=0)
+    reviews_linked = Column(Integer, default=0)
+    linked_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SessionTimelineModel(Base):
+    """생성 파이프라인 단계별 소요 시간 (세션당 1행, spans는 JSON 배열 — app/timeline.py)."""
+    __tablename__ = "session_timelines"
+
+    session_id = Column(String, ForeignKey("sessions.id"), primary_key=True)
+    started_at = Column(DateTime, nullable=False)
+    total_ms = Column(Integer, default=0)
+    spans = Column(Text, default="[]")
+
+
 # ──────────────────────────────────────
 # Pydantic Schemas (Request / Response)
 # ──────────────────────────────────────
@@ -149,6 +206,12 @@ class GradeRequest(BaseModel):
     user_answer: str
 
 
+class GradeBatchItem(BaseModel):
+    card_id: str
+    user_answer: str = ""
+    drawing_index: Optional[int] = None  # drawings[] 업로드 파일 인덱스
+
+
 class GradeResponse(BaseModel):
     id: str
     card_id: str
@@ -255,6 +318,14 @@ class PublicCardsetModel(Base):
 
     cards = relationship("PublicCardModel", back_populates="cardset", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Explore 목록 keyset 페이지 (인기순 / 최신순, 카테고리 유무)
+        Index("ix_public_cardsets_status_download_count_id", "status", "download_count", "id"),
+        Index("ix_public_cardsets_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_public_cardsets_status_category_download_count_id", "status", "category", "download_count", "id"),
+        Index("ix_public_cardsets_status_category_created_at_id", "status", "category", "created_at", "id"),
+    )
+
 
 class PublicCardModel(Base):
     __tablename__ = "public_cards"
@@ -269,6 +340,20 @@ class PublicCardModel(Base):
 
     cardset = relationship("PublicCardsetModel", back_populates="cards")
 
+    __table_args__ = (
+        # 카드셋 카드 순서대로 (상세, 참조 세션 카드 페이지)
+        Index("ix_public_cards_cardset_id_sort_order_id", "cardset_id", "sort_order", "id"),
+    )
+
+
+class PublicCardsetDownloadModel(Base):
+    """다운로드 이벤트 (append-only). 주기적으로 집계해 public_cardsets.download_count에 반영 후 삭제."""
+    __tablename__ = "public_cardset_downloads"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cardset_id = Column(String, ForeignKey("public_cardsets.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 
 # ── Explore Pydantic Schemas ──
 
@@ -0,0 +1,81 @@
+"""목록 keyset(커서) 페이지네이션.
+
+OFFSET 대신 직전 페이지 마지막 행의 (정렬 키, id)를 불투명 커서로 넘기고, 다음 페이지는
+`(정렬 키, id) < 커서` 범위 조건으로 가져옵니다. (필터, 정렬 키, id) 순서의 복합 인덱스가 있으면
+몇 번째 페이지든 인덱스 범위 탐색 한 번이라 라이브러리 크기와 무관합니다.
+- 정렬은 모든 키 같은 방향 (목록은 내림차순 — 최신순 / 인기순), id로 동순위를 끊어 페이지 사이 중복·누락 없음
+- 응답 본문은 배열 그대로, 다음 페이지가 있으면 X-Next-Cursor 헤더에 커서
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, Integer, tuple_
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":")
+    ).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    """커서 → 컬럼 타입에 맞춘 값 목록. 잘못된 커서는 ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise TypeError("length mismatch")
+        decoded = []
+        for column, value in zip(columns, values):
+            if isinstance(column.type, DateTime):
+                decoded.append(datetime.fromisoformat(value))
+            elif isinstance(column.type, Integer):
+                if not isinstance(value, int) or isinstance(value, bool):
+                    raise TypeError(type(value).__name__)
+                decoded.append(value)
+            else:
+                if not isinstance(value, str):
+                    raise TypeError(type(value).__name__)
+                decoded.append(value)
+        return decoded
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {e}")
+
+
+def paginate(
+    query: Query, columns: Sequence, cursor: Optional[str], limit: int, descending: bool = True,
+) -> Tuple[list, Optional[str]]:
+    """columns 순서로 cursor 다음 limit개 → (행 목록, 다음 커서 또는 None).
+
+    columns 마지막은 유일 키(id)여야 합니다. 잘못된 커서는 ValueError.
+    """
+    if cursor:
+        key, after = tuple_(*columns), tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(key < after if descending else key > after)
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor([getattr(last, column.key) for column in columns])
+
+
+def page_or_400(
+    query: Query, columns: Sequence, cursor: Optional[str], limit: int, response: Response,
+) -> list:
+    """paginate + 다음 커서를 응답 헤더에. 잘못된 커서는 400."""
+    try:
+        rows, next_cursor = paginate(query, columns, cursor, limit)
+    except ValueError:
+        raise HTTPException(400, "잘못된 cursor 값입니다.")
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
@@ -5,6 +5,8 @@ from typing import List, Dict, Tuple
 
 import pdfplumber
 
+from . import timeline
+
 logger = logging.getLogger(__name__)
 
 # 수학 기호 감지용 패턴
@@ -82,7 +84,7 @@ def extract_text_from_pdf(file_content: bytes) -> dict:
         {"pages": List[Dict], "method": "pdfplumber", "is_math": bool}
     """
     pages = []
-    with pdfplumber.open(io.BytesIO(file_content)) as pdf:
+    with timeline.span("extraction", bytes=len(file_content)), pdfplumber.open(io.BytesIO(file_content)) as pdf:
         for i, page in enumerate(pdf.pages):
             text = page.extract_text()
             if text and text.strip():
@@ -91,7 +93,8 @@ def extract_text_from_pdf(file_content: bytes) -> dict:
                     "text": text.strip(),
                 })
 
-    is_math = _detect_math_pdf(pages) if pages else False
+    with timeline.span("math_detection"):
+        is_math = _detect_math_pdf(pages) if pages else False
 
     return {"pages": pages, "method": "pdfplumber", "is_math": is_math}
 
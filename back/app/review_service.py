@@ -4,7 +4,9 @@ import logging
 from typing import List, Dict
 
 from .config import settings
+from . import timeline
 from .claude_cli import run_claude
+from .metrics import CLI_PARSE_FAILURES
 
 logger = logging.getLogger(__name__)
 
@@ -118,9 +120,13 @@ async def _run_single_review(
     )
 
     raw = await run_claude(
-        persona["system_prompt"], user_prompt, model=settings.LLM_MODEL
+        persona["system_prompt"], user_prompt, model=settings.LLM_MODEL, step="review"
     )
-    reviews = _parse_review_json(raw)
+    try:
+        reviews = _parse_review_json(raw)
+    except (ValueError, json.JSONDecodeError):
+        CLI_PARSE_FAILURES.inc(step="review")
+        raise
 
     review_map = {}
     for r in reviews:
@@ -154,7 +160,8 @@ async def review_cards(
     tasks = [
         _run_single_review(REVIEW_PERSONAS[0], cards, source_text, template_type)
     ]
-    raw_results = await asyncio.gather(*tasks, return_exceptions=True)
+    with timeline.span("review", cards=card_count_before):
+        raw_results = await asyncio.gather(*tasks, return_exceptions=True)
 
     # 성공한 검수 결과만 수집
     results = []
@@ -1,24 +1,36 @@
 import asyncio
-import csv
-import io
+import json
 import logging
 import re
 import uuid
 from datetime import timedelta
-from typing import Optional
-
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Request
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-
-from .auth import get_device_id, get_owner_filter, get_owner_filter_for_folder, get_owner_id
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+from fastapi import APIRouter, UploadFile, File, Form, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from starlette.background import BackgroundTask
+
+from .auth import AuthContext, get_auth_context, is_operator
+from .bulk_service import (
+    card_rows, copy_public_cards, insert_cards, insert_cards_async, insert_public_cards, public_card_rows,
+)
 from .claude_cli import release_session_semaphore
 from .config import settings
-from .database import get_db, SessionLocal
+from . import (
+    download_counter, explore_cache, export_service, import_service, library_service, pagination, search_service,
+    serialization, timeline,
+)
+from .database import get_db, get_async_db, AsyncSessionLocal
+from .metrics import CARDS_PER_SESSION, SESSIONS_PROCESSING
 from .models import (
     SessionModel, CardModel, GradeModel, FolderModel, CardReviewModel,
-    PublicCardsetModel, PublicCardModel,
-    CardResponse, CardUpdate, SessionResponse, GradeResponse,
+    PublicCardsetModel, PublicCardModel, SessionTimelineModel,
+    CardUpdate, SessionResponse, GradeResponse, GradeBatchItem,
     FolderCreate, FolderUpdate, FolderResponse, SaveToLibraryRequest,
     ManualCardInput, ManualSessionCreate,
     ReviewRequest, ReviewResponse, StudyStatsResponse,
@@ -27,7 +39,7 @@ from .models import (
 from .pdf_service import extract_text_from_pdf, validate_pdf
 from .billing_service import get_billing_status, can_generate
 from .card_service import generate_cards
-from .grade_service import grade_answer
+from .grade_service import grade_answer, grade_answers_batch, prepare_drawing
 from .srs_service import calculate_sm2
 
 logger = logging.getLogger(__name__)
@@ -40,22 +52,19 @@ router = APIRouter(prefix="/api/v1")
 
 @router.post("/generate")
 async def generate(
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     file: UploadFile = File(...),
     template_type: str = Form("definition"),
-    db: Session = Depends(get_db),
-    device_id: str = Depends(get_device_id),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    import time
-    t0 = time.time()
+    trace = timeline.Timeline()
 
     # "subjective" — TODO: MVP 이후 추가
     if template_type not in ("definition", "cloze", "comparison"):
         raise HTTPException(400, "지원하지 않는 템플릿입니다. (definition / cloze / comparison)")
 
     # 월간 생성 한도 체크
-    owner = get_owner_id(request)
-    billing = can_generate(owner["user_id"], device_id, db)
+    billing = await db.run_sync(lambda s: can_generate(auth.user_id, auth.device_id, s))
     if not billing["allowed"]:
         raise HTTPException(429, billing["message"])
 
@@ -63,21 +72,19 @@ async def generate(
     if file.size and file.size > settings.MAX_PDF_SIZE_MB * 1024 * 1024:
         raise HTTPException(400, f"파일 크기가 {settings.MAX_PDF_SIZE_MB}MB를 초과합니다.")
 
-    t1 = time.time()
-    content = await file.read()
-    t2 = time.time()
+    with trace.span("upload_read"):
+        content = await file.read()
 
     # PDF 검증 (첫 페이지만 빠르게)
-    valid, error = validate_pdf(content, settings.MAX_PDF_SIZE_MB)
+    with trace.span("validate_pdf"):
+        valid, error = validate_pdf(content, settings.MAX_PDF_SIZE_MB)
     if not valid:
         raise HTTPException(400, error)
 
-    t3 = time.time()
-
     # 동시 처리 세션 수 제한
-    processing_count = db.query(SessionModel).filter(
-        SessionModel.status == "processing"
-    ).count()
+    processing_count = await db.scalar(
+        select(func.count()).select_from(SessionModel).where(SessionModel.status == "processing")
+    )
     if processing_count >= settings.MAX_CONCURRENT_SESSIONS:
         raise HTTPException(
             429,
@@ -94,27 +101,27 @@ async def generate(
         filename=re.sub(r'<[^>]+>', '', file.filename or "unknown.pdf"),
         page_count=0,
         template_type=template_type,
-        device_id=device_id,
-        user_id=owner["user_id"],
+        device_id=auth.device_id,
+        user_id=auth.user_id,
         status="processing",
+        cards=[],
     )
-    db.add(session)
-    db.commit()
-    db.refresh(session)
-
-    t4 = time.time()
+    with trace.span("session_create"):
+        db.add(session)
+        await db.commit()
 
-    # 백그라운드에서 텍스트 추출 + 카드 생성
+    # 백그라운드에서 텍스트 추출 + 카드 생성 (요청 단계 span은 같은 타임라인에 이어서 기록)
+    trace.session_id = session.id
     asyncio.create_task(
-        _generate_in_background(session.id, content, template_type)
+        _generate_in_background(session.id, content, template_type, trace)
     )
 
     logger.info(
-        "POST /generate 타이밍: file.read=%.2fs, validate=%.2fs, db=%.2fs, total=%.2fs, size=%.1fMB",
-        t2 - t1, t3 - t2, t4 - t3, t4 - t0, len(content) / 1024 / 1024,
+        "POST /generate: session=%s, %dms, size=%.1fMB",
+        session.id, trace.total_ms, len(content) / 1024 / 1024,
     )
 
-    return _build_session_response(session)
+    return serialization.json_response(_build_session_response(session))
 
 
 # ──────────────────────────────────────
@@ -123,30 +130,28 @@ async def generate(
 
 @router.get("/billing/status")
 def billing_status(
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
-    device_id: str = Depends(get_device_id),
 ):
-    owner = get_owner_id(request)
-    return get_billing_status(owner["user_id"], device_id, db)
+    return get_billing_status(auth.user_id, auth.device_id, db)
 
 
 # ──────────────────────────────────────
 # GET /api/v1/sessions — 세션 목록
 # ──────────────────────────────────────
 
-@router.get("/sessions")
-def list_sessions(request: Request, db: Session = Depends(get_db)):
-    owner_filter = get_owner_filter(request)
-    query = db.query(SessionModel).filter(
-        SessionModel.status.in_(["completed", "processing", "failed"])
-    )
-    sessions = (
-        owner_filter(query)
-        .order_by(SessionModel.created_at.desc())
-        .limit(50)
-        .all()
-    )
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+SESSION_PAGE_KEY = (SessionModel.created_at, SessionModel.id)
+
+
+def _page_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _session_summaries(db: Session, sessions: List[SessionModel]) -> list:
+    """세션 목록 항목 (카드 수는 페이지 단위 집계 쿼리로)."""
+    card_counts = library_service.card_counts(db, sessions)
     result = []
     for s in sessions:
         item = {
@@ -155,7 +160,7 @@ def list_sessions(request: Request, db: Session = Depends(get_db)):
             "page_count": s.page_count,
             "template_type": s.template_type,
             "status": s.status,
-            "card_count": len(s.cards),
+            "card_count": card_counts[s.id],
             "folder_id": s.folder_id,
             "display_name": s.display_name,
             "source_type": s.source_type or "pdf",
@@ -170,16 +175,38 @@ def list_sessions(request: Request, db: Session = Depends(get_db)):
     return result
 
 
+@router.get("/sessions")
+def list_sessions(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = PAGE_SIZE,
+    auth: AuthContext = Depends(get_auth_context),
+    db: Session = Depends(get_db),
+):
+    """세션 목록 (최신순). 다음 페이지가 있으면 X-Next-Cursor 헤더에 커서."""
+    owner_filter = auth.session_filter
+    query = db.query(SessionModel).filter(
+        SessionModel.status.in_(["completed", "processing", "failed"])
+    )
+    sessions = pagination.page_or_400(owner_filter(query), SESSION_PAGE_KEY, cursor, _page_limit(limit), response)
+    return _session_summaries(db, sessions)
+
+
 # ──────────────────────────────────────
 # DELETE /api/v1/sessions/{id} — 세션 삭제
 # ──────────────────────────────────────
 
 @router.delete("/sessions/{session_id}")
-def delete_session(session_id: str, request: Request, db: Session = Depends(get_db)):
-    owner_filter = get_owner_filter(request)
+def delete_session(
+    session_id: str,
+    auth: AuthContext = Depends(get_auth_context),
+    db: Session = Depends(get_db),
+):
+    owner_filter = auth.session_filter
     session = owner_filter(db.query(SessionModel).filter(SessionModel.id == session_id)).first()
     if not session:
         raise HTTPException(404, "세션을 찾을 수 없습니다.")
+    library_service.delete_card_history(db, session)
     db.delete(session)
     db.commit()
     return {"deleted": session_id}
@@ -189,13 +216,180 @@ def delete_session(session_id: str, request: Request, db: Session = Depends(get_
 # GET /api/v1/sessions/{id} — 세션 조회
 # ──────────────────────────────────────
 
+SESSION_FIELDS = {
+    "id", "filename", "page_count", "template_type", "status", "folder_id", "display_name", "source_type",
+    "progress", "total_chunks", "completed_chunks", "card_count", "created_at", "error_message", "stats", "cards",
+}
+SESSION_SUMMARY_FIELDS = {
+    "id", "status", "progress", "total_chunks", "completed_chunks", "card_count", "stats", "error_message",
+}
+
+
+def _parse_session_fields(fields: Optional[str]) -> Optional[set]:
+    """fields 파라미터 → 필드 집합 (None이면 전체)."""
+    if fields is None:
+        return None
+    if fields.strip() == "summary":
+        return SESSION_SUMMARY_FIELDS
+    selected = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = selected - SESSION_FIELDS
+    if unknown:
+        raise HTTPException(400, f"알 수 없는 필드입니다: {', '.join(sorted(unknown))}")
+    return selected or SESSION_SUMMARY_FIELDS
+
+
 @router.get("/sessions/{session_id}")
-def get_session(session_id: str, request: Request, db: Session = Depends(get_db)):
-    owner_filter = get_owner_filter(request)
+def get_session(
+    session_id: str,
+    fields: Optional[str] = None,
+    auth: AuthContext = Depends(get_auth_context),
+    db: Session = Depends(get_db),
+):
+    """세션 상세. fields로 응답 필드를 고를 수 있습니다 (쉼표 구분, 또는 summary).
+
+    cards를 요청하지 않으면 카드를 로드하지 않고 상태/진행률/카드 수만 집계 쿼리 한 번으로 —
+    생성 진행률 폴링용. 카드 목록은 GET /sessions/{id}/cards (페이지)를 권장합니다.
+    """
+    selected = _parse_session_fields(fields)
+    if selected is not None and "cards" not in selected:
+        summary = _session_summary(db, auth, session_id)
+        if summary is None:
+            raise HTTPException(404, "세션을 찾을 수 없습니다.")
+        return {k: v for k, v in summary.items() if k in selected}
+
+    owner_filter = auth.session_filter
     session = owner_filter(db.query(SessionModel).filter(SessionModel.id == session_id)).first()
     if not session:
         raise HTTPException(404, "세션을 찾을 수 없습니다.")
-    return _build_session_response(session)
+    resp = _build_session_response(session)
+    return serialization.json_response(resp if selected is None else {k: v for k, v in resp.items() if k in selected})
+
+
+def _session_summary(db: Session, auth: AuthContext, session_id: str) -> Optional[dict]:
+    """카드 없는 세션 응답 — 세션 컬럼과 상태별 카드 수를 한 쿼리로.
+
+    참조 세션은 구체화 전 공개 카드(모두 accepted)를 카드셋 card_count로 더합니다.
+    """
+    counted = CardModel.session_id  # (session_id, status) 인덱스만으로 집계
+    own = aliased(CardModel)  # 바깥 조인의 cards와 구분
+    materialized = (
+        select(func.count())
+        .where(own.session_id == SessionModel.id, own.source_card_id.isnot(None))
+        .correlate(SessionModel)
+        .scalar_subquery()
+    )
+    query = (
+        db.query(
+            SessionModel,
+            func.coalesce(PublicCardsetModel.card_count, 0).label("public_cards"),
+            case((SessionModel.source_cardset_id.isnot(None), materialized), else_=0).label("materialized"),
+            func.count(counted).label("cards"),
+            func.count(counted).filter(CardModel.status == "accepted").label("accepted"),
+            func.count(counted).filter(CardModel.status == "rejected").label("rejected"),
+            func.count(counted).filter(CardModel.status == "pending").label("pending"),
+        )
+        .outerjoin(PublicCardsetModel, PublicCardsetModel.id == SessionModel.source_cardset_id)
+        .outerjoin(CardModel, CardModel.session_id == SessionModel.id)
+        .filter(SessionModel.id == session_id)
+    )
+    row = auth.session_filter(query).group_by(SessionModel.id, PublicCardsetModel.card_count).first()
+    if row is None:
+        return None
+    session = row.SessionModel
+    linked = row.public_cards - row.materialized  # 구체화 전 참조 카드
+    stats = {
+        "total": row.cards + linked,
+        "accepted": row.accepted + linked,
+        "rejected": row.rejected,
+        "pending": row.pending,
+    }
+    resp = _session_fields(session)
+    resp.update(card_count=stats["total"], stats=stats)
+    return resp
+
+
+# ──────────────────────────────────────
+# GET /api/v1/sessions/{id}/cards — 세션 카드 (커서 페이지)
+# ──────────────────────────────────────
+
+CARD_PAGE_SIZE = 100
+MAX_CARD_PAGE_SIZE = 500
+
+
+@router.get("/sessions/{session_id}/cards")
+def list_session_cards(
+    session_id: str,
+    cursor: Optional[str] = None,
+    limit: int = CARD_PAGE_SIZE,
+    status: Optional[str] = None,
+    auth: AuthContext = Depends(get_auth_context),
+    db: Session = Depends(get_db),
+):
+    """세션 카드를 생성 순서대로 페이지 단위로. 다음 페이지가 있으면 X-Next-Cursor 헤더에 커서."""
+    owner_filter = auth.session_filter
+    session = owner_filter(db.query(SessionModel).filter(SessionModel.id == session_id)).first()
+    if not session:
+        raise HTTPException(404, "세션을 찾을 수 없습니다.")
+    if status is not None and status not in ("accepted", "rejected", "pending"):
+        raise HTTPException(400, "status는 accepted, rejected, pending 중 하나여야 합니다.")
+
+    try:
+        cards, next_cursor = library_service.cards_page(
+            db, session, cursor, max(1, min(limit, MAX_CARD_PAGE_SIZE)), status=status,
+        )
+    except ValueError:
+        raise HTTPException(400, "잘못된 cursor 값입니다.")
+    headers = {pagination.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return serialization.json_response([_card_to_response(c) for c in cards], headers=headers)
+
+
+# ──────────────────────────────────────
+# GET /api/v1/sessions/{id}/timeline — 생성 단계별 소요 시간 (운영용)
+# ──────────────────────────────────────
+
+@router.get("/sessions/{session_id}/timeline")
+def get_session_timeline(
+    session_id: str,
+    auth: AuthContext = Depends(get_auth_context),
+    x_ops_token: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """span 목록 + 단계별 합계.
+
+    이 워커가 생성 중이면 메모리의 타임라인 (live=true). 아니면 DB 행 — 다른 워커가 생성 중이면
+    마지막 단계까지의 checkpoint (live=false, status=processing), 아직 기록이 없으면 빈 목록.
+    X-Ops-Token이 OPS_API_TOKEN과 일치하면 소유자가 아니어도 조회할 수 있습니다.
+    """
+    query = db.query(SessionModel.id, SessionModel.status, SessionModel.created_at).filter(
+        SessionModel.id == session_id
+    )
+    if not is_operator(x_ops_token):
+        query = auth.session_filter(query)
+    session = query.first()
+    if not session:
+        raise HTTPException(404, "세션을 찾을 수 없습니다.")
+
+    live = timeline.get_active(session_id)
+    if live:
+        spans, started_at, total_ms = list(live.spans), live.started_at, live.total_ms
+    else:
+        row = db.get(SessionTimelineModel, session_id)
+        if row:
+            spans, started_at, total_ms = json.loads(row.spans or "[]"), row.started_at, row.total_ms
+        elif session.status == "processing":
+            spans, started_at, total_ms = [], session.created_at, 0  # 첫 checkpoint 전
+        else:
+            raise HTTPException(404, "타임라인 기록이 없습니다.")
+
+    return {
+        "session_id": session_id,
+        "status": session.status,
+        "live": live is not None,
+        "started_at": started_at.isoformat(),
+        "total_ms": total_ms,
+        "stages": timeline.summarize(spans),
+        "spans": spans,
+    }
 
 
 # ──────────────────────────────────────
@@ -204,10 +398,15 @@ def get_session(session_id: str, request: Request, db: Session = Depends(get_db)
 
 @router.patch("/cards/{card_id}")
 def update_card(card_id: str, update: CardUpdate, db: Session = Depends(get_db)):
-    card = db.query(CardModel).filter(CardModel.id == card_id).first()
+    card = library_service.resolve_card(db, card_id)
     if not card:
         raise HTTPException(404, "카드를 찾을 수 없습니다.")
 
+    changes_status = update.status in ("accepted", "rejected", "pending") and update.status != card.status
+    if not changes_status and update.front is None and update.back is None:
+        return _card_to_response(card)  # 변경 없음 — 참조 카드는 구체화하지 않음
+    card = library_service.materialize(db, card)
+
     if update.status and update.status in ("accepted", "rejected", "pending"):
         card.status = update.status
     if update.front is not None:
@@ -246,9 +445,9 @@ async def grade_card(
     card_id: str,
     user_answer: str = Form(""),
     drawing: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    card = db.query(CardModel).filter(CardModel.id == card_id).first()
+    card = await db.run_sync(library_service.resolve_card, card_id)
     if not card:
         raise HTTPException(404, "카드를 찾을 수 없습니다.")
 
@@ -262,6 +461,12 @@ async def grade_card(
     if not user_answer.strip() and not drawing_image:
         raise HTTPException(400, "답안을 입력해주세요. (텍스트 또는 손글씨)")
 
+    if drawing_image:
+        try:
+            drawing_image = await prepare_drawing(drawing_image)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+
     try:
         result = await grade_answer(
             question=card.front,
@@ -278,8 +483,7 @@ async def grade_card(
             feedback=result["feedback"],
         )
         db.add(grade)
-        db.commit()
-        db.refresh(grade)
+        await db.commit()
 
         return GradeResponse(
             id=grade.id,
@@ -296,51 +500,224 @@ async def grade_card(
 
 
 # ──────────────────────────────────────
-# GET /api/v1/sessions/{id}/download — CSV 다운로드
+# POST /api/v1/grade/batch — 퀴즈 전체 일괄 AI 채점 (NDJSON 스트리밍)
+# ──────────────────────────────────────
+
+MAX_BATCH_GRADE_ITEMS = 100
+
+
+@router.post("/grade/batch")
+async def grade_batch(
+    items: str = Form(...),
+    drawings: List[UploadFile] = File([]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """items: [{"card_id", "user_answer", "drawing_index"}] JSON 문자열.
+
+    drawing_index는 drawings 업로드 파일 목록의 인덱스입니다 (범위를 벗어나면 그 문항만 error).
+    결과는 한 줄에 한 문항씩 JSON(NDJSON)으로 스트리밍됩니다. CLI 출력은 호출이 끝나야 해석되므로
+    CLI 호출(배치) 하나가 끝날 때마다 그 배치 문항들의 결과가 함께 나갑니다.
+    """
+    try:
+        batch_items = TypeAdapter(List[GradeBatchItem]).validate_json(items)
+    except ValidationError:
+        raise HTTPException(400, "items 형식이 올바르지 않습니다.")
+    if not batch_items:
+        raise HTTPException(400, "채점할 답안이 없습니다.")
+    if len(batch_items) > MAX_BATCH_GRADE_ITEMS:
+        raise HTTPException(400, f"한 번에 최대 {MAX_BATCH_GRADE_ITEMS}문항까지 채점할 수 있습니다.")
+
+    drawing_images = [await d.read() for d in drawings]
+
+    card_ids = {item.card_id for item in batch_items}
+    cards = await db.run_sync(library_service.resolve_cards, card_ids)
+
+    # 문항별 검증 — 잘못된 문항은 채점 없이 즉시 error 결과로 반환
+    to_grade = []
+    rejected = []
+    for idx, item in enumerate(batch_items):
+        card = cards.get(item.card_id)
+        drawing_image = None
+        drawing_missing = item.drawing_index is not None and not 0 <= item.drawing_index < len(drawing_images)
+        if item.drawing_index is not None and not drawing_missing:
+            drawing_image = drawing_images[item.drawing_index] or None
+        if not card:
+            rejected.append({"index": idx, "card_id": item.card_id, "error": "카드를 찾을 수 없습니다."})
+        elif drawing_missing:
+            rejected.append({
+                "index": idx,
+                "card_id": item.card_id,
+                "error": f"drawing_index가 범위를 벗어났습니다. (손글씨 파일 {len(drawing_images)}개)",
+            })
+        elif not item.user_answer.strip() and not drawing_image:
+            rejected.append({"index": idx, "card_id": item.card_id, "error": "답안을 입력해주세요. (텍스트 또는 손글씨)"})
+        else:
+            to_grade.append({
+                "index": idx,
+                "card_id": card.id,
+                "question": card.front,
+                "model_answer": card.back,
+                "user_answer": item.user_answer,
+                "drawing_image": drawing_image,
+            })
+
+    items_by_index = {item["index"]: item for item in to_grade}
+
+    async def _stream():
+        for r in rejected:
+            yield json.dumps(r, ensure_ascii=False) + "\n"
+        if not to_grade:
+            return
+
+        # 스트리밍은 요청 스코프 밖에서 진행되므로 별도 DB 세션 사용
+        async with AsyncSessionLocal() as stream_db:
+            async for result in grade_answers_batch(to_grade):
+                item = items_by_index[result["index"]]
+                if "error" in result:
+                    line = {
+                        "index": result["index"],
+                        "card_id": item["card_id"],
+                        "error": _safe_error("채점에 실패했습니다", RuntimeError(result["error"])),
+                    }
+                else:
+                    grade = GradeModel(
+                        card_id=item["card_id"],
+                        user_answer=item["user_answer"],
+                        has_drawing=item["drawing_image"] is not None,
+                        score=result["score"],
+                        feedback=result["feedback"],
+                    )
+                    try:
+                        stream_db.add(grade)
+                        await stream_db.commit()
+                    except Exception as e:
+                        await stream_db.rollback()
+                        logger.exception("배치 채점 결과 저장 실패: card=%s", item["card_id"])
+                        yield json.dumps({
+                            "index": result["index"],
+                            "card_id": item["card_id"],
+                            "error": _safe_error("채점 결과 저장에 실패했습니다", e),
+                        }, ensure_ascii=False) + "\n"
+                        continue
+                    line = {
+                        "index": result["index"],
+                        **GradeResponse(
+                            id=grade.id,
+                            card_id=item["card_id"],
+                            user_answer=item["user_answer"],
+                            score=result["score"],
+                            feedback=result["feedback"],
+                            model_answer=item["model_answer"],
+                        ).model_dump(),
+                    }
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+
+# ──────────────────────────────────────
+# GET /api/v1/sessions/{id}/download — Anki 내보내기 (TSV / .apkg)
 # ──────────────────────────────────────
 
+EXPORT_FORMATS = ("tsv", "apkg")
+
+
+def _session_label(session: SessionModel) -> str:
+    return session.display_name or session.filename.replace(".pdf", "")
+
+
+def _export_response(
+    db: Session, sessions: List[SessionModel], targets: List[export_service.ExportTarget],
+    scope: str, basename: str, format: str,
+) -> Response:
+    """카드 내보내기 응답. TSV는 스트리밍, .apkg는 임시 파일을 만든 뒤 파일 응답."""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(400, "지원하지 않는 내보내기 형식입니다. (tsv, apkg)")
+    if not export_service.has_cards(db, sessions):
+        raise HTTPException(404, "다운로드할 카드가 없습니다.")
+
+    # RFC 5987: 한국어 파일명을 UTF-8로 인코딩
+    filename = f"{basename}.{'apkg' if format == 'apkg' else 'txt'}"
+    headers = {"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"}
+
+    if format == "apkg":
+        path = export_service.build_apkg(db, targets, scope)
+        return FileResponse(
+            path, media_type="application/octet-stream", headers=headers,
+            background=BackgroundTask(export_service.cleanup, path),
+        )
+    return StreamingResponse(
+        export_service.stream_tsv(targets, scope),
+        media_type="text/tab-separated-values",
+        headers=headers,
+    )
+
+
 @router.get("/sessions/{session_id}/download")
-def download_csv(session_id: str, request: Request, db: Session = Depends(get_db)):
-    owner_filter = get_owner_filter(request)
+def download_csv(
+    session_id: str,
+    format: str = "tsv",
+    auth: AuthContext = Depends(get_auth_context),
+    db: Session = Depends(get_db),
+):
+    """세션 카드(채택 + pending) 내보내기. format: tsv (Anki 텍스트 임포트) | apkg (Anki 패키지)."""
+    owner_filter = auth.session_filter
     session = owner_filter(db.query(SessionModel).filter(SessionModel.id == session_id)).first()
     if not session:
         raise HTTPException(404, "세션을 찾을 수 없습니다.")
 
-    # 채택 카드 우선, 없으면 pending 포함
-    cards = db.query(CardModel).filter(
-        CardModel.session_id == session_id,
-        CardModel.status.in_(["accepted", "pending"]),
-    ).all()
-
-    if not cards:
-        raise HTTPException(404, "다운로드할 카드가 없습니다.")
+    safe_name = session.filename.replace(".pdf", "").replace(" ", "_")
+    targets = [export_service.ExportTarget(session.id, export_service.deck_name(_session_label(session)))]
+    return _export_response(
+        db, [session], targets, "session", f"decard_{safe_name}_{session.template_type}", format,
+    )
 
-    # Anki 임포트 포맷 (TSV: 앞면 \t 뒷면 \t 태그)
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter="\t")
 
-    for card in cards:
-        back_with_evidence = (
-            f"{card.back}\n\n"
-            f"📖 근거 (p.{card.evidence_page}): {card.evidence}"
-        )
-        writer.writerow([card.front, back_with_evidence, card.tags])
+@router.get("/folders/{folder_id}/download")
+def download_folder(
+    folder_id: str,
+    format: str = "tsv",
+    auth: AuthContext = Depends(get_auth_context),
+    db: Session = Depends(get_db),
+):
+    """폴더의 모든 세션을 한 파일로 (세션마다 Anki 덱 '폴더::세션')."""
+    folder_filter = auth.folder_filter
+    folder = folder_filter(db.query(FolderModel).filter(FolderModel.id == folder_id)).first()
+    if not folder:
+        raise HTTPException(404, "폴더를 찾을 수 없습니다.")
 
-    output.seek(0)
-    safe_name = session.filename.replace(".pdf", "").replace(" ", "_")
-    filename = f"decard_{safe_name}_{session.template_type}.txt"
+    sessions = (
+        db.query(SessionModel)
+        .filter(SessionModel.folder_id == folder_id)
+        .order_by(*SESSION_PAGE_KEY)
+        .all()
+    )
+    targets = [
+        export_service.ExportTarget(s.id, export_service.deck_name(folder.name, _session_label(s)))
+        for s in sessions
+    ]
+    return _export_response(db, sessions, targets, "folder", f"decard_{folder.name.replace(' ', '_')}", format)
 
-    # RFC 5987: 한국어 파일명을 UTF-8로 인코딩
-    from urllib.parse import quote
-    encoded_filename = quote(filename)
 
-    return StreamingResponse(
-        io.BytesIO(output.getvalue().encode("utf-8-sig")),
-        media_type="text/tab-separated-values",
-        headers={
-            "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
-        },
+@router.get("/library/download")
+def download_library(
+    format: str = "tsv",
+    auth: AuthContext = Depends(get_auth_context),
+    db: Session = Depends(get_db),
+):
+    """라이브러리(폴더에 저장된 세션) 전체를 한 파일로 (폴더·세션별 Anki 덱)."""
+    query = (
+        db.query(SessionModel, FolderModel.name)
+        .join(FolderModel, SessionModel.folder_id == FolderModel.id)
+        .order_by(FolderModel.created_at, FolderModel.id, *SESSION_PAGE_KEY)
     )
+    rows = auth.session_filter(query).all()
+    sessions = [s for s, _ in rows]
+    targets = [
+        export_service.ExportTarget(s.id, export_service.deck_name(folder_name, _session_label(s)))
+        for s, folder_name in rows
+    ]
+    return _export_response(db, sessions, targets, "library", "decard_library", format)
 
 
 # ──────────────────────────────────────
@@ -350,69 +727,64 @@ def download_csv(session_id: str, request: Request, db: Session = Depends(get_db
 PRESET_COLORS = {"#C2E7DA", "#6290C3", "#9B72CF", "#F59E0B", "#EF4444", "#94A3B8"}
 
 
+def _folder_response(f: FolderModel, session_count: int, card_count: int) -> dict:
+    return {
+        "id": f.id,
+        "name": f.name,
+        "color": f.color,
+        "exam_date": f.exam_date,
+        "session_count": session_count,
+        "card_count": card_count,
+        "created_at": f.created_at.isoformat() + "Z",
+        "updated_at": f.updated_at.isoformat() + "Z",
+    }
+
+
 @router.get("/folders")
-def list_folders(request: Request, db: Session = Depends(get_db)):
-    folder_filter = get_owner_filter_for_folder(request)
-    folders = (
-        folder_filter(db.query(FolderModel))
-        .order_by(FolderModel.created_at.desc())
-        .all()
+def list_folders(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = PAGE_SIZE,
+    auth: AuthContext = Depends(get_auth_context),
+    db: Session = Depends(get_db),
+):
+    """폴더 목록 (최신순). 다음 페이지가 있으면 X-Next-Cursor 헤더에 커서. 세션/카드 수는 목록 단위 집계."""
+    folder_filter = auth.folder_filter
+    folders = pagination.page_or_400(
+        folder_filter(db.query(FolderModel)), (FolderModel.created_at, FolderModel.id),
+        cursor, _page_limit(limit), response,
     )
-    result = []
-    for f in folders:
-        session_count = len(f.sessions)
-        card_count = sum(len(s.cards) for s in f.sessions)
-        result.append({
-            "id": f.id,
-            "name": f.name,
-            "color": f.color,
-            "exam_date": f.exam_date,
-            "session_count": session_count,
-            "card_count": card_count,
-            "created_at": f.created_at.isoformat() + "Z",
-            "updated_at": f.updated_at.isoformat() + "Z",
-        })
-    return result
+    counts = library_service.folder_counts(db, [f.id for f in folders])
+    return [_folder_response(f, *counts[f.id]) for f in folders]
 
 
 @router.post("/folders")
 def create_folder(
     body: FolderCreate,
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
-    device_id: str = Depends(get_device_id),
 ):
-    owner = get_owner_id(request)
     color = body.color if body.color and body.color in PRESET_COLORS else "#C2E7DA"
     folder = FolderModel(
         name=body.name,
         color=color,
-        user_id=owner["user_id"],
-        device_id=device_id,
+        user_id=auth.user_id,
+        device_id=auth.device_id,
     )
     db.add(folder)
     db.commit()
     db.refresh(folder)
-    return {
-        "id": folder.id,
-        "name": folder.name,
-        "color": folder.color,
-        "exam_date": folder.exam_date,
-        "session_count": 0,
-        "card_count": 0,
-        "created_at": folder.created_at.isoformat() + "Z",
-        "updated_at": folder.updated_at.isoformat() + "Z",
-    }
+    return _folder_response(folder, 0, 0)
 
 
 @router.patch("/folders/{folder_id}")
 def update_folder(
     folder_id: str,
     body: FolderUpdate,
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
 ):
-    folder_filter = get_owner_filter_for_folder(request)
+    folder_filter = auth.folder_filter
     folder = folder_filter(db.query(FolderModel).filter(FolderModel.id == folder_id)).first()
     if not folder:
         raise HTTPException(404, "폴더를 찾을 수 없습니다.")
@@ -429,27 +801,16 @@ def update_folder(
     db.commit()
     db.refresh(folder)
 
-    session_count = len(folder.sessions)
-    card_count = sum(len(s.cards) for s in folder.sessions)
-    return {
-        "id": folder.id,
-        "name": folder.name,
-        "color": folder.color,
-        "exam_date": folder.exam_date,
-        "session_count": session_count,
-        "card_count": card_count,
-        "created_at": folder.created_at.isoformat() + "Z",
-        "updated_at": folder.updated_at.isoformat() + "Z",
-    }
+    return _folder_response(folder, *library_service.folder_counts(db, [folder.id])[folder.id])
 
 
 @router.delete("/folders/{folder_id}")
 def delete_folder(
     folder_id: str,
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
 ):
-    folder_filter = get_owner_filter_for_folder(request)
+    folder_filter = auth.folder_filter
     folder = folder_filter(db.query(FolderModel).filter(FolderModel.id == folder_id)).first()
     if not folder:
         raise HTTPException(404, "폴더를 찾을 수 없습니다.")
@@ -465,41 +826,21 @@ def delete_folder(
 @router.get("/folders/{folder_id}/sessions")
 def list_folder_sessions(
     folder_id: str,
-    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = PAGE_SIZE,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
 ):
-    folder_filter = get_owner_filter_for_folder(request)
+    """폴더의 세션 목록 (최신순). 다음 페이지가 있으면 X-Next-Cursor 헤더에 커서."""
+    folder_filter = auth.folder_filter
     folder = folder_filter(db.query(FolderModel).filter(FolderModel.id == folder_id)).first()
     if not folder:
         raise HTTPException(404, "폴더를 찾을 수 없습니다.")
 
-    sessions = (
-        db.query(SessionModel)
-        .filter(SessionModel.folder_id == folder_id)
-        .order_by(SessionModel.created_at.desc())
-        .all()
-    )
-    result = []
-    for s in sessions:
-        item = {
-            "id": s.id,
-            "filename": s.filename,
-            "page_count": s.page_count,
-            "template_type": s.template_type,
-            "status": s.status,
-            "card_count": len(s.cards),
-            "folder_id": s.folder_id,
-            "display_name": s.display_name,
-            "source_type": s.source_type or "pdf",
-            "progress": s.progress or 0,
-            "total_chunks": s.total_chunks or 0,
-            "completed_chunks": s.completed_chunks or 0,
-            "created_at": s.created_at.isoformat() + "Z",
-        }
-        if s.error_message:
-            item["error_message"] = s.error_message
-        result.append(item)
-    return result
+    query = db.query(SessionModel).filter(SessionModel.folder_id == folder_id)
+    sessions = pagination.page_or_400(query, SESSION_PAGE_KEY, cursor, _page_limit(limit), response)
+    return _session_summaries(db, sessions)
 
 
 # ──────────────────────────────────────
@@ -510,29 +851,27 @@ def list_folder_sessions(
 def save_to_library(
     session_id: str,
     body: SaveToLibraryRequest,
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
-    device_id: str = Depends(get_device_id),
 ):
-    owner_filter = get_owner_filter(request)
+    owner_filter = auth.session_filter
     session = owner_filter(db.query(SessionModel).filter(SessionModel.id == session_id)).first()
     if not session:
         raise HTTPException(404, "세션을 찾을 수 없습니다.")
 
     # 폴더 결정: 기존 폴더 or 새 폴더 생성
     if body.folder_id:
-        folder_filter = get_owner_filter_for_folder(request)
+        folder_filter = auth.folder_filter
         folder = folder_filter(db.query(FolderModel).filter(FolderModel.id == body.folder_id)).first()
         if not folder:
             raise HTTPException(404, "폴더를 찾을 수 없습니다.")
     elif body.new_folder_name:
-        owner = get_owner_id(request)
         color = body.new_folder_color if body.new_folder_color and body.new_folder_color in PRESET_COLORS else "#C2E7DA"
         folder = FolderModel(
             name=body.new_folder_name,
             color=color,
-            user_id=owner["user_id"],
-            device_id=device_id,
+            user_id=auth.user_id,
+            device_id=auth.device_id,
         )
         db.add(folder)
         db.flush()
@@ -555,10 +894,10 @@ def save_to_library(
 @router.delete("/sessions/{session_id}/remove-from-library")
 def remove_from_library(
     session_id: str,
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
 ):
-    owner_filter = get_owner_filter(request)
+    owner_filter = auth.session_filter
     session = owner_filter(db.query(SessionModel).filter(SessionModel.id == session_id)).first()
     if not session:
         raise HTTPException(404, "세션을 찾을 수 없습니다.")
@@ -576,10 +915,10 @@ def remove_from_library(
 @router.post("/sessions/{session_id}/share")
 def create_share_link(
     session_id: str,
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
 ):
-    owner_filter = get_owner_filter(request)
+    owner_filter = auth.session_filter
     session = owner_filter(db.query(SessionModel).filter(SessionModel.id == session_id)).first()
     if not session:
         raise HTTPException(404, "세션을 찾을 수 없습니다.")
@@ -619,7 +958,7 @@ def get_shared_session(share_key: str, db: Session = Depends(get_db)):
             "tags": c.tags,
             "template_type": c.template_type,
         }
-        for c in session.cards if c.status == "accepted"
+        for c in library_service.session_cards(session, db) if c.status == "accepted"
     ]
     return {
         "title": session.display_name or session.filename.replace(".pdf", ""),
@@ -638,9 +977,8 @@ def get_shared_session(share_key: str, db: Session = Depends(get_db)):
 @router.post("/sessions/create-manual")
 def create_manual_session(
     body: ManualSessionCreate,
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
-    device_id: str = Depends(get_device_id),
 ):
     if not body.cards or len(body.cards) < 1:
         raise HTTPException(400, "카드를 최소 1장 이상 입력해주세요.")
@@ -655,34 +993,24 @@ def create_manual_session(
     # 세션 template_type: 첫 번째 카드 유형 사용 (혼합 가능)
     session_template = body.cards[0].template_type if body.cards else "definition"
 
-    owner = get_owner_id(request)
     session = SessionModel(
         filename=body.display_name or "직접 입력",
         page_count=0,
         template_type=session_template,
-        device_id=device_id,
-        user_id=owner["user_id"],
+        device_id=auth.device_id,
+        user_id=auth.user_id,
         source_type="manual",
         status="completed",
     )
     db.add(session)
     db.flush()
 
-    for card_input in body.cards:
-        card = CardModel(
-            session_id=session.id,
-            front=card_input.front,
-            back=card_input.back,
-            evidence=card_input.evidence or "",
-            evidence_page=0,
-            template_type=card_input.template_type,
-            status="accepted",
-        )
-        db.add(card)
-
+    rows = card_rows(session.id, (card_input.model_dump() for card_input in body.cards))
+    insert_cards(db, rows)
     db.commit()
-    db.refresh(session)
-    return _build_session_response(session)
+    return serialization.json_response(
+        _build_session_response(session, cards=[_card_row_to_response(r) for r in rows])
+    )
 
 
 # ──────────────────────────────────────
@@ -691,125 +1019,49 @@ def create_manual_session(
 
 @router.post("/sessions/import-file")
 async def import_file(
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     file: UploadFile = File(...),
     display_name: str = Form(None),
-    db: Session = Depends(get_db),
-    device_id: str = Depends(get_device_id),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    # 파일 크기 제한 (5MB)
-    max_size = 5 * 1024 * 1024
-    if file.size and file.size > max_size:
-        raise HTTPException(400, "파일 크기가 5MB를 초과합니다.")
+    """CSV/XLSX 파일의 카드로 세션 생성. 파일을 행 단위로 읽어 배치 저장 (app/import_service.py).
+
+    파싱/저장 루프는 run_sync로 돌려 DB 대기 동안 이벤트 루프를 막지 않습니다.
 
-    content = await file.read()
-    if len(content) > max_size:
-        raise HTTPException(400, "파일 크기가 5MB를 초과합니다.")
+    카드가 IMPORT_INLINE_CARDS장보다 많으면 응답 cards에는 앞부분만 담고, 나머지는
+    X-Next-Cursor 헤더의 커서로 GET /sessions/{id}/cards에서 이어서 받습니다.
+    """
+    max_mb = settings.IMPORT_MAX_FILE_MB
+    if file.size and file.size > max_mb * 1024 * 1024:
+        raise HTTPException(400, f"파일 크기가 {max_mb}MB를 초과합니다.")
 
     filename = file.filename or ""
     ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
-
-    if ext == "csv":
-        parsed = _parse_csv(content)
-        source_type = "csv"
-    elif ext == "xlsx":
-        parsed = _parse_xlsx(content)
-        source_type = "xlsx"
-    else:
+    if ext not in import_service.SUPPORTED_FORMATS:
         raise HTTPException(400, "지원하지 않는 파일 형식입니다. (csv, xlsx)")
 
-    if not parsed:
-        raise HTTPException(400, "파일에서 카드를 추출할 수 없습니다.")
-    if len(parsed) > 500:
-        raise HTTPException(400, "카드는 최대 500장까지 가져올 수 있습니다.")
-
-    owner = get_owner_id(request)
     session = SessionModel(
         filename=display_name or filename or "파일 임포트",
         page_count=0,
         template_type="definition",
-        device_id=device_id,
-        user_id=owner["user_id"],
-        source_type=source_type,
-        status="completed",
+        device_id=auth.device_id,
+        user_id=auth.user_id,
+        source_type=ext,
     )
-    db.add(session)
-    db.flush()
-
-    for row in parsed:
-        card = CardModel(
-            session_id=session.id,
-            front=row["front"],
-            back=row["back"],
-            evidence=row.get("evidence", ""),
-            evidence_page=0,
-            template_type="definition",
-            status="accepted",
+    try:
+        inline, total = await db.run_sync(
+            lambda s: import_service.import_file(s, session, file.file, ext, file.size)
         )
-        db.add(card)
-
-    db.commit()
-    db.refresh(session)
-    return _build_session_response(session)
-
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
-_HEADER_FRONT = {"front", "앞면", "질문", "question"}
-_HEADER_BACK = {"back", "뒷면", "답", "답변", "answer"}
-
-
-def _parse_csv(content: bytes) -> list[dict]:
-    """CSV 파싱 — BOM 처리, 헤더 자동 감지."""
-    text = content.decode("utf-8-sig")
-    reader = csv.reader(io.StringIO(text))
-    rows = list(reader)
-    if not rows:
-        return []
-
-    # 헤더 감지
-    first_row = [cell.strip().lower() for cell in rows[0]]
-    has_header = bool(set(first_row) & _HEADER_FRONT) or bool(set(first_row) & _HEADER_BACK)
-
-    data_rows = rows[1:] if has_header else rows
-    result = []
-    for row in data_rows:
-        if len(row) < 2:
-            continue
-        front = row[0].strip()
-        back = row[1].strip()
-        if not front or not back:
-            continue
-        evidence = row[2].strip() if len(row) > 2 else ""
-        result.append({"front": front, "back": back, "evidence": evidence})
-    return result
-
-
-def _parse_xlsx(content: bytes) -> list[dict]:
-    """XLSX 파싱 — openpyxl 사용, 헤더 자동 감지."""
-    from openpyxl import load_workbook
-
-    wb = load_workbook(io.BytesIO(content), read_only=True)
-    ws = wb.active
-    rows = list(ws.iter_rows(values_only=True))
-    wb.close()
-    if not rows:
-        return []
-
-    # 헤더 감지
-    first_row = [str(cell or "").strip().lower() for cell in rows[0]]
-    has_header = bool(set(first_row) & _HEADER_FRONT) or bool(set(first_row) & _HEADER_BACK)
-
-    data_rows = rows[1:] if has_header else rows
-    result = []
-    for row in data_rows:
-        if len(row) < 2:
-            continue
-        front = str(row[0] or "").strip()
-        back = str(row[1] or "").strip()
-        if not front or not back:
-            continue
-        evidence = str(row[2] or "").strip() if len(row) > 2 and row[2] else ""
-        result.append({"front": front, "back": back, "evidence": evidence})
-    return result
+    resp = _build_session_response(session, cards=[_card_row_to_response(r) for r in inline])
+    resp.update(card_count=total, stats={"total": total, "accepted": total, "rejected": 0, "pending": 0})
+    headers = {}
+    if total > len(inline):
+        last = inline[-1]
+        headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor([last["created_at"], last["id"]])
+    return serialization.json_response(resp, headers=headers)
 
 
 # ──────────────────────────────────────
@@ -820,40 +1072,53 @@ async def _generate_in_background(
     session_id: str,
     pdf_content: bytes,
     template_type: str,
+    trace: Optional[timeline.Timeline] = None,
 ) -> None:
-    """Request 스코프 밖에서 별도 DB 세션으로 텍스트 추출 + 카드 생성."""
-    db = SessionLocal()
+    """Request 스코프 밖에서 별도 async DB 세션으로 텍스트 추출 + 카드 생성."""
+    db = AsyncSessionLocal()
+    SESSIONS_PROCESSING.inc()
+    trace = trace or timeline.Timeline()
+    trace.session_id = session_id
+    timeline.activate(trace)
 
     async def _update_progress(completed_chunks: int, total_chunks: int, phase: str):
         """청크 완료 시마다 DB에 진행률 업데이트."""
+        if phase == "extracting":
+            progress = 5
+        elif phase == "chunked":
+            progress = 15
+        elif phase == "generating":
+            # 15~85% 구간: 청크 진행에 비례
+            progress = 15 + int(completed_chunks / max(total_chunks, 1) * 70)
+        elif phase == "reviewing":
+            progress = 85
+        elif phase == "done":
+            progress = 100
+        else:
+            progress = None
+        values = {"completed_chunks": completed_chunks, "total_chunks": total_chunks}
+        if progress is not None:
+            values["progress"] = progress
         try:
-            session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
-            if not session:
+            result = await db.execute(
+                update(SessionModel).where(SessionModel.id == session_id).values(**values)
+            )
+            await db.commit()
+            if result.rowcount == 0:
                 logger.warning("진행률 업데이트: 세션 없음 session=%s (이미 삭제?)", session_id)
                 return
-            session.completed_chunks = completed_chunks
-            session.total_chunks = total_chunks
-            if phase == "extracting":
-                session.progress = 5
-            elif phase == "chunked":
-                session.progress = 15
-            elif phase == "generating":
-                # 15~85% 구간: 청크 진행에 비례
-                session.progress = 15 + int(completed_chunks / max(total_chunks, 1) * 70)
-            elif phase == "reviewing":
-                session.progress = 85
-            elif phase == "done":
-                session.progress = 100
-            db.commit()
-            logger.info("진행률 업데이트: session=%s, phase=%s, %d/%d, progress=%d%%",
-                        session_id, phase, completed_chunks, total_chunks, session.progress)
+            logger.info("진행률 업데이트: session=%s, phase=%s, %d/%d, progress=%s%%",
+                        session_id, phase, completed_chunks, total_chunks, progress)
         except Exception as e:
+            await db.rollback()
             logger.error("진행률 업데이트 실패: session=%s, error=%s: %s", session_id, type(e).__name__, e)
+            return
+        await timeline.checkpoint(db, trace)
 
     try:
-        # 텍스트 추출 (백그라운드에서 실행)
+        # 텍스트 추출 (CPU 작업 — 워커 스레드에서 실행)
         await _update_progress(0, 0, "extracting")
-        extraction = extract_text_from_pdf(pdf_content)
+        extraction = await asyncio.to_thread(extract_text_from_pdf, pdf_content)
         pages = extraction["pages"]
         extraction_method = extraction["method"]
         logger.info("텍스트 추출 완료: method=%s, is_math=%s, pages=%d",
@@ -863,13 +1128,13 @@ async def _generate_in_background(
         if len(pages) > settings.MAX_PAGES:
             raise ValueError(f"페이지 수 초과: {len(pages)}/{settings.MAX_PAGES}")
 
-        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+        session = await db.get(SessionModel, session_id)
         if not session:
             logger.error("백그라운드 생성: 세션 없음 session=%s", session_id)
             return
 
         session.page_count = len(pages)
-        db.commit()
+        await db.commit()
         await _update_progress(0, 0, "chunked")
 
         cards_data = await generate_cards(
@@ -879,45 +1144,53 @@ async def _generate_in_background(
             is_math=extraction.get("is_math", False),
         )
 
-        for card_data in cards_data:
-            status = card_data.pop("status", "pending")
-            card_data.pop("recommend", None)
-            db.add(CardModel(session_id=session.id, status=status, **card_data))
-
-        session.status = "completed"
-        session.progress = 100
-        db.commit()
+        with timeline.span("db_persist", cards=len(cards_data)):
+            await insert_cards_async(db, card_rows(session_id, cards_data, status="pending"))
+            await db.execute(
+                update(SessionModel)
+                .where(SessionModel.id == session_id)
+                .values(status="completed", progress=100)
+            )
+            await db.commit()
+        CARDS_PER_SESSION.observe(len(cards_data))
         logger.info("백그라운드 생성 완료: session=%s, cards=%d", session_id, len(cards_data))
     except Exception as e:
         logger.exception("백그라운드 카드 생성 실패: session=%s, error=%s: %s", session_id, type(e).__name__, e)
         try:
-            session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
-            if session:
-                session.status = "failed"
-                # 사용자에게 보여줄 에러 메시지 — 기술적 세부사항은 줄이고 사유 위주
-                err_str = str(e)
-                if "타임아웃" in err_str or "timeout" in err_str.lower():
-                    session.error_message = "AI 처리 시간이 초과되었습니다. 더 짧은 PDF로 시도해주세요."
-                elif "빈 응답" in err_str:
-                    session.error_message = "AI가 응답하지 않았습니다. 잠시 후 다시 시도해주세요."
-                elif "텍스트를 추출" in err_str:
-                    session.error_message = "PDF에서 텍스트를 읽을 수 없습니다. 스캔된 PDF는 지원하지 않습니다."
-                elif "페이지 수 초과" in err_str:
-                    session.error_message = err_str
-                else:
-                    session.error_message = f"카드 생성 중 오류가 발생했습니다: {err_str[:200]}"
-                db.commit()
-                logger.info("세션 실패 저장 완료: session=%s, error_message=%s", session_id, session.error_message)
+            await db.rollback()
+            # 사용자에게 보여줄 에러 메시지 — 기술적 세부사항은 줄이고 사유 위주
+            err_str = str(e)
+            if "타임아웃" in err_str or "timeout" in err_str.lower():
+                error_message = "AI 처리 시간이 초과되었습니다. 더 짧은 PDF로 시도해주세요."
+            elif "빈 응답" in err_str:
+                error_message = "AI가 응답하지 않았습니다. 잠시 후 다시 시도해주세요."
+            elif "텍스트를 추출" in err_str:
+                error_message = "PDF에서 텍스트를 읽을 수 없습니다. 스캔된 PDF는 지원하지 않습니다."
+            elif "페이지 수 초과" in err_str:
+                error_message = err_str
+            else:
+                error_message = f"카드 생성 중 오류가 발생했습니다: {err_str[:200]}"
+            result = await db.execute(
+                update(SessionModel)
+                .where(SessionModel.id == session_id)
+                .values(status="failed", error_message=error_message)
+            )
+            await db.commit()
+            if result.rowcount:
+                logger.info("세션 실패 저장 완료: session=%s, error_message=%s", session_id, error_message)
         except Exception as db_err:
             logger.error("세션 실패 상태 업데이트 불가: session=%s, db_error=%s: %s", session_id, type(db_err).__name__, db_err)
-        from .slack import send_slack_alert
-        await send_slack_alert(
+        from .slack import alert
+        alert(
             "카드 생성 실패",
             f"session: `{session_id}`\nerror: {type(e).__name__}: {e}",
+            key=f"generate_failed:{type(e).__name__}",
         )
     finally:
+        SESSIONS_PROCESSING.dec()
         release_session_semaphore(session_id)
-        db.close()
+        await timeline.save(db, trace)
+        await db.close()
 
 
 # ──────────────────────────────────────
@@ -928,19 +1201,17 @@ async def _generate_in_background(
 def review_card(
     card_id: str,
     body: ReviewRequest,
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
-    device_id: str = Depends(get_device_id),
 ):
-    """카드 복습 결과 기록 (SM-2)."""
-    card = db.query(CardModel).filter(CardModel.id == card_id).first()
+    """카드 복습 결과 기록 (SM-2). 참조 카드는 구체화 없이 가상 ID로 기록."""
+    card = library_service.resolve_card(db, card_id)
     if not card:
         raise HTTPException(404, "카드를 찾을 수 없습니다.")
 
     if body.rating < 1 or body.rating > 4:
         raise HTTPException(400, "rating은 1~4 사이여야 합니다.")
 
-    owner = get_owner_id(request)
 
     # 이전 복습 기록 조회 (최신 1건)
     prev_review = (
@@ -959,8 +1230,8 @@ def review_card(
 
     review = CardReviewModel(
         card_id=card_id,
-        user_id=owner["user_id"],
-        device_id=device_id,
+        user_id=auth.user_id,
+        device_id=auth.device_id,
         rating=body.rating,
         interval_days=new_interval,
         ease_factor=new_ease,
@@ -980,9 +1251,42 @@ def review_card(
     ).model_dump()
 
 
+def _linked_study_cards(db: Session, owner_filter, folder_id: Optional[str] = None) -> list:
+    """참조 세션(Explore 다운로드)의 구체화 전 카드 — 모두 accepted라 학습 대상."""
+    query = owner_filter(db.query(SessionModel)).filter(SessionModel.source_cardset_id.isnot(None))
+    if folder_id:
+        query = query.filter(SessionModel.folder_id == folder_id)
+    return library_service.linked_cards(db, query.all())
+
+
+LATEST_REVIEW_BATCH_SIZE = 500  # IN 목록 크기 (SQLite 파라미터 한도 대비)
+
+
+def _latest_reviews(db: Session, card_ids: Iterable[str]) -> Dict[str, CardReviewModel]:
+    """카드 ID → 가장 최근 복습 기록. 카드마다 조회하지 않고 묶음당 그룹 쿼리 1회."""
+    card_ids = list(card_ids)
+    result: Dict[str, CardReviewModel] = {}
+    for start in range(0, len(card_ids), LATEST_REVIEW_BATCH_SIZE):
+        latest = (
+            select(CardReviewModel.card_id, func.max(CardReviewModel.reviewed_at).label("latest"))
+            .where(CardReviewModel.card_id.in_(card_ids[start:start + LATEST_REVIEW_BATCH_SIZE]))
+            .group_by(CardReviewModel.card_id)
+            .subquery()
+        )
+        reviews = db.scalars(
+            select(CardReviewModel).join(
+                latest,
+                (CardReviewModel.card_id == latest.c.card_id)
+                & (CardReviewModel.reviewed_at == latest.c.latest),
+            )
+        )
+        result.update((review.card_id, review) for review in reviews)
+    return result
+
+
 @router.get("/study/due")
 def get_due_cards(
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     folder_id: Optional[str] = None,
     limit: int = 50,
     db: Session = Depends(get_db),
@@ -991,7 +1295,7 @@ def get_due_cards(
     from datetime import datetime as dt
     from sqlalchemy import func
 
-    owner_filter = get_owner_filter(request)
+    owner_filter = auth.session_filter
     now = dt.utcnow()
 
     # accepted 카드만 대상
@@ -1004,18 +1308,14 @@ def get_due_cards(
     if folder_id:
         base_query = base_query.filter(SessionModel.folder_id == folder_id)
 
-    all_cards = base_query.all()
+    all_cards = base_query.all() + _linked_study_cards(db, owner_filter, folder_id)
 
     due_cards = []
     new_cards = []
+    latest_reviews = _latest_reviews(db, [card.id for card in all_cards])
 
     for card in all_cards:
-        latest_review = (
-            db.query(CardReviewModel)
-            .filter(CardReviewModel.card_id == card.id)
-            .order_by(CardReviewModel.reviewed_at.desc())
-            .first()
-        )
+        latest_review = latest_reviews.get(card.id)
 
         if latest_review is None:
             new_cards.append(card)
@@ -1041,27 +1341,25 @@ def get_due_cards(
         resp["session_filename"] = card.session.filename if card.session else ""
         result.append(resp)
 
-    return result
+    return serialization.json_response(result)
 
 
 @router.get("/study/stats")
 def get_study_stats(
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
-    device_id: str = Depends(get_device_id),
 ):
     """학습 통계: 오늘 복습 수, 마스터 카드, 스트릭, 복습 대기 카드."""
     from datetime import datetime as dt
 
-    owner = get_owner_id(request)
     now = dt.utcnow()
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
 
     # 소유자 필터
-    if owner["user_id"]:
-        owner_cond = CardReviewModel.user_id == owner["user_id"]
+    if auth.user_id:
+        owner_cond = CardReviewModel.user_id == auth.user_id
     else:
-        owner_cond = CardReviewModel.device_id == device_id
+        owner_cond = CardReviewModel.device_id == auth.device_id
 
     # 오늘 복습 수
     reviews_today = (
@@ -1122,7 +1420,7 @@ def get_study_stats(
             break
 
     # 복습 대기 카드 수
-    owner_filter = get_owner_filter(request)
+    owner_filter = auth.session_filter
     all_accepted = (
         owner_filter(
             db.query(CardModel)
@@ -1130,16 +1428,12 @@ def get_study_stats(
             .filter(CardModel.status == "accepted")
         )
         .all()
-    )
+    ) + _linked_study_cards(db, owner_filter)
 
+    latest_by_card = _latest_reviews(db, [card.id for card in all_accepted])
     due_count = 0
     for card in all_accepted:
-        latest = (
-            db.query(CardReviewModel)
-            .filter(CardReviewModel.card_id == card.id)
-            .order_by(CardReviewModel.reviewed_at.desc())
-            .first()
-        )
+        latest = latest_by_card.get(card.id)
         if latest is None or latest.due_date <= now:
             due_count += 1
 
@@ -1166,66 +1460,111 @@ CATEGORIES = {
 
 
 @router.get("/explore/categories")
-def list_categories(db: Session = Depends(get_db)):
+def list_categories(request: Request, db: Session = Depends(get_db)):
     """카테고리 목록 + 각 카테고리별 published 카드셋 수."""
-    result = []
-    for key, info in CATEGORIES.items():
-        count = (
-            db.query(PublicCardsetModel)
-            .filter(PublicCardsetModel.category == key, PublicCardsetModel.status == "published")
-            .count()
+    def build():
+        counts = dict(
+            db.query(PublicCardsetModel.category, func.count(PublicCardsetModel.id))
+            .filter(PublicCardsetModel.status == "published")
+            .group_by(PublicCardsetModel.category)
+            .all()
         )
-        result.append({
-            "id": key,
-            "name": info["name"],
-            "icon": info["icon"],
-            "subcategories": info["subcategories"],
-            "cardset_count": count,
-        })
-    return result
+        return [
+            {
+                "id": key,
+                "name": info["name"],
+                "icon": info["icon"],
+                "subcategories": info["subcategories"],
+                "cardset_count": counts.get(key, 0),
+            }
+            for key, info in CATEGORIES.items()
+        ], {}
+
+    return explore_cache.cached_response(request, "categories", "categories", "categories", build)
+
+
+EXPLORE_PAGE_SIZE = 50
+MAX_EXPLORE_PAGE_SIZE = 100
+
+
+def _cardset_summary(cs: PublicCardsetModel) -> dict:
+    return {
+        "id": cs.id,
+        "title": cs.title,
+        "description": cs.description,
+        "category": cs.category,
+        "tags": cs.tags,
+        "card_count": cs.card_count,
+        "download_count": cs.download_count,
+        "author_name": cs.author_name,
+        "is_featured": cs.is_featured,
+        "created_at": cs.created_at.isoformat() + "Z",
+    }
 
 
 @router.get("/explore/cardsets")
 def list_cardsets(
+    request: Request,
     category: Optional[str] = None,
     sort: str = "popular",
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = EXPLORE_PAGE_SIZE,
     db: Session = Depends(get_db),
 ):
-    """공개 카드셋 목록 (카테고리/정렬/검색 필터)."""
-    query = db.query(PublicCardsetModel).filter(PublicCardsetModel.status == "published")
+    """공개 카드셋 목록 (카테고리/정렬/검색 필터).
+
+    search가 있으면 제목·설명·태그·카드 내용 전문 검색 결과를 관련도순으로 반환합니다 (sort 무시).
+    다음 페이지가 있으면 X-Next-Cursor 헤더에 커서를 담습니다 (정렬/검색마다 커서 형식이 다름).
+    """
+    limit = max(1, min(limit, MAX_EXPLORE_PAGE_SIZE))
+
+    def build():
+        if search_service.has_terms(search):
+            try:
+                ids, next_cursor = search_service.search(db, search, category=category, limit=limit, cursor=cursor)
+            except ValueError:
+                raise HTTPException(400, "잘못된 cursor 값입니다.")
+            headers = {pagination.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+            if not ids:
+                return [], headers
+            by_id = {
+                cs.id: cs
+                for cs in db.query(PublicCardsetModel).filter(
+                    PublicCardsetModel.id.in_(ids), PublicCardsetModel.status == "published"
+                )
+            }
+            return [_cardset_summary(by_id[cid]) for cid in ids if cid in by_id], headers
 
-    if category:
-        query = query.filter(PublicCardsetModel.category == category)
-    if search:
-        query = query.filter(PublicCardsetModel.title.like(f"%{search}%"))
+        query = db.query(PublicCardsetModel).filter(PublicCardsetModel.status == "published")
 
-    if sort == "latest":
-        query = query.order_by(PublicCardsetModel.created_at.desc())
-    else:
-        query = query.order_by(PublicCardsetModel.download_count.desc())
+        if category:
+            query = query.filter(PublicCardsetModel.category == category)
 
-    cardsets = query.limit(50).all()
-    return [
-        {
-            "id": cs.id,
-            "title": cs.title,
-            "description": cs.description,
-            "category": cs.category,
-            "tags": cs.tags,
-            "card_count": cs.card_count,
-            "download_count": cs.download_count,
-            "author_name": cs.author_name,
-            "is_featured": cs.is_featured,
-            "created_at": cs.created_at.isoformat() + "Z",
-        }
-        for cs in cardsets
-    ]
+        if sort == "latest":
+            columns = (PublicCardsetModel.created_at, PublicCardsetModel.id)
+        else:
+            columns = (PublicCardsetModel.download_count, PublicCardsetModel.id)
+        try:
+            cardsets, next_cursor = pagination.paginate(query, columns, cursor, limit)
+        except ValueError:
+            raise HTTPException(400, "잘못된 cursor 값입니다.")
+        headers = {pagination.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return [_cardset_summary(cs) for cs in cardsets], headers
+
+    key = json.dumps([category, sort, search, cursor, limit], ensure_ascii=False)
+    return explore_cache.cached_response(request, "cardsets", "cardsets", key, build)
 
 
 @router.get("/explore/cardsets/{cardset_id}")
-def get_cardset(cardset_id: str, db: Session = Depends(get_db)):
+def get_cardset(cardset_id: str, request: Request, db: Session = Depends(get_db)):
     """공개 카드셋 상세 + 카드 전체."""
+    return explore_cache.cached_response(
+        request, "cardset", f"cardset:{cardset_id}", cardset_id, lambda: (_cardset_detail(db, cardset_id), {}),
+    )
+
+
+def _cardset_detail(db: Session, cardset_id: str) -> dict:
     cs = db.query(PublicCardsetModel).filter(PublicCardsetModel.id == cardset_id).first()
     if not cs:
         raise HTTPException(404, "카드셋을 찾을 수 없습니다.")
@@ -1237,16 +1576,7 @@ def get_cardset(cardset_id: str, db: Session = Depends(get_db)):
         .all()
     )
     return {
-        "id": cs.id,
-        "title": cs.title,
-        "description": cs.description,
-        "category": cs.category,
-        "tags": cs.tags,
-        "card_count": cs.card_count,
-        "download_count": cs.download_count,
-        "author_name": cs.author_name,
-        "is_featured": cs.is_featured,
-        "created_at": cs.created_at.isoformat() + "Z",
+        **_cardset_summary(cs),
         "cards": [
             {
                 "id": c.id,
@@ -1264,85 +1594,79 @@ def get_cardset(cardset_id: str, db: Session = Depends(get_db)):
 @router.post("/explore/cardsets/{cardset_id}/download")
 def download_cardset(
     cardset_id: str,
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
-    device_id: str = Depends(get_device_id),
 ):
-    """공개 카드셋을 유저의 세션+카드로 복사 (로그인 필수)."""
-    owner = get_owner_id(request)
-    if not owner["user_id"]:
+    """공개 카드셋을 유저 세션으로 가져오기 (로그인 필수).
+
+    link 모드는 카드를 복사하지 않고 세션이 공개 카드셋을 참조 — 카드 행은 수정/상태 변경 시에만 생성.
+    """
+    if not auth.user_id:
         raise HTTPException(401, "로그인이 필요합니다.")
 
     cs = db.query(PublicCardsetModel).filter(PublicCardsetModel.id == cardset_id).first()
     if not cs:
         raise HTTPException(404, "카드셋을 찾을 수 없습니다.")
 
-    pub_cards = (
-        db.query(PublicCardModel)
-        .filter(PublicCardModel.cardset_id == cardset_id)
+    first_template = db.scalar(
+        select(PublicCardModel.template_type)
+        .where(PublicCardModel.cardset_id == cardset_id)
         .order_by(PublicCardModel.sort_order)
-        .all()
+        .limit(1)
     )
 
     # 유저 세션 생성
     session = SessionModel(
         filename=cs.title,
         page_count=0,
-        template_type=pub_cards[0].template_type if pub_cards else "definition",
-        device_id=device_id,
-        user_id=owner["user_id"],
+        template_type=first_template or "definition",
+        device_id=auth.device_id,
+        user_id=auth.user_id,
         source_type="explore",
         status="completed",
     )
+    link = settings.EXPLORE_DOWNLOAD_MODE == "link"
+    if link:
+        session.source_cardset_id = cardset_id
     db.add(session)
     db.flush()
 
-    # 카드 복사
-    for pc in pub_cards:
-        card = CardModel(
-            session_id=session.id,
-            front=pc.front,
-            back=pc.back,
-            evidence=pc.evidence,
-            evidence_page=0,
-            template_type=pc.template_type,
-            status="accepted",
-        )
-        db.add(card)
+    if not link:
+        # 카드 복사 (DB 안에서 INSERT ... SELECT)
+        copy_public_cards(db, cardset_id, session.id)
 
-    # download_count 증가
-    cs.download_count += 1
+    # 다운로드 수는 이벤트만 남기고 주기적으로 합산 반영 (download_counter)
+    download_counter.record(db, cardset_id)
     db.commit()
     db.refresh(session)
 
-    return _build_session_response(session)
+    return serialization.json_response(_build_session_response(session))
 
 
 @router.post("/explore/publish")
 def publish_cardset(
     body: PublishRequest,
-    request: Request,
+    auth: AuthContext = Depends(get_auth_context),
     db: Session = Depends(get_db),
 ):
     """유저 세션의 accepted 카드를 공개 카드셋으로 발행 (로그인 필수)."""
-    owner = get_owner_id(request)
-    if not owner["user_id"]:
+    if not auth.user_id:
         raise HTTPException(401, "로그인이 필요합니다.")
 
-    owner_filter = get_owner_filter(request)
+    owner_filter = auth.session_filter
     session = owner_filter(
         db.query(SessionModel).filter(SessionModel.id == body.session_id)
     ).first()
     if not session:
         raise HTTPException(404, "세션을 찾을 수 없습니다.")
 
-    accepted_cards = [c for c in session.cards if c.status == "accepted"]
+    accepted_cards = [c for c in library_service.session_cards(session, db) if c.status == "accepted"]
     if not accepted_cards:
         raise HTTPException(400, "채택된 카드가 없습니다.")
 
     # 유저 정보 조회
     from .models import UserModel
-    user = db.query(UserModel).filter(UserModel.id == owner["user_id"]).first()
+    user = db.query(UserModel).filter(UserModel.id == auth.user_id).first()
     author_name = user.nickname if user and user.nickname else "데카드"
 
     category = body.category if body.category in CATEGORIES else "etc"
@@ -1351,26 +1675,19 @@ def publish_cardset(
         title=body.title,
         description=body.description,
         category=category,
-        author_id=owner["user_id"],
+        author_id=auth.user_id,
         author_name=author_name,
         card_count=len(accepted_cards),
     )
     db.add(cardset)
     db.flush()
 
-    for idx, card in enumerate(accepted_cards):
-        pub_card = PublicCardModel(
-            cardset_id=cardset.id,
-            front=card.front,
-            back=card.back,
-            evidence=card.evidence,
-            template_type=card.template_type,
-            sort_order=idx,
-        )
-        db.add(pub_card)
+    insert_public_cards(db, public_card_rows(cardset.id, accepted_cards))
+    search_service.index_cardset(db, cardset.id)
 
     db.commit()
     db.refresh(cardset)
+    explore_cache.invalidate("categories", "cardsets")
 
     return {
         "id": cardset.id,
@@ -1394,27 +1711,33 @@ def _safe_error(detail: str, exc: Exception) -> str:
     return detail
 
 
-def _card_to_response(card: CardModel) -> dict:
-    return CardResponse(
-        id=card.id,
-        front=card.front,
-        back=card.back,
-        evidence=card.evidence,
-        evidence_page=card.evidence_page,
-        tags=card.tags,
-        template_type=card.template_type,
-        status=card.status,
-    ).model_dump()
+def _card_to_response(card: "library_service.AnyCard") -> dict:
+    """카드 → CardResponse 형태 dict (모델 검증 없이 — 카드 목록 응답 경로)."""
+    return serialization.card_dict(card)
+
 
+def _card_row_to_response(row: dict) -> dict:
+    """bulk_service.card_rows로 만든 행 → 응답 dict (ORM 객체 없이)."""
+    return serialization.card_row_dict(row)
 
-def _build_session_response(session: SessionModel) -> dict:
-    cards = [_card_to_response(c) for c in session.cards]
+
+def _build_session_response(session: SessionModel, cards: Optional[list] = None) -> dict:
+    """cards를 주면 session.cards를 로드하지 않고 그대로 사용 (일괄 저장 직후)."""
+    if cards is None:
+        cards = [_card_to_response(c) for c in library_service.session_cards(session)]
     stats = {
         "total": len(cards),
         "accepted": sum(1 for c in cards if c["status"] == "accepted"),
         "rejected": sum(1 for c in cards if c["status"] == "rejected"),
         "pending": sum(1 for c in cards if c["status"] == "pending"),
     }
+    resp = _session_fields(session)
+    resp.update(card_count=len(cards), cards=cards, stats=stats)
+    return resp
+
+
+def _session_fields(session: SessionModel) -> dict:
+    """세션 응답의 세션 컬럼 부분 (카드/통계 제외)."""
     resp = {
         "id": session.id,
         "filename": session.filename,
@@ -1427,10 +1750,7 @@ def _build_session_response(session: SessionModel) -> dict:
         "progress": session.progress or 0,
         "total_chunks": session.total_chunks or 0,
         "completed_chunks": session.completed_chunks or 0,
-        "card_count": len(cards),
         "created_at": session.created_at.isoformat() + "Z",
-        "cards": cards,
-        "stats": stats,
     }
     if session.error_message:
         resp["error_message"] = session.error_message
@@ -0,0 +1,298 @@
+"""Explore 카드셋 전문 검색.
+
+title LIKE '%검색어%'는 전체 스캔이고 설명/태그/카드 내용은 보지 않습니다. 대신
+카드셋마다 검색 문서(제목 / 본문 = 설명 + 태그 + 카드 앞뒷면)를 색인합니다.
+- 토큰화는 파이썬에서: 한글/한자/가나는 2글자 단위(bigram), 그 외 단어는 그대로(소문자, NFKC)
+  → DB 토크나이저와 무관하게 "정보처리"로 "정보처리기사"를 찾음
+- SQLite: FTS5 (public_cardset_fts, rowid = public_cardset_search.doc_id), bm25 순위
+- PostgreSQL: public_cardset_search.document tsvector + GIN, ts_rank_cd 순위
+- published 카드셋만 색인하고 카테고리도 색인에 두어, 순위 계산·필터·LIMIT이 색인 테이블 안에서
+  끝남 (public_cardsets 조인은 결과 페이지에만)
+- 순위가 같으면 문서 키로 정렬하고, 마지막 (순위, 키)를 불투명 커서로 넘겨 다음 페이지 조회
+발행(publish)·시드 때 index_cardset으로 동기화하고, 마이그레이션에서 rebuild로 전체 재색인합니다.
+"""
+
+import base64
+import json
+import logging
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, text
+
+from .models import PublicCardModel, PublicCardsetModel
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_CHARS = 20_000     # 카드셋당 본문 색인 상한 (카드가 아주 많은 카드셋)
+MAX_QUERY_TERMS = 16
+REINDEX_BATCH_SIZE = 500
+TITLE_WEIGHT = 5.0          # bm25 가중치 (본문 1.0 대비)
+
+# 한글 자모/호환 자모/음절, 가나, 한자
+_CJK = "ᄀ-ᇿ぀-ヿ㄰-㆏㐀-䶿一-鿿가-힯"
+_WORD_RE = re.compile(r"\w+")
+_RUN_RE = re.compile(f"([{_CJK}]+)|([^{_CJK}]+)")
+
+
+# ──────────────────────────────────────
+# 토큰화
+# ──────────────────────────────────────
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """색인/검색 공통 토큰. 한중일 문자열은 bigram, 나머지 단어는 통째로."""
+    tokens: List[str] = []
+    for word in _WORD_RE.findall(unicodedata.normalize("NFKC", value or "").lower()):
+        for cjk, other in _RUN_RE.findall(word):
+            if cjk and len(cjk) > 1:
+                tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+            elif cjk or other.strip("_"):
+                tokens.append(cjk or other.strip("_"))
+    return tokens
+
+
+def _query_terms(query: str) -> List[str]:
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def _is_prefix_term(term: str) -> bool:
+    # 한 글자 한글 / 영문·숫자 단어는 접두어 검색 (입력 중인 검색어도 매칭)
+    return len(term) == 1 or not re.match(f"[{_CJK}]", term)
+
+
+def _documents(title: str, description: str, tags: str, cards: Iterable[Tuple[str, str]]) -> Tuple[str, str]:
+    """(제목 토큰, 본문 토큰) — 공백으로 이은 문자열."""
+    body_parts = [description or "", (tags or "").replace(",", " ")]
+    size = sum(len(p) for p in body_parts)
+    for front, back in cards:
+        if size >= MAX_BODY_CHARS:
+            break
+        body_parts.extend((front or "", back or ""))
+        size += len(front or "") + len(back or "")
+    body = " ".join(body_parts)[:MAX_BODY_CHARS]
+    return " ".join(tokenize(title)), " ".join(tokenize(body))
+
+
+def _dialect(db) -> str:
+    """Session / Connection 모두 지원."""
+    dialect = getattr(db, "dialect", None) or db.get_bind().dialect
+    return dialect.name
+
+
+# ──────────────────────────────────────
+# 스키마
+# ──────────────────────────────────────
+
+def create_index(conn) -> None:
+    """검색 색인 테이블 생성 (방언별). 이미 있으면 무시."""
+    if _dialect(conn) == "postgresql":
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS public_cardset_search ("
+            " cardset_id VARCHAR PRIMARY KEY,"
+            " category VARCHAR NOT NULL,"
+            " document TSVECTOR NOT NULL)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_public_cardset_search_document "
+            "ON public_cardset_search USING GIN (document)"
+        ))
+        return
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS public_cardset_search ("
+        " doc_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " cardset_id VARCHAR NOT NULL UNIQUE)"
+    ))
+    # 토큰은 이미 파이썬에서 만들었으므로 공백 분리만 하면 됨 (unicode61은 한글을 글자로 취급)
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS public_cardset_fts "
+        "USING fts5(title, body, category UNINDEXED, tokenize='unicode61')"
+    ))
+
+
+def drop_index(conn) -> None:
+    """검색 색인 테이블 삭제 (벤치마크 스키마 초기화용)."""
+    conn.execute(text("DROP TABLE IF EXISTS public_cardset_fts"))
+    conn.execute(text("DROP TABLE IF EXISTS public_cardset_search"))
+
+
+# ──────────────────────────────────────
+# 색인 갱신
+# ──────────────────────────────────────
+
+def _write_documents(db, docs: Sequence[dict]) -> None:
+    """{id, category, title, body} 문서들을 색인에 덮어쓰기."""
+    if not docs:
+        return
+    if _dialect(db) == "postgresql":
+        db.execute(
+            text(
+                "INSERT INTO public_cardset_search (cardset_id, category, document) VALUES (:id, :category, "
+                " setweight(to_tsvector('simple', :title), 'A') || setweight(to_tsvector('simple', :body), 'B')) "
+                "ON CONFLICT (cardset_id) DO UPDATE "
+                "SET category = EXCLUDED.category, document = EXCLUDED.document"
+            ),
+            list(docs),
+        )
+        return
+    for doc in docs:
+        doc_id = db.execute(
+            text("SELECT doc_id FROM public_cardset_search WHERE cardset_id = :id"), {"id": doc["id"]},
+        ).scalar()
+        if doc_id is None:
+            doc_id = db.execute(
+                text("INSERT INTO public_cardset_search (cardset_id) VALUES (:id)"), {"id": doc["id"]},
+            ).lastrowid
+        else:
+            db.execute(text("DELETE FROM public_cardset_fts WHERE rowid = :doc"), {"doc": doc_id})
+        db.execute(
+            text("INSERT INTO public_cardset_fts (rowid, title, body, category) "
+                 "VALUES (:doc, :title, :body, :category)"),
+            {**doc, "doc": doc_id},
+        )
+
+
+def _remove_document(db, cardset_id: str) -> None:
+    if _dialect(db) == "postgresql":
+        db.execute(text("DELETE FROM public_cardset_search WHERE cardset_id = :id"), {"id": cardset_id})
+        return
+    doc_id = db.execute(
+        text("SELECT doc_id FROM public_cardset_search WHERE cardset_id = :id"), {"id": cardset_id},
+    ).scalar()
+    if doc_id is not None:
+        db.execute(text("DELETE FROM public_cardset_fts WHERE rowid = :doc"), {"doc": doc_id})
+        db.execute(text("DELETE FROM public_cardset_search WHERE doc_id = :doc"), {"doc": doc_id})
+
+
+def _load_documents(db, cardset_ids: Sequence[str]) -> List[dict]:
+    """published 카드셋만 문서로 (그 외 ID는 결과에서 빠짐)."""
+    cs = PublicCardsetModel.__table__
+    pc = PublicCardModel.__table__
+    cardsets = db.execute(
+        select(cs.c.id, cs.c.title, cs.c.description, cs.c.tags, cs.c.category)
+        .where(cs.c.id.in_(cardset_ids), cs.c.status == "published")
+    ).all()
+    cards: dict = {row.id: [] for row in cardsets}
+    for cid, front, back in db.execute(
+        select(pc.c.cardset_id, pc.c.front, pc.c.back)
+        .where(pc.c.cardset_id.in_(list(cards)))
+        .order_by(pc.c.cardset_id, pc.c.sort_order)
+    ):
+        cards[cid].append((front, back))
+    docs = []
+    for row in cardsets:
+        title, body = _documents(row.title, row.description, row.tags, cards[row.id])
+        docs.append({"id": row.id, "category": row.category, "title": title, "body": body})
+    return docs
+
+
+def index_cardset(db, cardset_id: str) -> None:
+    """카드셋 1개 (재)색인 — published가 아니면 색인에서 제거. 커밋은 호출자가 합니다 (발행과 같은 트랜잭션)."""
+    docs = _load_documents(db, [cardset_id])
+    if docs:
+        _write_documents(db, docs)
+    else:
+        _remove_document(db, cardset_id)
+
+
+def rebuild(db, batch_size: int = REINDEX_BATCH_SIZE) -> int:
+    """전체 재색인. 색인된 카드셋 수 반환. 커밋은 호출자가 합니다."""
+    postgres = _dialect(db) == "postgresql"
+    if not postgres:
+        db.execute(text("DELETE FROM public_cardset_fts"))
+    db.execute(text("DELETE FROM public_cardset_search"))
+
+    cs = PublicCardsetModel.__table__
+    total, last_id, next_doc = 0, "", 1
+    while True:
+        ids = db.execute(
+            select(cs.c.id).where(cs.c.id > last_id).order_by(cs.c.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        docs = _load_documents(db, ids)
+        if postgres:
+            _write_documents(db, docs)
+        elif docs:
+            # 빈 색인에 채우므로 doc_id를 직접 매겨 executemany
+            rows = [{**doc, "doc": next_doc + i} for i, doc in enumerate(docs)]
+            db.execute(text("INSERT INTO public_cardset_search (doc_id, cardset_id) VALUES (:doc, :id)"), rows)
+            db.execute(text("INSERT INTO public_cardset_fts (rowid, title, body, category) "
+                            "VALUES (:doc, :title, :body, :category)"), rows)
+            next_doc += len(rows)
+        total += len(docs)
+        last_id = ids[-1]
+    logger.info("카드셋 검색 색인 재구성: %d개", total)
+    return total
+
+
+# ──────────────────────────────────────
+# 검색
+# ──────────────────────────────────────
+
+def encode_cursor(rank: float, key) -> str:
+    raw = json.dumps([rank, key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, object]:
+    """(순위, 키). 잘못된 커서는 ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        rank, key = json.loads(raw)
+        if not isinstance(key, (int, str)):
+            raise TypeError(type(key).__name__)
+        return float(rank), key
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {e}")
+
+
+def has_terms(query: Optional[str]) -> bool:
+    return bool(query and _query_terms(query))
+
+
+def search(
+    db,
+    query: str,
+    category: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Tuple[List[str], Optional[str]]:
+    """관련도순 published 카드셋 ID 목록과 다음 페이지 커서 (없으면 None)."""
+    terms = _query_terms(query)
+    if not terms:
+        return [], None
+
+    params: dict = {"limit": limit + 1}
+    filters = []
+    if category:
+        filters.append("category = :category")
+        params["category"] = category
+    if cursor:
+        params["after_rank"], params["after_key"] = decode_cursor(cursor)
+        filters.append("(rank > :after_rank OR (rank = :after_rank AND key > :after_key))")
+    where = f"WHERE {' AND '.join(filters)} " if filters else ""
+
+    if _dialect(db) == "postgresql":
+        params["q"] = " & ".join(f"'{t}':*" if _is_prefix_term(t) else f"'{t}'" for t in terms)
+        sql = (
+            "SELECT key AS id, rank, key FROM ("
+            " SELECT cardset_id AS key, category, -ts_rank_cd(document, q)::float8 AS rank"
+            " FROM public_cardset_search, to_tsquery('simple', :q) q WHERE document @@ q"
+            f") ranked {where}ORDER BY rank, key LIMIT :limit"
+        )
+    else:
+        params["q"] = " ".join(f'"{t}"*' if _is_prefix_term(t) else f'"{t}"' for t in terms)
+        # 순위·LIMIT은 FTS 테이블만으로, 카드셋 ID 매핑은 결과 페이지에만
+        sql = (
+            "SELECT s.cardset_id AS id, top.rank, top.key FROM ("
+            " SELECT key, rank FROM ("
+            f"  SELECT rowid AS key, category, bm25(public_cardset_fts, {TITLE_WEIGHT}, 1.0) AS rank"
+            "  FROM public_cardset_fts WHERE public_cardset_fts MATCH :q"
+            f" ) ranked {where}ORDER BY rank, key LIMIT :limit"
+            ") top JOIN public_cardset_search s ON s.doc_id = top.key ORDER BY top.rank, top.key"
+        )
+    rows = db.execute(text(sql), params).all()
+
+    next_cursor = encode_cursor(rows[limit - 1].rank, rows[limit - 1].key) if len(rows) > limit else None
+    return [row.id for row in rows[:limit]], next_cursor
@@ -0,0 +1,70 @@
+"""JSON 응답 직렬화 (카드 목록 등 큰 응답용).
+
+FastAPI 기본 경로는 엔드포인트 반환값을 jsonable_encoder로 한 번 더 훑은 뒤 json.dumps 합니다.
+카드마다 CardResponse(...).model_dump()까지 거치면 카드 수백~수천 장 응답에서 CPU 대부분이 여기에 쓰입니다.
+- card_dict: 모델 검증 없이 카드 객체/행 → 응답 dict (CardResponse와 같은 키)
+- json_response: 이미 JSON 타입만 담긴 payload를 orjson으로 바로 직렬화한 Response (jsonable_encoder 생략)
+- FastJSONResponse: 앱 기본 응답 클래스 (orjson이 없으면 표준 JSONResponse)
+orjson이 설치돼 있지 않으면 표준 json으로 같은 바이트 형식을 만듭니다.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Mapping, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - requirements.txt에 포함
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+if orjson is None:
+    logger.warning("orjson 미설치 — 표준 json으로 응답을 직렬화합니다 (pip install orjson)")
+
+FastJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def dumps(payload: Any) -> bytes:
+    """payload → UTF-8 JSON 바이트. JSON 타입이 아닌 값(datetime 등)은 jsonable_encoder로 변환."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=jsonable_encoder)
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def json_response(payload: Any, status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """payload를 바로 직렬화한 JSON 응답 (FastAPI의 jsonable_encoder 단계를 거치지 않음)."""
+    return Response(content=dumps(payload), status_code=status_code, headers=headers, media_type="application/json")
+
+
+def card_dict(card: Any) -> Dict[str, Any]:
+    """카드 ORM 객체 / LinkedCard → 응답 dict (CardResponse 필드)."""
+    return {
+        "id": card.id,
+        "front": card.front,
+        "back": card.back,
+        "evidence": card.evidence or "",
+        "evidence_page": card.evidence_page or 0,
+        "tags": card.tags or "",
+        "template_type": card.template_type or "definition",
+        "status": card.status,
+    }
+
+
+def card_row_dict(row: Mapping[str, Any]) -> Dict[str, Any]:
+    """bulk_service.card_rows 행(dict) → 응답 dict."""
+    return {
+        "id": row["id"],
+        "front": row["front"],
+        "back": row["back"],
+        "evidence": row.get("evidence") or "",
+        "evidence_page": row.get("evidence_page") or 0,
+        "tags": row.get("tags") or "",
+        "template_type": row.get("template_type") or "definition",
+        "status": row["status"],
+    }
@@ -1,16 +1,45 @@
+"""Slack 알림.
+
+send_slack_alert는 웹훅 1회 전송이고, 일반 코드에서는 alert()로 큐에 넣습니다.
+- alert()는 즉시 반환 (생성 경로가 웹훅 응답을 기다리지 않음)
+- 같은 key의 알림은 창(SLACK_ALERT_WINDOW_SECONDS) 단위로 묶음:
+  첫 건은 바로 보내고, 창 안의 나머지는 "최근 60초 동안 12건"으로 요약해 한 번 전송
+- 채널별 토큰 버킷으로 분당 전송 수 제한 (초과분은 버리지 않고 다음 요약에 합침)
+- SLACK_ALERT_SINK=local이면 웹훅 대신 메모리(LocalSink.sent)에 쌓아 테스트에서 확인
+"""
+
+import asyncio
 import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
 import httpx
+
 from .config import settings
+from .http_client import get_http_client
+from .metrics import SLACK_ALERTS
 
 logger = logging.getLogger(__name__)
 
 COLORS = {"error": "#EF4444", "warn": "#F59E0B", "info": "#22C55E"}
 
+FLUSH_INTERVAL_SECONDS = 1.0
+MAX_SAMPLES = 3      # 요약 메시지에 원문을 붙이는 건수
+MAX_PENDING_KEYS = 500
+
 
-async def send_slack_alert(title: str, message: str, level: str = "error") -> None:
-    url = settings.SLACK_WEBHOOK_URL
+async def send_slack_alert(
+    title: str,
+    message: str,
+    level: str = "error",
+    client: Optional[httpx.AsyncClient] = None,
+    url: Optional[str] = None,
+) -> bool:
+    """웹훅 1회 전송. 전송했으면 True (URL 미설정/실패는 False)."""
+    url = url or settings.SLACK_WEBHOOK_URL
     if not url:
-        return
+        return False
     payload = {
         "attachments": [
             {
@@ -22,7 +51,175 @@ async def send_slack_alert(title: str, message: str, level: str = "error") -> No
         ]
     }
     try:
-        async with httpx.AsyncClient(timeout=5) as client:
-            await client.post(url, json=payload)
+        resp = await (client or get_http_client()).post(url, json=payload)
+        resp.raise_for_status()
+        return True
     except Exception:
         logger.warning("Slack 알림 전송 실패", exc_info=True)
+        return False
+
+
+# ──────────────────────────────────────
+# 싱크 (실제 전송 대상)
+# ──────────────────────────────────────
+
+class WebhookSink:
+    """채널 → 웹훅 URL (SLACK_CHANNEL_WEBHOOKS, 없으면 SLACK_WEBHOOK_URL)."""
+
+    async def send(self, channel: str, title: str, message: str, level: str) -> bool:
+        url = settings.SLACK_CHANNEL_WEBHOOKS.get(channel) or settings.SLACK_WEBHOOK_URL
+        return await send_slack_alert(title, message, level, url=url)
+
+
+class LocalSink:
+    """전송 대신 메모리에 기록 (테스트/로컬 개발용)."""
+
+    def __init__(self):
+        self.sent: List[dict] = []
+
+    async def send(self, channel: str, title: str, message: str, level: str) -> bool:
+        self.sent.append({"channel": channel, "title": title, "message": message, "level": level})
+        logger.info("[slack:%s] %s — %s", channel, title, message.splitlines()[0] if message else "")
+        return True
+
+
+# ──────────────────────────────────────
+# 알림 큐
+# ──────────────────────────────────────
+
+@dataclass
+class _Group:
+    title: str
+    level: str
+    channel: str
+    count: int = 0                 # 아직 보내지 않은 건수
+    first_at: float = 0.0          # 보내지 않은 첫 건 시각
+    window_start: float = 0.0      # 마지막 전송 시각 (0 = 창 없음 → 다음 틱에 바로 전송)
+    samples: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _Bucket:
+    tokens: float
+    updated_at: float
+
+
+class AlertQueue:
+    def __init__(self, sink=None):
+        self.sink = sink or (LocalSink() if settings.SLACK_ALERT_SINK == "local" else WebhookSink())
+        self._groups: Dict[str, _Group] = {}
+        self._buckets: Dict[str, _Bucket] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, title: str, message: str, level: str = "error",
+                key: Optional[str] = None, channel: str = "default") -> None:
+        """알림 등록 (블로킹 없음). key가 같으면 한 창 안에서 요약됩니다. 기본 key는 title."""
+        key = f"{channel}:{key or title}"
+        group = self._groups.get(key)
+        if group is None:
+            if len(self._groups) >= MAX_PENDING_KEYS:
+                SLACK_ALERTS.inc(result="dropped")
+                logger.warning("Slack 알림 큐 가득 참, 버림: %s", title)
+                return
+            group = self._groups[key] = _Group(title=title, level=level, channel=channel)
+        if group.count == 0:
+            group.first_at = time.monotonic()
+        group.count += 1
+        if len(group.samples) < MAX_SAMPLES:
+            group.samples.append(message)
+        SLACK_ALERTS.inc(result="enqueued")
+        self._ensure_worker()
+
+    def _ensure_worker(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # 이벤트 루프 밖 — 다음 enqueue/start에서 기동
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    def start(self) -> None:
+        self._ensure_worker()
+
+    async def stop(self) -> None:
+        """워커 종료 후 남은 알림을 창/속도 제한 없이 전송."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self.flush(force=True)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Slack 알림 큐 처리 오류")
+
+    async def flush(self, force: bool = False) -> int:
+        """보낼 차례인 그룹을 전송. force면 창/속도 제한을 무시하고 전부. 전송 건수 반환."""
+        now = time.monotonic()
+        window = settings.SLACK_ALERT_WINDOW_SECONDS
+        due: List[tuple] = []
+        for key, group in list(self._groups.items()):
+            if group.window_start and now - group.window_start < window and not force:
+                continue  # 창 진행 중 — 계속 모음
+            if group.count == 0:
+                del self._groups[key]  # 창 동안 추가 발생 없음
+                continue
+            if not force and not self._take_token(group.channel, now):
+                SLACK_ALERTS.inc(result="rate_limited")
+                continue
+            due.append((group.channel, *self._render(group, now), group.level, group.count))
+            group.count = 0
+            group.samples = []
+            group.window_start = now
+
+        if not due:
+            return 0
+        results = await asyncio.gather(
+            *(self.sink.send(channel, title, message, level) for channel, title, message, level, _ in due),
+            return_exceptions=True,
+        )
+        for (*_, count), ok in zip(due, results):
+            SLACK_ALERTS.inc(result="sent" if ok is True else "failed")
+            if count > 1:
+                SLACK_ALERTS.inc(count - 1, result="coalesced")
+        return len(due)
+
+    @staticmethod
+    def _render(group: _Group, now: float) -> tuple[str, str]:
+        if group.count == 1:
+            return group.title, group.samples[0]
+        elapsed = max(1, round(now - group.first_at))
+        lines = [f"최근 {elapsed}초 동안 {group.count}건 발생", ""]
+        lines.extend(group.samples)
+        if group.count > len(group.samples):
+            lines.append(f"… 외 {group.count - len(group.samples)}건")
+        return f"{group.title} ×{group.count}", "\n".join(lines)
+
+    def _take_token(self, channel: str, now: float) -> bool:
+        rate = settings.SLACK_ALERT_RATE_PER_MINUTE / 60
+        burst = settings.SLACK_ALERT_BURST
+        bucket = self._buckets.get(channel)
+        if bucket is None:
+            bucket = self._buckets[channel] = _Bucket(tokens=burst, updated_at=now)
+        bucket.tokens = min(burst, bucket.tokens + (now - bucket.updated_at) * rate)
+        bucket.updated_at = now
+        if bucket.tokens < 1:
+            return False
+        bucket.tokens -= 1
+        return True
+
+
+alerts = AlertQueue()
+
+
+def alert(title: str, message: str, level: str = "error",
+          key: Optional[str] = None, channel: str = "default") -> None:
+    """Slack 알림을 큐에 넣고 즉시 반환."""
+    alerts.enqueue(title, message, level, key=key, channel=channel)
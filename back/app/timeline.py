@@ -0,0 +1,156 @@
+"""세션 생성 파이프라인 타이밍 (span).
+
+세션마다 Timeline 하나를 만들고 contextvar로 현재 작업에 연결합니다.
+asyncio.create_task / gather / to_thread는 컨텍스트를 복사하므로, 하위 함수는
+timeline.span("stage")만 쓰면 세션 ID와 청크 번호가 자동으로 붙습니다 (타임라인이 없으면 no-op).
+완료/실패 시 session_timelines에 세션당 1행(JSON 배열)으로 저장합니다.
+진행 중에도 단계가 끝날 때마다(진행률 갱신 시) checkpoint로 그때까지의 span을 같은 행에 덮어써서,
+생성 중인 워커가 아닌 다른 워커도 DB에서 진행 중 타임라인을 볼 수 있습니다.
+생성 중인 워커는 메모리의 타임라인을 바로 보여줍니다 (GET /sessions/{id}/timeline, live=true).
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import SessionTimelineModel
+
+logger = logging.getLogger(__name__)
+
+MAX_SPANS = 1000  # 세션당 보관 상한 (초과분은 dropped로 집계만)
+
+_current: ContextVar[Optional["Timeline"]] = ContextVar("decard_timeline", default=None)
+_chunk: ContextVar[Optional[int]] = ContextVar("decard_timeline_chunk", default=None)
+
+# 진행 중인 세션 (이 워커에서 생성 중) — 완료 전 타임라인 조회용
+_active: Dict[str, "Timeline"] = {}
+
+
+class Timeline:
+    def __init__(self, session_id: Optional[str] = None):
+        self.session_id = session_id
+        self.started_at = datetime.utcnow()
+        self._t0 = time.perf_counter()
+        self.spans: List[dict] = []
+        self.dropped = 0
+        self._lock = threading.Lock()  # to_thread 안의 span도 기록
+
+    def add(self, stage: str, started: float, ended: float, error: Optional[str] = None, **attrs) -> None:
+        record = {"stage": stage, "at_ms": round((started - self._t0) * 1000), "ms": round((ended - started) * 1000)}
+        chunk = _chunk.get()
+        if chunk is not None:
+            record["chunk"] = chunk
+        if error:
+            record["error"] = error
+        record.update((k, v) for k, v in attrs.items() if v is not None)
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS:
+                self.dropped += 1
+                return
+            self.spans.append(record)
+
+    @contextmanager
+    def span(self, stage: str, **attrs):
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.add(stage, started, time.perf_counter(), error=type(e).__name__, **attrs)
+            raise
+        self.add(stage, started, time.perf_counter(), **attrs)
+
+    @property
+    def total_ms(self) -> int:
+        return round((time.perf_counter() - self._t0) * 1000)
+
+    def summary(self) -> Dict[str, dict]:
+        """단계별 횟수 / 합계 / 최대 (청크가 병렬이라 합계는 벽시계 시간보다 클 수 있음)."""
+        return summarize(self.spans)
+
+
+def summarize(spans: List[dict]) -> Dict[str, dict]:
+    result: Dict[str, dict] = {}
+    for span_ in spans:
+        entry = result.setdefault(span_["stage"], {"count": 0, "total_ms": 0, "max_ms": 0, "errors": 0})
+        entry["count"] += 1
+        entry["total_ms"] += span_["ms"]
+        entry["max_ms"] = max(entry["max_ms"], span_["ms"])
+        if "error" in span_:
+            entry["errors"] += 1
+    return result
+
+
+# ──────────────────────────────────────
+# 현재 컨텍스트
+# ──────────────────────────────────────
+
+def activate(timeline: Timeline) -> None:
+    """현재 작업(과 이후 생성되는 하위 작업)에 타임라인 연결."""
+    _current.set(timeline)
+    if timeline.session_id:
+        _active[timeline.session_id] = timeline
+
+
+@contextmanager
+def chunk(chunk_idx: int):
+    """블록 안에서 기록되는 span에 청크 번호를 붙임."""
+    token = _chunk.set(chunk_idx)
+    try:
+        yield
+    finally:
+        _chunk.reset(token)
+
+
+@contextmanager
+def span(stage: str, **attrs):
+    """현재 타임라인에 구간 기록. 타임라인이 없으면 아무것도 하지 않음."""
+    timeline = _current.get()
+    if timeline is None:
+        yield
+        return
+    with timeline.span(stage, **attrs):
+        yield
+
+
+def get_active(session_id: str) -> Optional[Timeline]:
+    return _active.get(session_id)
+
+
+# ──────────────────────────────────────
+# 저장
+# ──────────────────────────────────────
+
+async def checkpoint(db: AsyncSession, timeline: Timeline) -> None:
+    """진행 중 타임라인을 session_timelines에 덮어쓰기 (다른 워커의 조회용). 실패해도 생성은 계속."""
+    await _write(db, timeline)
+
+
+async def save(db: AsyncSession, timeline: Timeline) -> None:
+    """session_timelines에 최종 저장(덮어쓰기)하고 진행 중 목록에서 제거. 실패해도 생성 결과에는 영향 없음."""
+    _active.pop(timeline.session_id, None)
+    if timeline.dropped:
+        logger.warning("타임라인 span 상한 초과: session=%s, dropped=%d", timeline.session_id, timeline.dropped)
+    await _write(db, timeline)
+
+
+async def _write(db: AsyncSession, timeline: Timeline) -> None:
+    with timeline._lock:
+        spans = list(timeline.spans)
+    try:
+        await db.merge(SessionTimelineModel(
+            session_id=timeline.session_id,
+            started_at=timeline.started_at,
+            total_ms=timeline.total_ms,
+            spans=json.dumps(spans, ensure_ascii=False, separators=(",", ":")),
+        ))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.warning("타임라인 저장 실패: session=%s, %s: %s", timeline.session_id, type(e).__name__, e)
@@ -0,0 +1,22 @@
+"""gunicorn 설정 (Dockerfile). 워커 수/바인드는 CMD 인자로 지정.
+
+PROMETHEUS_MULTIPROC_DIR(app/metrics.py 멀티프로세스 모드)를 서버 시작 시 비우고,
+종료된 워커의 게이지 값은 합산에서 빠지도록 정리합니다.
+"""
+
+import os
+import shutil
+
+
+def on_starting(server):
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
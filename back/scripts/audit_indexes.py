@@ -0,0 +1,288 @@
+"""인덱스 감사: 앱의 실제 쿼리를 EXPLAIN QUERY PLAN으로 검사합니다.
+
+사용법:
+    python scripts/audit_indexes.py            # 전체 스캔이 있으면 exit 1 (CI용)
+    python scripts/audit_indexes.py -v         # 모든 쿼리의 실행 계획 출력
+
+임시 SQLite DB에 마이그레이션을 적용하고 샘플 데이터를 넣은 뒤, TestClient로
+주요 엔드포인트(세션/카드/복습/통계/폴더/탐색/계정)와 백그라운드 정리 작업을 호출합니다.
+그동안 실행된 SELECT/UPDATE/DELETE를 모두 수집해 실행 계획을 확인하고,
+테이블 전체 스캔(SCAN <table>)이 있는 쿼리를 실패로 보고합니다.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# 앱 import 전에 임시 DB로 고정
+_TMP_DIR = tempfile.mkdtemp(prefix="decard-audit-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/audit.db"
+os.environ["EXPLORE_CACHE_PATH"] = f"{_TMP_DIR}/explore_cache.db"
+os.environ.setdefault("APP_ENV", "dev")
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import download_counter, library_service, main, pagination, search_service
+from app.auth import create_access_token
+from app.database import Base, SessionLocal, async_engine, create_tables, engine
+from app.models import (
+    CardModel, CardReviewModel, FolderModel, GradeModel, PublicCardModel,
+    PublicCardsetModel, SessionModel, SessionTimelineModel, UserModel,
+)
+
+DEVICE_ID = "dev_audit"
+_SCAN_RE = re.compile(r"^SCAN (\w+)")
+_AUDITED_PREFIXES = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+# ──────────────────────────────────────
+# 쿼리 수집
+# ──────────────────────────────────────
+
+class QueryRecorder:
+    """엔진에서 실행된 SQL을 (문장 → 첫 파라미터)로 수집."""
+
+    def __init__(self):
+        self.queries: dict = {}
+        self.current_scenario = ""
+        self.scenarios: dict = {}
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        sql = " ".join(statement.split())
+        if not sql.upper().startswith(_AUDITED_PREFIXES) or "schema_version" in sql:
+            return
+        if sql not in self.queries:
+            self.queries[sql] = parameters
+            self.scenarios[sql] = self.current_scenario
+
+
+# ──────────────────────────────────────
+# 샘플 데이터
+# ──────────────────────────────────────
+
+def _seed() -> dict:
+    db = SessionLocal()
+    try:
+        user = UserModel(id="usr_audit", kakao_id="k_audit", nickname="audit")
+        doomed = UserModel(id="usr_doomed", kakao_id="k_doomed", nickname="doomed")
+        db.add_all([user, doomed])
+        folder = FolderModel(name="감사", user_id=user.id, device_id=DEVICE_ID)
+        db.add(folder)
+        db.flush()
+
+        now = datetime.utcnow()
+        sessions = []
+        for owner, dev in ((user.id, f"migrated_{user.id}"), (None, DEVICE_ID), (doomed.id, "dev_doomed")):
+            for i, source in enumerate(("pdf", "manual", "explore")):
+                s = SessionModel(
+                    filename=f"{source}_{i}.pdf", user_id=owner, device_id=dev, source_type=source,
+                    folder_id=folder.id if owner == user.id else None,
+                    status="completed", created_at=now - timedelta(days=i),
+                )
+                db.add(s)
+                sessions.append(s)
+        db.add(SessionModel(filename="stuck.pdf", device_id=DEVICE_ID, status="processing",
+                            created_at=now - timedelta(hours=3)))
+        aborted = SessionModel(filename="aborted.csv", device_id=DEVICE_ID, source_type="csv",
+                               status="importing", created_at=now - timedelta(hours=3))
+        db.add(aborted)
+        db.flush()
+        db.add(CardModel(session_id=aborted.id, front="IQ", back="IA", status="accepted"))
+        db.add(SessionTimelineModel(session_id=sessions[0].id, started_at=now, total_ms=1200,
+                                    spans='[{"stage":"extraction","at_ms":0,"ms":300}]'))
+
+        cards = []
+        for s in sessions:
+            for j, status in enumerate(("pending", "accepted", "accepted", "rejected")):
+                c = CardModel(session_id=s.id, front=f"Q{j}", back=f"A{j}", status=status)
+                db.add(c)
+                cards.append(c)
+        db.flush()
+        for k, c in enumerate(cards):
+            owner = next(s for s in sessions if s.id == c.session_id)
+            db.add(CardReviewModel(
+                card_id=c.id, user_id=owner.user_id, device_id=owner.device_id, rating=3,
+                interval_days=k % 30, due_date=now - timedelta(days=1), reviewed_at=now - timedelta(days=k % 3),
+            ))
+            db.add(GradeModel(card_id=c.id, user_answer="답", score="correct"))
+
+        cs = PublicCardsetModel(title="감사 카드셋", category="certificate", card_count=3)
+        db.add(cs)
+        db.flush()
+        public_cards = [
+            PublicCardModel(cardset_id=cs.id, front=f"PQ{j}", back=f"PA{j}", sort_order=j) for j in range(3)
+        ]
+        db.add_all(public_cards)
+        db.flush()
+        search_service.index_cardset(db, cs.id)
+
+        # Explore 참조 세션 (카드 행 없이 공개 카드셋 참조)
+        linked = SessionModel(filename="참조", user_id=user.id, device_id=DEVICE_ID, source_type="explore",
+                              folder_id=folder.id, status="completed", source_cardset_id=cs.id)
+        db.add(linked)
+        db.flush()
+        db.add(SessionModel(filename="참조", user_id=doomed.id, device_id="dev_doomed", source_type="explore",
+                            status="completed", source_cardset_id=cs.id))
+        db.commit()
+
+        return {
+            "user_id": user.id,
+            "doomed_id": doomed.id,
+            "folder_id": folder.id,
+            "session_id": sessions[0].id,
+            "card_id": cards[1].id,
+            "cardset_id": cs.id,
+            "linked_session_id": linked.id,
+            "ref_card_ids": [library_service.ref_id(linked.id, pc.id) for pc in public_cards],
+        }
+    finally:
+        db.close()
+
+
+# ──────────────────────────────────────
+# 시나리오 (실제 엔드포인트 호출)
+# ──────────────────────────────────────
+
+def _scenarios(ids: dict) -> list:
+    user = {"Authorization": f"Bearer {create_access_token(ids['user_id'])}", "X-Device-ID": DEVICE_ID}
+    device = {"X-Device-ID": DEVICE_ID}
+    doomed = {"Authorization": f"Bearer {create_access_token(ids['doomed_id'])}", "X-Device-ID": "dev_doomed"}
+    sid, card, folder, cs = ids["session_id"], ids["card_id"], ids["folder_id"], ids["cardset_id"]
+    linked, refs = ids["linked_session_id"], ids["ref_card_ids"]
+    after_time = pagination.encode_cursor([datetime.utcnow(), "~"])
+    first_time = pagination.encode_cursor([datetime.min, ""])
+    after_popular = pagination.encode_cursor([10, "~"])
+    return [
+        ("health", "GET", "/health", {}, None),
+        ("billing (user)", "GET", "/api/v1/billing/status", user, None),
+        ("billing (device)", "GET", "/api/v1/billing/status", device, None),
+        ("list sessions (user)", "GET", "/api/v1/sessions", user, None),
+        ("list sessions (device)", "GET", "/api/v1/sessions", device, None),
+        ("list sessions (cursor)", "GET", f"/api/v1/sessions?limit=2&cursor={after_time}", user, None),
+        ("get session", "GET", f"/api/v1/sessions/{sid}", user, None),
+        ("get session (summary)", "GET", f"/api/v1/sessions/{sid}?fields=summary", user, None),
+        ("get linked session (summary)", "GET", f"/api/v1/sessions/{linked}?fields=summary", user, None),
+        ("session cards", "GET", f"/api/v1/sessions/{sid}/cards?limit=2", user, None),
+        ("session cards (cursor)", "GET", f"/api/v1/sessions/{sid}/cards?cursor={first_time}&status=accepted",
+         user, None),
+        ("linked session cards", "GET", f"/api/v1/sessions/{linked}/cards?limit=2", user, None),
+        ("linked session cards (extra)", "GET", f"/api/v1/sessions/{linked}/cards?cursor={first_time}", user, None),
+        ("session timeline", "GET", f"/api/v1/sessions/{sid}/timeline", user, None),
+        ("download csv", "GET", f"/api/v1/sessions/{sid}/download", user, None),
+        ("accept all", "POST", f"/api/v1/sessions/{sid}/accept-all", user, None),
+        ("share", "POST", f"/api/v1/sessions/{sid}/share", user, None),
+        ("list folders", "GET", "/api/v1/folders", user, None),
+        ("list folders (page)", "GET", "/api/v1/folders?limit=1", user, None),
+        ("list folders (cursor)", "GET", f"/api/v1/folders?cursor={after_time}", device, None),
+        ("folder sessions", "GET", f"/api/v1/folders/{folder}/sessions", user, None),
+        ("folder sessions (page)", "GET", f"/api/v1/folders/{folder}/sessions?limit=1", user, None),
+        ("folder sessions (cursor)", "GET", f"/api/v1/folders/{folder}/sessions?limit=1&cursor={after_time}",
+         user, None),
+        ("review card", "POST", f"/api/v1/cards/{card}/review", user, {"rating": 3}),
+        ("get linked session", "GET", f"/api/v1/sessions/{linked}", user, None),
+        ("review ref card", "POST", f"/api/v1/cards/{refs[0]}/review", user, {"rating": 3}),
+        ("edit ref card", "PATCH", f"/api/v1/cards/{refs[1]}", user, {"front": "수정"}),
+        ("download csv (linked)", "GET", f"/api/v1/sessions/{linked}/download", user, None),
+        ("download apkg (linked)", "GET", f"/api/v1/sessions/{linked}/download?format=apkg", user, None),
+        ("download folder", "GET", f"/api/v1/folders/{folder}/download", user, None),
+        ("download folder (apkg)", "GET", f"/api/v1/folders/{folder}/download?format=apkg", user, None),
+        ("download library", "GET", "/api/v1/library/download", user, None),
+        ("download library (device)", "GET", "/api/v1/library/download", device, None),
+        ("study due", "GET", "/api/v1/study/due", user, None),
+        ("study due (folder)", "GET", f"/api/v1/study/due?folder_id={folder}", user, None),
+        ("study stats (user)", "GET", "/api/v1/study/stats", user, None),
+        ("study stats (device)", "GET", "/api/v1/study/stats", device, None),
+        ("explore categories", "GET", "/api/v1/explore/categories", {}, None),
+        ("explore list", "GET", "/api/v1/explore/cardsets", {}, None),
+        ("explore list (latest)", "GET", "/api/v1/explore/cardsets?sort=latest&category=certificate", {}, None),
+        ("explore list (cursor)", "GET", f"/api/v1/explore/cardsets?cursor={after_popular}", {}, None),
+        ("explore list (latest, cursor)", "GET",
+         f"/api/v1/explore/cardsets?sort=latest&category=certificate&cursor={after_time}", {}, None),
+        ("explore search", "GET", "/api/v1/explore/cardsets?search=감사 카드&category=certificate", {}, None),
+        ("explore detail", "GET", f"/api/v1/explore/cardsets/{cs}", {}, None),
+        ("explore download", "POST", f"/api/v1/explore/cardsets/{cs}/download", user, None),
+        ("delete session", "DELETE", f"/api/v1/sessions/{sid}", user, None),
+        ("delete linked session", "DELETE", f"/api/v1/sessions/{linked}", user, None),
+        ("link device", "POST", "/api/v1/auth/link-device", user, None),
+        ("delete account", "DELETE", "/api/v1/auth/me", doomed, None),
+    ]
+
+
+def _run_scenarios(recorder: QueryRecorder, ids: dict) -> list:
+    client = TestClient(main.app)  # with 블록 없이 — startup 훅(슬랙/정리 루프) 미실행
+    failures = []
+    for name, method, path, headers, body in _scenarios(ids):
+        recorder.current_scenario = name
+        resp = client.request(method, path, headers=headers, json=body)
+        if resp.status_code >= 400:
+            failures.append(f"{name}: {method} {path} → {resp.status_code} {resp.text[:200]}")
+
+    recorder.current_scenario = "cleanup stuck sessions"
+    try:
+        asyncio.run(asyncio.wait_for(main._cleanup_stuck_sessions(), timeout=1))
+    except asyncio.TimeoutError:
+        pass  # 첫 정리 후 sleep(300)에서 중단
+
+    recorder.current_scenario = "flush download counts"
+    asyncio.run(download_counter.counter.flush())
+    return failures
+
+
+# ──────────────────────────────────────
+# 실행 계획 검사
+# ──────────────────────────────────────
+
+def _explain(sql: str, params) -> list:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def _full_scans(plan: list) -> list:
+    tables = set(Base.metadata.tables) | {"public_cardset_search"}  # 검색 색인 매핑 (FTS5 가상 테이블 제외)
+    return [detail for detail in plan if (m := _SCAN_RE.match(detail)) and m.group(1) in tables]
+
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description="핫 쿼리 인덱스 감사 (EXPLAIN QUERY PLAN)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="모든 쿼리의 실행 계획 출력")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    create_tables()
+    ids = _seed()
+
+    recorder = QueryRecorder()
+    event.listen(engine, "before_cursor_execute", recorder)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", recorder)
+    scenario_failures = _run_scenarios(recorder, ids)
+    event.remove(engine, "before_cursor_execute", recorder)
+    event.remove(async_engine.sync_engine, "before_cursor_execute", recorder)
+
+    offenders = []
+    for sql, params in recorder.queries.items():
+        plan = _explain(sql, params)
+        scans = _full_scans(plan)
+        if scans:
+            offenders.append((recorder.scenarios[sql], sql, plan))
+        if args.verbose or scans:
+            print(f"[{'FULL SCAN' if scans else 'ok'}] ({recorder.scenarios[sql]}) {sql}")
+            for detail in plan:
+                print(f"    {detail}")
+
+    print(f"\n쿼리 {len(recorder.queries)}개 검사, 전체 스캔 {len(offenders)}개")
+    for failure in scenario_failures:
+        print(f"  시나리오 실패: {failure}")
+    return 1 if offenders or scenario_failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
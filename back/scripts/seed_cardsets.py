@@ -8,6 +8,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import SessionLocal, create_tables
 from app.models import PublicCardsetModel, PublicCardModel
+from app import explore_cache, search_service
 
 
 SEED_CARDSETS = [
@@ -225,8 +226,11 @@ def seed():
                     evidence=c.get("evidence", ""),
                     template_type=c.get("template_type", "definition"),
                 ))
+            db.flush()
+            search_service.index_cardset(db, cardset.id)
 
         db.commit()
+        explore_cache.invalidate("categories", "cardsets")
         print(f"시드 데이터 {len(SEED_CARDSETS)}개 카드셋, 총 {total_cards}장 카드 삽입 완료!")
     except Exception as e:
         db.rollback()
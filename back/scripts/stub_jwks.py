@@ -0,0 +1,133 @@
+"""로컬 JWKS 스텁 서버 — Apple/Google 로그인을 네트워크 없이 테스트.
+
+사용법:
+    python scripts/stub_jwks.py                    # 127.0.0.1:8765 에서 서비스
+    python scripts/stub_jwks.py --port 0 --max-age 60 --sub test_user
+
+출력된 APPLE_JWKS_URL / GOOGLE_JWKS_URL을 .env에 넣고 서버를 띄운 뒤,
+함께 출력된 id_token으로 /api/v1/auth/apple/verify, /google/verify를 호출하면 됩니다.
+
+코드에서 쓸 때:
+    with StubJWKSServer(max_age=60) as stub:
+        settings.APPLE_JWKS_URL = stub.url
+        token = stub.mint("apple", sub="u1")
+        stub.rotate()            # 키 교체 → 모르는 kid 재조회 확인
+        stub.fetch_count         # 서버가 받은 JWKS 요청 수
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from app.config import settings
+
+ISSUERS = {"apple": "https://appleid.apple.com", "google": "https://accounts.google.com"}
+
+
+class StubJWKSServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, max_age: int = 3600, keep_old_keys: int = 1):
+        self.host = host
+        self.port = port
+        self.max_age = max_age
+        self.keep_old_keys = keep_old_keys
+        self.fetch_count = 0
+        self._keys: list = []  # [(kid, private_key)] 최신이 마지막
+        self._server = None
+        self._thread = None
+        self.rotate()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/keys"
+
+    def rotate(self) -> str:
+        """새 서명 키 추가 (이전 키는 keep_old_keys개까지 JWKS에 유지). 새 kid 반환."""
+        kid = uuid.uuid4().hex[:12]
+        self._keys.append((kid, rsa.generate_private_key(public_exponent=65537, key_size=2048)))
+        self._keys = self._keys[-(self.keep_old_keys + 1):]
+        return kid
+
+    def jwks(self) -> dict:
+        keys = []
+        for kid, private_key in self._keys:
+            jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+            keys.append({**jwk, "kid": kid, "use": "sig", "alg": "RS256"})
+        return {"keys": keys}
+
+    def mint(self, provider: str, sub: str = "stub_user", email: str = "stub@example.com",
+             audience: str | None = None, expires_in: int = 3600, **claims) -> str:
+        """현재 키로 서명한 provider 형식의 id_token."""
+        if audience is None:
+            audience = settings.APPLE_BUNDLE_ID if provider == "apple" else (settings.GOOGLE_CLIENT_ID_WEB or "stub-client")
+        kid, private_key = self._keys[-1]
+        now = int(time.time())
+        payload = {
+            "iss": ISSUERS[provider], "aud": audience, "sub": sub, "email": email,
+            "iat": now, "exp": now + expires_in, **claims,
+        }
+        return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+    def __enter__(self) -> "StubJWKSServer":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive (실제 제공자처럼 연결 재사용)
+
+            def do_GET(self):
+                stub.fetch_count += 1
+                body = json.dumps(stub.jwks()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={stub.max_age}")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="로컬 JWKS 스텁 서버")
+    parser.add_argument("--port", type=int, default=8765, help="0이면 빈 포트 자동 선택")
+    parser.add_argument("--max-age", type=int, default=3600, help="Cache-Control max-age (초)")
+    parser.add_argument("--sub", default="stub_user", help="발급할 토큰의 sub")
+    args = parser.parse_args()
+
+    with StubJWKSServer(port=args.port, max_age=args.max_age) as stub:
+        print(f"APPLE_JWKS_URL={stub.url}")
+        print(f"GOOGLE_JWKS_URL={stub.url}")
+        print(f"\napple id_token:\n{stub.mint('apple', sub=args.sub)}")
+        print(f"\ngoogle id_token (aud={settings.GOOGLE_CLIENT_ID_WEB or 'stub-client'}):\n"
+              f"{stub.mint('google', sub=args.sub)}")
+        print("\nCtrl-C로 종료")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
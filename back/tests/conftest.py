@@ -0,0 +1,45 @@
+"""
+백엔드 통합 테스트 공통 설정
+임시 SQLite DB로 앱을 띄우고 TestClient를 제공
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ.setdefault("APP_ENV", "dev")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.auth import create_access_token  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import UserModel  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_user(client, db):
+    """사용자 생성 후 인증 헤더 반환"""
+    def _make(user_id: str) -> dict:
+        db.add(UserModel(id=user_id, kakao_id=f"k_{user_id}", nickname=user_id))
+        db.commit()
+        return {"Authorization": f"Bearer {create_access_token(user_id)}", "X-Device-ID": f"dev_{user_id}"}
+    return _make
@@ -0,0 +1,24 @@
+"""
+AI 채점 API 테스트 (CLI 호출 없이 검증 경로만)
+"""
+
+
+def test_grade_rejects_non_image_drawing(client, make_user):
+    """이미지가 아닌 손글씨 파일은 500이 아니라 400"""
+    user = make_user("usr_grade")
+    r = client.post(
+        "/api/v1/sessions/create-manual",
+        json={"cards": [{"front": "질문", "back": "답"}]},
+        headers=user,
+    )
+    assert r.status_code == 200, r.text
+    card_id = r.json()["cards"][0]["id"]
+
+    r = client.post(
+        f"/api/v1/cards/{card_id}/grade",
+        data={"user_answer": ""},
+        files={"drawing": ("drawing.png", b"not an image", "image/png")},
+        headers=user,
+    )
+    assert r.status_code == 400, r.text
+    assert r.json()["detail"] == "손글씨 이미지를 읽을 수 없습니다."
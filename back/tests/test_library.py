@@ -0,0 +1,92 @@
+"""
+내 라이브러리(다운로드한 공개 카드셋) 테스트
+"""
+
+from app import library_service
+from app.config import settings
+from app.models import CardModel, CardReviewModel, GradeModel
+
+
+def _publish(client, headers: dict, count: int) -> str:
+    """카드 count장짜리 세션을 만들어 공개하고 카드셋 ID 반환"""
+    r = client.post(
+        "/api/v1/sessions/create-manual",
+        json={"cards": [{"front": f"q{i:03d}", "back": f"a{i:03d}"} for i in range(count)]},
+        headers=headers,
+    )
+    assert r.status_code == 200, r.text
+    r = client.post(
+        "/api/v1/explore/publish",
+        json={"session_id": r.json()["id"], "title": "테스트 카드셋", "description": "d", "category": "etc"},
+        headers=headers,
+    )
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def _download(client, headers: dict, cardset_id: str, mode: str, monkeypatch) -> str:
+    monkeypatch.setattr(settings, "EXPLORE_DOWNLOAD_MODE", mode)
+    r = client.post(f"/api/v1/explore/cardsets/{cardset_id}/download", headers=headers)
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def _history_count(db, card_ids: list) -> int:
+    db.expire_all()
+    return sum(
+        db.query(model).filter(model.card_id.in_(card_ids)).count()
+        for model in (GradeModel, CardReviewModel)
+    )
+
+
+def test_delete_session_removes_history(client, db, make_user, monkeypatch):
+    """세션 삭제 시 가상 ID/구체화 카드 ID 모두의 채점·복습 기록이 함께 삭제"""
+    author = make_user("usr_author_del")
+    user = make_user("usr_reader_del")
+    cardset_id = _publish(client, author, 4)
+
+    for mode in ("link", "copy"):
+        sid = _download(client, user, cardset_id, mode, monkeypatch)
+        cards = client.get(f"/api/v1/sessions/{sid}", headers=user).json()["cards"]
+        if mode == "link":
+            assert all(c["id"].startswith(library_service.REF_PREFIX) for c in cards)
+            # 첫 카드만 구체화
+            r = client.patch(f"/api/v1/cards/{cards[0]['id']}", headers=user, json={"front": "수정됨"})
+            assert r.status_code == 200, r.text
+        card_ids = [c["id"] for c in cards]
+        for card_id in card_ids:
+            r = client.post(f"/api/v1/cards/{card_id}/review", headers=user, json={"rating": 3})
+            assert r.status_code == 200, r.text
+            db.add(GradeModel(card_id=card_id, user_answer="a", score="correct"))
+        db.commit()
+        assert _history_count(db, card_ids) == 2 * len(card_ids)
+
+        r = client.delete(f"/api/v1/sessions/{sid}", headers=user)
+        assert r.status_code == 200, r.text
+        assert _history_count(db, card_ids) == 0
+        db.expire_all()
+        assert db.query(CardModel).filter(CardModel.session_id == sid).count() == 0
+
+
+def test_copied_cards_page_in_sort_order(client, db, make_user, monkeypatch):
+    """copy 다운로드 카드를 페이지로 받아도 공개 카드셋 순서 그대로 (created_at = 기준 시각 + sort_order µs)"""
+    author = make_user("usr_author_copy")
+    user = make_user("usr_reader_copy")
+    cardset_id = _publish(client, author, 25)
+    expected = [c["front"] for c in client.get(f"/api/v1/explore/cardsets/{cardset_id}").json()["cards"]]
+    sid = _download(client, user, cardset_id, "copy", monkeypatch)
+
+    fronts, cursor = [], None
+    while True:
+        params = {"limit": 7, **({"cursor": cursor} if cursor else {})}
+        r = client.get(f"/api/v1/sessions/{sid}/cards", headers=user, params=params)
+        assert r.status_code == 200, r.text
+        fronts += [c["front"] for c in r.json()]
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    assert fronts == expected == [f"q{i:03d}" for i in range(25)]
+    db.expire_all()
+    created = [c.created_at for c in db.query(CardModel).filter(CardModel.session_id == sid)]
+    assert len(set(created)) == 25
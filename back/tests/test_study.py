@@ -0,0 +1,52 @@
+"""
+SRS 학습 API 테스트
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.database import engine
+from app.models import CardReviewModel
+
+
+def test_due_and_stats_use_latest_review(client, db, make_user):
+    """복습 대기 여부는 카드의 가장 최근 복습 기록 기준"""
+    user = make_user("usr_study")
+    r = client.post(
+        "/api/v1/sessions/create-manual",
+        json={"cards": [{"front": f"q{i}", "back": "a"} for i in range(3)]},
+        headers=user,
+    )
+    assert r.status_code == 200, r.text
+    cards = [c["id"] for c in r.json()["cards"]]
+
+    now = datetime.utcnow()
+    past, future = now - timedelta(days=1), now + timedelta(days=3)
+    # cards[0]: 예전 기록은 대기, 최근 기록은 미래 / cards[1]: 그 반대 / cards[2]: 미복습
+    for card_id, dues in ((cards[0], (past, future)), (cards[1], (future, past))):
+        for offset, due_date in enumerate(dues):
+            db.add(CardReviewModel(
+                card_id=card_id, user_id="usr_study", device_id="dev_usr_study", rating=3,
+                interval_days=1, ease_factor=2.5, due_date=due_date,
+                reviewed_at=now - timedelta(hours=2 - offset),
+            ))
+    db.commit()
+
+    statements = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        due = client.get("/api/v1/study/due", headers=user, params={"limit": 500}).json()
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    # 카드마다 최근 복습을 조회하지 않음 (그룹 쿼리 1회)
+    assert sum("FROM card_reviews" in sql for sql in statements) == 1
+    assert {c["id"] for c in due} == {cards[1], cards[2]}
+    assert [c["id"] for c in due][0] == cards[1]  # 복습 카드 먼저, 새 카드는 그다음
+
+    stats = client.get("/api/v1/study/stats", headers=user).json()
+    assert stats["due_cards"] == 2
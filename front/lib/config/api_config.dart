@@ -7,6 +7,8 @@ class ApiConfig {
 
   static String get generateUrl => '$baseUrl$apiPrefix/generate';
   static String sessionUrl(String id) => '$baseUrl$apiPrefix/sessions/$id';
+  static String sessionCardsUrl(String id) =>
+      '$baseUrl$apiPrefix/sessions/$id/cards';
   static String cardUrl(String id) => '$baseUrl$apiPrefix/cards/$id';
   static String acceptAllUrl(String id) =>
       '$baseUrl$apiPrefix/sessions/$id/accept-all';
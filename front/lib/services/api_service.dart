@@ -246,14 +246,7 @@ class ApiService {
   // ── Folder API ──
 
   static Future<List<FolderModel>> listFolders() async {
-    final response = await http.get(
-      Uri.parse(ApiConfig.foldersUrl),
-      headers: await _headers(),
-    );
-    if (response.statusCode != 200) {
-      throw ApiException('폴더 목록을 불러올 수 없습니다.', response.statusCode);
-    }
-    final list = jsonDecode(response.body) as List;
+    final list = await _fetchAllPages(ApiConfig.foldersUrl, '폴더 목록을 불러올 수 없습니다.');
     return list.map((e) => FolderModel.fromJson(e as Map<String, dynamic>)).toList();
   }
 
@@ -313,14 +306,8 @@ class ApiService {
 
   static Future<List<Map<String, dynamic>>> listFolderSessions(
       String folderId) async {
-    final response = await http.get(
-      Uri.parse(ApiConfig.folderSessionsUrl(folderId)),
-      headers: await _headers(),
-    );
-    if (response.statusCode != 200) {
-      throw ApiException('세션 목록을 불러올 수 없습니다.', response.statusCode);
-    }
-    final list = jsonDecode(response.body) as List;
+    final list = await _fetchAllPages(
+        ApiConfig.folderSessionsUrl(folderId), '세션 목록을 불러올 수 없습니다.');
     return list.cast<Map<String, dynamic>>();
   }
 
@@ -405,10 +392,11 @@ class ApiService {
       if (displayName != null && displayName.isNotEmpty)
         'display_name': displayName,
     });
+    // 큰 파일(최대 50MB) 업로드/저장 시간 — 서버 proxy_read_timeout과 맞춤
     final client = dio.Dio(dio.BaseOptions(
       connectTimeout: const Duration(seconds: 30),
-      sendTimeout: const Duration(seconds: 60),
-      receiveTimeout: const Duration(seconds: 60),
+      sendTimeout: const Duration(seconds: 300),
+      receiveTimeout: const Duration(seconds: 300),
     ));
     try {
       final response = await client.post(
@@ -420,7 +408,13 @@ class ApiService {
         final detail = response.data is Map ? response.data['detail'] as String? : null;
         throw ApiException(detail ?? '파일 가져오기에 실패했습니다.', response.statusCode!);
       }
-      return SessionModel.fromJson(response.data as Map<String, dynamic>);
+      final session = SessionModel.fromJson(response.data as Map<String, dynamic>);
+      // 카드가 많으면 응답에는 앞부분만 — 나머지는 커서로 이어서 받음
+      final cursor = response.headers.value('x-next-cursor');
+      if (cursor != null) {
+        session.cards.addAll(await _fetchSessionCards(session.id, cursor));
+      }
+      return session;
     } on dio.DioException catch (e) {
       if (e.response != null) {
         final data = e.response?.data;
@@ -433,6 +427,46 @@ class ApiService {
     }
   }
 
+  /// 세션 카드를 cursor부터 끝까지 조회 (X-Next-Cursor를 따라 페이지 반복)
+  static Future<List<CardModel>> _fetchSessionCards(
+      String sessionId, String cursor) async {
+    final cards = <CardModel>[];
+    String? next = cursor;
+    while (next != null) {
+      final response = await http.get(
+        Uri.parse(
+            '${ApiConfig.sessionCardsUrl(sessionId)}?limit=500&cursor=${Uri.encodeComponent(next)}'),
+        headers: await _headers(),
+      );
+      if (response.statusCode != 200) {
+        throw ApiException('카드를 불러올 수 없습니다.', response.statusCode);
+      }
+      final list = jsonDecode(response.body) as List;
+      cards.addAll(list.map((e) => CardModel.fromJson(e as Map<String, dynamic>)));
+      next = response.headers['x-next-cursor'];
+    }
+    return cards;
+  }
+
+  /// 목록 API를 끝까지 조회 (X-Next-Cursor를 따라 페이지 반복)
+  static Future<List<dynamic>> _fetchAllPages(String url, String errorMessage) async {
+    final items = <dynamic>[];
+    String? next;
+    do {
+      final cursor = next == null ? '' : '&cursor=${Uri.encodeComponent(next)}';
+      final response = await http.get(
+        Uri.parse('$url?limit=200$cursor'),
+        headers: await _headers(),
+      );
+      if (response.statusCode != 200) {
+        throw ApiException(errorMessage, response.statusCode);
+      }
+      items.addAll(jsonDecode(response.body) as List);
+      next = response.headers['x-next-cursor'];
+    } while (next != null);
+    return items;
+  }
+
   // ── Billing API ──
 
   static Future<Map<String, dynamic>> getBillingStatus() async {